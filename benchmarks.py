@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import sys
+from statistics import median
+from time import perf_counter
+from typing import Callable, Optional
+
+from .maze_gen import generate as generate_maze
+from .maze_grid import Grid
+from .maze_hpa import HierarchicalIndex
+from .maze_solver import SOLVERS, find_goal, k_shortest_paths, path_cost, shortest_path, solve_puzzle_dfs
+from .metrics import percentile
+
+# ------------------------------------------------------------
+# Benchmarks reproducibles: laberintos generados con semilla (perfectos,
+# trenzados con ciclos, salas abiertas y con celdas de peso) de tamaño creciente; cada motor se
+# mide con calentamiento y repeticiones (mediana / p95) y el resultado se
+# escribe en JSON para compararlo entre commits.
+#
+#   python -m laberinth_proyect.benchmarks --sizes 16,64,256 --out bench.json
+#   python -m laberinth_proyect.benchmarks --out nuevo.json --compare bench.json
+# ------------------------------------------------------------
+
+DEFAULT_SIZES = (16, 64, 256, 1024, 4096)
+DEFAULT_KS = (4, 16)
+#Tipo de laberinto -> (algoritmo de maze_gen, fracción de ciclos, fracción de celdas con peso)
+MAZE_KINDS: dict[str, tuple[str, float, float]] = {
+    "perfect": ("backtracker", 0.0, 0.0),
+    "braided": ("backtracker", 0.1, 0.0),
+    "rooms": ("rooms", 0.0, 0.0),
+    "weighted": ("backtracker", 0.1, 0.3),
+}
+
+
+def generate(kind: str, size: int, seed: int = 0) -> tuple[Grid, tuple[int, int]]:
+    #Laberinto reproducible de size x size: inicio (0, 0), salida (9) en la última celda libre
+    algorithm, loops, weights = MAZE_KINDS[kind]
+    grid = generate_maze(size, algorithm=algorithm, seed=f"{kind}:{size}:{seed}", braid_fraction=loops,
+                         terrain_fraction=weights)
+    return grid, (0, 0)
+
+
+# ---- Medición ----
+def measure(run: Callable[[], Optional[int]], warmup: int = 1, repeats: int = 5,
+            budget: float = 10.0) -> dict:
+    """
+    Ejecuta run() warmup veces sin medir y luego hasta repeats veces; corta
+    antes si el tiempo medido supera budget segundos (siempre al menos una).
+    run() retorna un valor de control (movimientos) que se guarda con los tiempos.
+    """
+    for _ in range(warmup):
+        run()
+    times = []
+    value = None
+    spent = 0.0
+    while len(times) < repeats and (not times or spent < budget):
+        t0 = perf_counter()
+        value = run()
+        elapsed = perf_counter() - t0
+        times.append(elapsed * 1000)
+        spent += elapsed
+    ordered = sorted(times)
+    return {
+        "repeats": len(times),
+        "median_ms": round(median(ordered), 4),
+        "p95_ms": round(percentile(ordered, 0.95), 4),
+        "min_ms": round(ordered[0], 4),
+        "value": value,
+    }
+
+
+def _cases(grid: Grid, start: tuple[int, int], goal: tuple[int, int], ks) -> dict[str, Callable]:
+    weighted = grid.is_weighted()
+
+    def moves(path) -> Optional[int]: #Valor de control: movimientos, o costo si hay celdas con peso
+        if not path:
+            return None
+        return path_cost(grid, path) if weighted else len(path) - 1
+
+    cases: dict[str, Callable] = {}
+    for name in SOLVERS:
+        cases[name] = lambda name=name: moves(shortest_path(grid, start, goal, algorithm=name))
+    cases["dfs"] = lambda: moves(solve_puzzle_dfs(grid, start[0], start[1]))
+    #Preproceso del motor "hpa" (en "hpa" solo se miden consultas: el índice queda del calentamiento)
+    cases["hpa_build"] = lambda: HierarchicalIndex(grid, workers=1).report()["edges"]
+    for k in ks: #Valor de control: suma de los valores de los k caminos
+        cases[f"k{k}"] = lambda k=k: sum(map(moves, k_shortest_paths(grid, start[0], start[1], k=k)))
+    return cases
+
+
+def run_benchmarks(
+    sizes=DEFAULT_SIZES,
+    kinds=tuple(MAZE_KINDS),
+    benches: Optional[list[str]] = None,
+    ks=DEFAULT_KS,
+    seed: int = 0,
+    warmup: int = 1,
+    repeats: int = 5,
+    budget: float = 10.0,
+    verbose: bool = True,
+) -> dict:
+    results = []
+    for kind in kinds:
+        for size in sizes:
+            t0 = perf_counter()
+            grid, start = generate(kind, size, seed)
+            goal = find_goal(grid)
+            generated = (perf_counter() - t0) * 1000
+            for bench, run in _cases(grid, start, goal, ks).items():
+                if benches and bench not in benches:
+                    continue
+                row = {"maze": kind, "size": size, "bench": bench}
+                row.update(measure(run, warmup=warmup, repeats=repeats, budget=budget))
+                results.append(row)
+                if verbose:
+                    print(f"{kind:>8} {size:>5} {bench:>13}: mediana={row['median_ms']:.3f} ms "
+                          f"p95={row['p95_ms']:.3f} ms (n={row['repeats']}, valor={row['value']})",
+                          file=sys.stderr)
+            if verbose:
+                print(f"{kind:>8} {size:>5} {'(generación)':>13}: {generated:.1f} ms", file=sys.stderr)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "seed": seed,
+            "warmup": warmup,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+# ---- Comparación entre ejecuciones ----
+def compare(old: dict, new: dict, threshold: float = 1.10) -> list[dict]:
+    """
+    Empareja los resultados por (laberinto, tamaño, bench) y retorna los que
+    empeoran: mediana nueva / mediana anterior > threshold, o valor de control
+    distinto (el motor dejó de dar el mismo resultado).
+    """
+    previous = {(r["maze"], r["size"], r["bench"]): r for r in old["results"]}
+    regressions = []
+    for row in new["results"]:
+        before = previous.get((row["maze"], row["size"], row["bench"]))
+        if before is None:
+            continue
+        ratio = row["median_ms"] / before["median_ms"] if before["median_ms"] else 1.0
+        changed = row["value"] != before["value"]
+        if ratio > threshold or changed:
+            regressions.append({"maze": row["maze"], "size": row["size"], "bench": row["bench"],
+                                "before_ms": before["median_ms"], "after_ms": row["median_ms"],
+                                "ratio": round(ratio, 3), "value_changed": changed})
+    return regressions
+
+
+def _int_list(text: str) -> list[int]:
+    return [int(item) for item in text.split(",") if item]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks reproducibles de los solvers.")
+    parser.add_argument("--sizes", type=_int_list, default=list(DEFAULT_SIZES),
+                        help="Lados de los laberintos, separados por comas (default: 16,64,256,1024,4096).")
+    parser.add_argument("--kinds", default=",".join(MAZE_KINDS),
+                        help=f"Tipos de laberinto (default: {','.join(MAZE_KINDS)}).")
+    parser.add_argument("--bench", default="",
+                        help="Limita a estos benchmarks (p. ej. bfs,dfs,k4); por defecto todos.")
+    parser.add_argument("--ks", type=_int_list, default=list(DEFAULT_KS),
+                        help="Valores de k para k-shortest (default: 4,16).")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de los generadores (default: 0).")
+    parser.add_argument("--warmup", type=int, default=1, help="Ejecuciones sin medir (default: 1).")
+    parser.add_argument("--repeats", type=int, default=5, help="Ejecuciones medidas (default: 5).")
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="Segundos máximos medidos por caso antes de cortar las repeticiones (default: 10).")
+    parser.add_argument("--out", metavar="FILE", help="Escribe los resultados JSON en este archivo (default: stdout).")
+    parser.add_argument("--compare", metavar="FILE", help="JSON anterior: informa regresiones y sale con código 1.")
+    parser.add_argument("--threshold", type=float, default=1.10,
+                        help="Cociente de medianas considerado regresión (default: 1.10).")
+    args = parser.parse_args()
+
+    kinds = [kind for kind in args.kinds.split(",") if kind]
+    unknown = [kind for kind in kinds if kind not in MAZE_KINDS]
+    if unknown:
+        parser.error(f"tipos desconocidos: {', '.join(unknown)}")
+    report = run_benchmarks(sizes=args.sizes, kinds=kinds,
+                            benches=[b for b in args.bench.split(",") if b] or None, ks=args.ks,
+                            seed=args.seed, warmup=args.warmup, repeats=args.repeats, budget=args.budget)
+
+    text = json.dumps(report, indent=1)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(json.load(f), report, args.threshold)
+        for r in regressions:
+            note = " (valor distinto)" if r["value_changed"] else ""
+            print(f"[REGRESIÓN] {r['maze']} {r['size']} {r['bench']}: {r['before_ms']:.3f} -> "
+                  f"{r['after_ms']:.3f} ms (x{r['ratio']}){note}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
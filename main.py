@@ -1,7 +1,15 @@
+from time import perf_counter
+_STARTED = perf_counter() #Antes de los imports: --profile-startup los cuenta
+
 import argparse
-from .maze_solver import k_shortest_paths
-from .maze_render import print_solution_official_and_options 
-from .maze_tests import run_sanity_tests
+import sys
+from contextlib import nullcontext
+from itertools import islice
+from .maze_grid import as_grid
+from .maze_solver import SOLVERS, iter_shortest_paths #Sin NumPy: el motor "numpy" lo importa al usarse
+from .maze_render import RENDER_MODES, print_solution_official_and_options
+#maze_tests, metrics, maze_io, maze_cache, maze_batch, maze_server, maze_routes y
+#maze_export se importan solo si la opción que los usa está activa
 
 
 def build_laberinth (): #Construir el laberinto
@@ -33,26 +41,149 @@ def parse_args():
     parser.add_argument("--k", type=int, default=4, help="Cantidad de caminos más cortos a generar (default: 4).")
     parser.add_argument("--start", nargs=2, type=int, default=[1, 0], metavar=("ROW", "COL"),
                         help="Coordenadas de inicio: ROW COL (default: 1 0).")
+    parser.add_argument("--maze", metavar="PATH",
+                        help="Carga el laberinto desde un archivo de texto o binario (.maze, abierto con mmap).")
+    parser.add_argument("--diverse", action="store_true",
+                        help="Hasta K rutas realmente distintas (mesetas) en lugar de los K caminos más cortos.")
+    parser.add_argument("--max-stretch", type=float, default=1.5,
+                        help="Con --diverse: costo máximo de una ruta respecto del óptimo (default: 1.5).")
+    parser.add_argument("--max-overlap", type=float, default=0.5,
+                        help="Con --diverse: fracción máxima de celdas compartidas con las rutas anteriores (default: 0.5).")
+    parser.add_argument("--algorithm", choices=list(SOLVERS), default="bfs",
+                        help="Motor de búsqueda para el camino oficial y las alternativas (default: bfs).")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="Guarda/reutiliza resultados en este directorio (caché en disco entre ejecuciones).")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Resuelve consultas JSON (una por línea, '-' = stdin) y escribe resultados JSON por línea.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos para --batch / --serve (default: todos los núcleos; 1 = sin pool).")
+    parser.add_argument("--serve", metavar="ADDRESS",
+                        help="Servidor JSON por línea en host:puerto o unix:ruta (ver maze_server).")
+    parser.add_argument("--render", choices=RENDER_MODES, default="full",
+                        help="full = mapa por camino, overlay = un mapa con todos, diff = solo cambios, "
+                             "summary = sin mapas, none = sin salida (default: full).")
+    parser.add_argument("--no-render", dest="render", action="store_const", const="none",
+                        help="No imprime los caminos (equivale a --render none).")
+    parser.add_argument("--crop", action="store_true", help="Recorta los mapas a la zona que ocupan los caminos.")
+    parser.add_argument("--all-exits", action="store_true",
+                        help="Los caminos pueden terminar en cualquier salida (9), no solo en la primera.")
+    parser.add_argument("--export-image", metavar="FILE",
+                        help="Guarda el laberinto con los caminos como imagen (.png o .ppm).")
+    parser.add_argument("--scale", type=int, default=1, help="Píxeles por celda en --export-image (default: 1).")
+    parser.add_argument("--export-paths", metavar="FILE",
+                        help="Guarda los caminos en formato compacto (inicio + direcciones comprimidas).")
     parser.add_argument("--no-tests", action="store_true", help="Desactiva sanity tests.")
+    parser.add_argument("--fast", action="store_true",
+                        help="Modo producción: sin sanity tests (no se importa maze_tests).")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Imprime el tiempo de cada etapa: import, load, solve, render, tests...")
+    parser.add_argument("--profile", action="store_true",
+                        help="cProfile + tracemalloc por etapa: pared, CPU, bloques, pico de memoria y funciones más costosas.")
+    parser.add_argument("--profile-dir", metavar="DIR",
+                        help="Con --profile: guarda <etapa>.pstats y <etapa>.collapsed (flamegraph) en DIR.")
     parser.add_argument("--metrics", action="store_true", help="Muestra métricas avanzadas (tiempo/nodos).")
-    return parser.parse_args()
+    parser.add_argument("--metrics-json", action="store_true",
+                        help="Como --metrics, pero stdout es solo una línea JSON (sin mapas ni sanity tests).")
+    args = parser.parse_args()
+    if args.diverse and (args.cache_dir or args.algorithm != "bfs"): #diverse_paths usa sus propios campos de distancias
+        parser.error("--diverse no admite --cache-dir ni --algorithm")
+    if args.export_image: #Antes de resolver e imprimir: el formato sale de la extensión
+        from .maze_export import IMAGE_FORMATS
+        if not args.export_image.lower().endswith(IMAGE_FORMATS):
+            parser.error(f"--export-image admite {' o '.join(IMAGE_FORMATS)}: {args.export_image}")
+    if args.metrics_json: #Salida para máquinas: en stdout solo el JSON de las métricas
+        args.render = "none"
+        args.no_tests = True
+    return args
 
 
 def main():
     args = parse_args()
+    timer = None
+    if args.profile: #Sin estas opciones, cada etapa es un nullcontext
+        from .maze_profile import StageProfiler
+        timer = StageProfiler(started=_STARTED, dump_dir=args.profile_dir)
+    elif args.profile_startup:
+        from .maze_profile import StageTimer
+        timer = StageTimer(started=_STARTED)
+    stage = timer.stage if timer is not None else (lambda name: nullcontext())
+
+    with stage("load"):
+        if args.maze: #Archivo: texto parseado en bloque o binario mapeado sin copia
+            from .maze_io import load_maze
+            lab = load_maze(args.maze)
+        else:
+            lab = as_grid(build_laberinth()) #Conversión única a la representación compacta
+
+    if args.batch: #Modo lote: sin render ni tests, solo resultados JSON por línea
+        from .maze_batch import read_queries, solve_batch, write_results
+        write_results(solve_batch(read_queries(args.batch), default_maze=lab, workers=args.workers))
+        return
+
+    if args.serve: #Servidor de larga duración: el laberinto y sus índices quedan residentes
+        from .maze_server import run_server
+        run_server(args.serve, default_maze=lab, workers=args.workers)
+        return
 
-    lab = build_laberinth()
     start_row, start_col = args.start[0], args.start[1]
+    log = sys.stderr if args.metrics_json else sys.stdout #Avisos fuera del JSON de --metrics-json
+
+    cache = None
+    if args.diverse or args.cache_dir: #Imports fuera de "solve": cuentan en "import"
+        with stage("import"):
+            if args.diverse:
+                from .maze_routes import diverse_paths
+            else:
+                from .maze_cache import SolverCache
+    with stage("solve"):
+        if args.diverse: #Rutas alternativas con solapamiento y sobrecosto acotados (dos campos de distancias)
+            paths = diverse_paths(lab, start_row, start_col, k=args.k, max_stretch=args.max_stretch,
+                                  max_overlap=args.max_overlap, all_goals=args.all_exits)
+        elif args.cache_dir: #Resultado cacheado por contenido del laberinto + parámetros
+            cache = SolverCache(cache_dir=args.cache_dir)
+            paths = cache.k_shortest_paths(lab, start_row, start_col, k=args.k, algorithm=args.algorithm,
+                                           all_goals=args.all_exits)
+        else: #Generador: la solucion oficial se imprime antes de calcular las alternativas
+            k = max(args.k, 1)
+            paths = islice(iter_shortest_paths(lab, (start_row, start_col), limit=k, algorithm=args.algorithm,
+                                               all_goals=args.all_exits), k)
+            if timer is not None: #Medido: la búsqueda se consume aquí para que no caiga en "render"
+                paths = list(paths)
+    with stage("render"):
+        paths = print_solution_official_and_options(lab, paths, render=args.render, crop=args.crop)
+
+    if args.export_image or args.export_paths: #Funciona también con --render none
+        with stage("import"):
+            from .maze_export import export_image, export_paths
+        with stage("export"):
+            if args.export_image:
+                export_image(lab, paths, args.export_image, scale=args.scale)
+                print(f"[EXPORT] imagen: {args.export_image}", file=log)
+            if args.export_paths:
+                count = export_paths(paths, args.export_paths)
+                print(f"[EXPORT] {count} caminos: {args.export_paths}", file=log)
+
+    if cache is not None:
+        stats = cache.stats
+        print(f"[CACHE] aciertos={stats['hits']} disco={stats['disk_hits']} "
+              f"fallos={stats['misses']} desalojos={stats['evictions']}", file=log)
 
-    paths = k_shortest_paths(lab, start_row, start_col, k=args.k)
-    print_solution_official_and_options(lab, paths)
+    if not (args.no_tests or args.fast):
+        with stage("import"):
+            from .maze_tests import run_sanity_tests
+        with stage("tests"):
+            run_sanity_tests(lab, (start_row, start_col), k=args.k, verbose=True, algorithm=args.algorithm,
+                             all_goals=args.all_exits, paths=paths) #Valida los caminos ya impresos, sin recalcularlos
 
-    if not args.no_tests:
-        run_sanity_tests(lab, (start_row, start_col), k=args.k, verbose=True)
+    if args.metrics or args.metrics_json:
+        with stage("import"):
+            from .metrics import print_advanced_metrics
+        with stage("metrics"):
+            print_advanced_metrics(lab, (start_row, start_col), k=args.k, algorithm=args.algorithm,
+                                   as_json=args.metrics_json, all_goals=args.all_exits)
 
-    if args.metrics:
-        from .metrics import print_advanced_metrics
-        print_advanced_metrics(lab, (start_row, start_col), k=args.k)
+    if timer is not None:
+        print(timer.report(), file=log)
 
 
 if __name__ == "__main__": #Ejecutar la funcion principal
@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from multiprocessing import shared_memory
+from typing import Any, Iterable, Iterator, Optional, Union
+
+from .maze_cache import fingerprint
+from .maze_grid import Grid, as_grid
+from .maze_index import MazeIndex
+from .maze_io import load_maze
+from .maze_solver import k_shortest_paths, path_cost
+
+# ------------------------------------------------------------
+# Resolución por lotes: muchas consultas (laberinto, inicio) repartidas en
+# un ProcessPoolExecutor. Cada laberinto distinto se publica una sola vez en
+# memoria compartida y los workers lo adjuntan sin copiarlo ni deserializarlo.
+#
+# Consulta (una línea JSON):
+#   {"id": 7, "start": [1, 0], "k": 4, "algorithm": "bfs", "goal_value": 9,
+#    "maze": [[...], ...]}          # "maze" opcional: por defecto el del CLI;
+#                                    # también puede ser la ruta de un archivo
+#   "all_exits": true = caminos hacia cualquier salida (por defecto la primera)
+# Resultado (una línea JSON, en el mismo orden):
+#   {"id": 7, "start": [1, 0], "moves": [20, 20], "paths": [[[1, 0], ...], ...]}
+#   ("costs": [...] se agrega si el laberinto tiene celdas con peso)
+#   {"id": 7, "error": "..."}
+# ------------------------------------------------------------
+
+LOCAL_INDEXES = 64  #Índices retenidos como máximo en la ejecución sin pool
+_SHARED_MAZES = 16  #Laberintos en memoria compartida a la vez (LRU), en el principal y en cada worker
+
+# Estado de cada worker: laberintos adjuntados e índices de distancias por nombre,
+# del menos al más usado recientemente
+_attached: dict[str, tuple[Any, MazeIndex]] = {}
+
+
+def attach(name: str, rows: int, cols: int) -> MazeIndex:
+    entry = _attached.pop(name, None)
+    if entry is None:
+        try: #El bloque lo libera el proceso principal (al desalojarlo o al terminar)
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError: #Python < 3.13 (el registro lo comparte con el principal)
+            shm = shared_memory.SharedMemory(name=name)
+        size = (rows + 2) * (cols + 2)
+        grid = Grid(rows, cols, cells=shm.buf[:size])
+        entry = (shm, MazeIndex(grid))
+        while len(_attached) >= _SHARED_MAZES:
+            _detach(next(iter(_attached)))
+    _attached[name] = entry #Al final: el más reciente
+    return entry[1]
+
+
+def _detach(name: str) -> None:
+    #Suelta el bloque y su índice (el principal ya lo desalojó, o sobra en este worker)
+    entry = _attached.pop(name, None)
+    if entry is None:
+        return
+    shm, index = entry
+    try:
+        index.grid.cells.release()
+        shm.close()
+    except BufferError: #Queda alguna vista viva: el mapeo se libera con el último uso
+        pass
+
+
+def solve_query(task: tuple) -> dict:
+    qid, maze, start, k, goal_value, algorithm, all_goals = task
+    result: dict[str, Any] = {"id": qid, "start": list(start)}
+    try:
+        #maze = (nombre en memoria compartida, filas, columnas) o MazeIndex local (sin pool)
+        index = attach(*maze) if isinstance(maze, tuple) else maze
+        grid = index.grid
+        if index.goal_value != goal_value or index.all_goals != all_goals:
+            index = None
+        paths = k_shortest_paths(grid, start[0], start[1], k=k, goal_value=goal_value,
+                                 algorithm=algorithm, index=index, all_goals=all_goals)
+    except Exception as exc: #El error viaja en el resultado, no corta el lote
+        result["error"] = f"{type(exc).__name__}: {exc}"
+        return result
+    result["moves"] = [len(path) - 1 for path in paths]
+    if grid.is_weighted(): #Con celdas de peso el orden es por costo
+        result["costs"] = [path_cost(grid, path) for path in paths]
+    result["paths"] = [[list(pos) for pos in path] for path in paths]
+    return result
+
+
+def solve_chunk(tasks: list[tuple], evicted: tuple[str, ...] = ()) -> list[dict]:
+    #evicted = bloques que el principal ya desalojó: el worker suelta su copia e índice
+    for name in evicted:
+        _detach(name)
+    return [solve_query(task) for task in tasks]
+
+
+class SharedMazes:
+    """
+    Publica cada laberinto distinto (por huella) una sola vez en memoria
+    compartida, con como mucho `capacity` bloques: al pasarse se libera
+    (unlink) el usado menos recientemente que no tenga tareas en vuelo.
+    publish() reserva el bloque para una tarea y release() lo suelta.
+    evicted = nombres desalojados hace poco, para avisar a los workers.
+    """
+
+    def __init__(self, capacity: int = _SHARED_MAZES):
+        self.capacity = capacity
+        self._blocks: dict[str, tuple[Any, tuple[str, int, int]]] = {}  #Del menos al más reciente
+        self._keys: dict[str, str] = {}  #Nombre del bloque -> huella
+        self._pins: dict[str, int] = {}  #Huella -> tareas en vuelo
+        self.evicted: deque[str] = deque(maxlen=4 * capacity)
+
+    def publish(self, grid: Grid) -> tuple[str, int, int]:
+        key = fingerprint(grid)
+        entry = self._blocks.pop(key, None)
+        if entry is None:
+            shm = shared_memory.SharedMemory(create=True, size=len(grid.cells))
+            shm.buf[:len(grid.cells)] = grid.cells
+            entry = (shm, (shm.name, grid.rows, grid.cols))
+            self._keys[shm.name] = key
+        self._blocks[key] = entry
+        self._pins[key] = self._pins.get(key, 0) + 1
+        self._evict()
+        return entry[1]
+
+    def release(self, maze: tuple[str, int, int]) -> None:
+        key = self._keys.get(maze[0])
+        if key is None:
+            return
+        pins = self._pins.pop(key, 0) - 1
+        if pins > 0:
+            self._pins[key] = pins
+        self._evict()
+
+    def _evict(self) -> None:
+        if len(self._blocks) <= self.capacity:
+            return
+        for key in [key for key in self._blocks if key not in self._pins]: #Los más antiguos primero
+            if len(self._blocks) <= self.capacity:
+                break
+            shm, maze = self._blocks.pop(key)
+            del self._keys[maze[0]]
+            shm.close()
+            shm.unlink()
+            self.evicted.append(maze[0])
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def close(self) -> None:
+        for shm, _ in self._blocks.values():
+            shm.close()
+            shm.unlink()
+        self._blocks.clear()
+        self._keys.clear()
+        self._pins.clear()
+
+
+def to_task(query: dict, default_maze: Optional[Grid], files: dict[str, Grid]) -> tuple:
+    maze = query.get("maze")
+    if maze is None:
+        if default_maze is None:
+            raise ValueError("la consulta no incluye 'maze' y no hay laberinto por defecto")
+        grid = default_maze
+    elif isinstance(maze, str): #Ruta de archivo: se carga una sola vez por lote
+        grid = files.get(maze)
+        if grid is None:
+            if len(files) >= LOCAL_INDEXES:
+                files.clear()
+            grid = files[maze] = load_maze(maze)
+    else:
+        grid = as_grid(maze) #Los repetidos se comparten igual: se publican por huella
+    start = tuple(query["start"])
+    return (query.get("id"), grid, start, int(query.get("k", 4)),
+            int(query.get("goal_value", 9)), query.get("algorithm", "bfs"), bool(query.get("all_exits", False)))
+
+
+def solve_batch(
+    queries: Iterable[Union[dict, str]],
+    default_maze: Union[Grid, list[list[int]], None] = None,
+    workers: Optional[int] = None,
+    chunksize: int = 64,
+) -> Iterator[dict]:
+    """
+    Resuelve las consultas y entrega los resultados en el mismo orden, a
+    medida que se completan los bloques. workers = procesos (None = todos los
+    núcleos; 0 o 1 = en este proceso). chunksize = consultas por tarea.
+    Solo hay unos pocos bloques en vuelo a la vez (contrapresión), así que
+    la entrada puede ser un flujo arbitrariamente largo.
+    """
+    default_grid = as_grid(default_maze) if default_maze is not None else None
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    def tasks() -> Iterator[Union[tuple, dict]]:
+        #Tuplas de tarea; una consulta inválida se convierte directamente en su resultado
+        files: dict[str, Grid] = {}
+        for query in queries:
+            try:
+                if isinstance(query, str): #Línea de read_queries: un JSON inválido es el error de esa consulta
+                    query = json.loads(query)
+                if not isinstance(query, dict):
+                    raise ValueError("la consulta debe ser un objeto JSON")
+                yield to_task(query, default_grid, files)
+            except (KeyError, TypeError, ValueError, AttributeError, OSError) as exc:
+                qid = query.get("id") if isinstance(query, dict) else None
+                yield {"id": qid, "error": f"{type(exc).__name__}: {exc}"}
+
+    if workers <= 1: #En este proceso: un índice de distancias por laberinto distinto
+        indexes: dict[str, MazeIndex] = {}
+        for task in tasks():
+            if isinstance(task, dict):
+                yield task
+                continue
+            qid, grid, *rest = task
+            key = fingerprint(grid)
+            if key not in indexes:
+                if len(indexes) >= LOCAL_INDEXES:
+                    indexes.clear()
+                indexes[key] = MazeIndex(grid)
+            yield solve_query((qid, indexes[key], *rest))
+        return
+
+    shared = SharedMazes()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending: deque = deque()
+            stream = tasks()
+            while True:
+                while len(pending) < workers * 2: #Mantener los workers ocupados sin leer todo
+                    chunk = list(islice(stream, chunksize))
+                    if not chunk:
+                        break
+                    remote, errors = [], []
+                    for position, task in enumerate(chunk):
+                        if isinstance(task, dict): #Consulta inválida: se responde sin enviarla
+                            errors.append((position, task))
+                        else: #El laberinto viaja como (nombre, filas, columnas)
+                            qid, grid, *rest = task
+                            remote.append((qid, shared.publish(grid), *rest))
+                    future = pool.submit(solve_chunk, remote, tuple(shared.evicted))
+                    pending.append((future, remote, errors))
+                if not pending:
+                    break
+                future, remote, errors = pending.popleft()
+                results = future.result()
+                for task in remote: #Bloques libres para desalojar
+                    shared.release(task[1])
+                for position, result in errors: #Reinsertar los errores en su posición
+                    results.insert(position, result)
+                yield from results
+    finally:
+        shared.close()
+
+
+def read_queries(path: str) -> Iterator[str]:
+    #Líneas de consulta JSON sin parsear ("-" = entrada estándar); ignora líneas vacías.
+    #solve_batch y run_client las parsean una a una: una línea inválida no corta la entrada
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        for line in handle:
+            line = line.strip()
+            if line:
+                yield line
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def write_results(results: Iterable[dict], out=None) -> int:
+    #Escribe cada resultado como una línea JSON; retorna cuántos se escribieron
+    out = out or sys.stdout
+    count = 0
+    for result in results:
+        out.write(json.dumps(result, separators=(",", ":")) + "\n")
+        count += 1
+    return count
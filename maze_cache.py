@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from typing import Optional, Union
+from weakref import WeakKeyDictionary
+
+from .maze_grid import Grid, as_grid
+from .maze_solver import k_shortest_paths, shortest_path
+
+# ------------------------------------------------------------
+# Caché de resultados: clave = huella del contenido del grid + parámetros
+# de la consulta; LRU acotada en memoria y opcionalmente en disco.
+# ------------------------------------------------------------
+
+_fingerprints: "WeakKeyDictionary[Grid, tuple[int, str]]" = WeakKeyDictionary()
+
+
+def fingerprint(laberinth: Union[Grid, list[list[int]]]) -> str:
+    #Hash (blake2b) de las dimensiones y el buffer; se memoriza por Grid y versión
+    grid = as_grid(laberinth)
+    cached = _fingerprints.get(grid)
+    if cached is not None and cached[0] == grid.version:
+        return cached[1]
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{grid.rows}x{grid.cols}:".encode())
+    digest.update(grid.cells)
+    value = digest.hexdigest()
+    _fingerprints[grid] = (grid.version, value)
+    return value
+
+
+class SolverCache:
+    """
+    Envuelve shortest_path y k_shortest_paths. maxsize = entradas en memoria
+    (LRU); cache_dir = directorio opcional donde cada resultado se guarda como
+    JSON para que ejecuciones posteriores del CLI lo reutilicen.
+    """
+
+    def __init__(self, maxsize: int = 256, cache_dir: Optional[str] = None):
+        self.maxsize = maxsize
+        self.cache_dir = cache_dir
+        self._entries: OrderedDict[str, list] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    # ---- Consultas cacheadas ----
+    def k_shortest_paths(self, laberinth, start_row, start_column, k=4, goal_value=9, algorithm="bfs",
+                         all_goals=False):
+        grid = as_grid(laberinth)
+        key = self._key(grid, "k", start_row, start_column, goal_value, max(k, 1), algorithm)
+        if all_goals: #Sufijo solo cuando aplica: las claves existentes siguen valiendo
+            key += ":all"
+        paths = self._get(key)
+        if paths is None:
+            paths = k_shortest_paths(grid, start_row, start_column, k=k, goal_value=goal_value, algorithm=algorithm,
+                                     all_goals=all_goals)
+            self._put(key, paths)
+        return [list(path) for path in paths]
+
+    def shortest_path(self, laberinth, start, goal, blocked_cells=None, blocked_moves=None, algorithm="bfs"):
+        grid = as_grid(laberinth)
+        key = self._key(grid, "sp", tuple(start), tuple(goal), sorted(blocked_cells or ()),
+                        sorted(blocked_moves or ()), algorithm)
+        paths = self._get(key)
+        if paths is None:
+            path = shortest_path(grid, start, goal, blocked_cells, blocked_moves, algorithm=algorithm)
+            paths = [path] if path is not None else []
+            self._put(key, paths)
+        return list(paths[0]) if paths else None
+
+    def bfs_shortest_paths(self, laberinth, start, goal, blocked_cells=None, blocked_moves=None):
+        return self.shortest_path(laberinth, start, goal, blocked_cells, blocked_moves, algorithm="bfs")
+
+    # ---- Contadores ----
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+        }
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    # ---- Internos ----
+    def _key(self, grid: Grid, *params) -> str:
+        return fingerprint(grid) + ":" + json.dumps(params, separators=(",", ":"))
+
+    def _path_for(self, key: str) -> str:
+        name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, name + ".json")
+
+    def _get(self, key: str):
+        paths = self._entries.get(key)
+        if paths is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return paths
+        if self.cache_dir:
+            paths = self._load(key)
+            if paths is not None:
+                self.disk_hits += 1
+                self._remember(key, paths)
+                return paths
+        self.misses += 1
+        return None
+
+    def _load(self, key: str):
+        #Entrada en disco -> lista de caminos, o None si no está, es de otra clave o está dañada
+        path = self._path_for(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                stored = json.load(f)
+        except OSError:
+            return None
+        except ValueError:
+            stored = None
+        try:
+            if stored.get("key") != key: #Colisión del nombre: la entrada es válida pero de otra clave
+                return None
+            paths = [[(int(row), int(col)) for row, col in path] for path in stored["paths"]]
+        except (AttributeError, KeyError, TypeError, ValueError):
+            #JSON truncado o con otra forma: se trata como fallo y se borra para no releerlo
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            return None
+        return paths
+
+    def _put(self, key: str, paths) -> None:
+        paths = [[tuple(pos) for pos in path] for path in paths]
+        self._remember(key, paths)
+        if self.cache_dir: #Escritura atómica: archivo temporal + rename
+            self._store(key, paths)
+
+    def _store(self, key: str, paths) -> None:
+        #El disco es opcional: sin espacio o sin permisos el resultado queda solo en memoria
+        try:
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        except OSError:
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "paths": paths}, f, separators=(",", ":"))
+            os.replace(tmp, self._path_for(key))
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def _remember(self, key: str, paths) -> None:
+        self._entries[key] = paths
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
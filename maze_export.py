@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import os
+import struct
+import zlib
+from typing import Iterable, Iterator, Union
+
+from .maze_grid import WALL, Grid, as_grid
+from .maze_render import compressed_directions, path_to_directions
+
+# ------------------------------------------------------------
+# Exportación de soluciones:
+#   - Imagen PNG (paleta indexada, zlib) o PPM (P6), escrita fila a fila:
+#     en memoria solo hay una fila de píxeles y las celdas de los caminos.
+#   - Caminos en formato compacto de texto, una línea por camino:
+#         fila,columna:RUNS      p. ej. 1,0:RD7R4D2R6
+#     RUNS = direcciones U/D/L/R con su repetición (se omite si es 1),
+#     derivadas de compressed_directions.
+# ------------------------------------------------------------
+
+# Paleta: índice -> RGB
+_FREE, _WALL, _EXIT, _START, _OFFICIAL = 0, 1, 2, 3, 4
+PALETTE = [
+    (255, 255, 255),  #Libre
+    (30, 30, 30),     #Pared
+    (220, 40, 40),    #Salida
+    (40, 170, 70),    #Inicio
+    (40, 110, 230),   #Camino oficial
+    (250, 160, 30),   #Alternativas (se repiten en ciclo)
+    (160, 80, 200),
+    (20, 180, 180),
+    (230, 90, 160),
+    (140, 140, 140),
+]
+_ALTERNATIVES = len(PALETTE) - _OFFICIAL - 1
+
+IMAGE_FORMATS = (".png", ".ppm")  #Extensiones que entiende export_image
+_IDAT_BYTES = 1 << 16  #Tamaño de cada bloque IDAT del PNG
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+# ---- Píxeles ----
+def _index_rows(grid: Grid, paths: list[list[tuple[int, int]]], goal_value: int = 9) -> Iterator[bytearray]:
+    #Una fila de índices de paleta por fila del laberinto
+    table = bytearray(256)
+    table[WALL] = _WALL
+    table[goal_value] = _EXIT
+    table = bytes(table)
+    marks: dict[int, list[tuple[int, int]]] = {}
+    for n in range(len(paths) - 1, -1, -1): #El oficial se dibuja encima de las alternativas
+        color = _OFFICIAL if n == 0 else _OFFICIAL + 1 + (n - 1) % _ALTERNATIVES
+        for r, c in paths[n]:
+            marks.setdefault(r, []).append((c, color))
+    start = paths[0][0] if paths else None
+
+    for r in range(grid.rows):
+        row = bytearray(bytes(grid[r]).translate(table))
+        for c, color in marks.get(r, ()):
+            if row[c] != _WALL and row[c] != _EXIT:
+                row[c] = color
+        if start is not None and start[0] == r:
+            row[start[1]] = _START
+        yield row
+
+
+def _scaled_rows(rows: Iterable[bytearray], scale: int, pixel: list[bytes]) -> Iterator[bytes]:
+    #pixel[i] = bytes de un píxel de índice i ya repetidos `scale` veces en horizontal
+    lookup = pixel.__getitem__
+    for row in rows:
+        line = b"".join(map(lookup, row))
+        for _ in range(scale):
+            yield line
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def write_png(rows: Iterable[bytes], width: int, height: int, out) -> None:
+    #PNG con paleta (color type 3, 8 bits): cada fila son índices de PALETTE
+    out.write(_PNG_SIGNATURE)
+    out.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0)))
+    out.write(_png_chunk(b"PLTE", b"".join(bytes(rgb) for rgb in PALETTE)))
+    #Z_RLE: las filas son rachas de pocos índices; ~9x más rápido que la estrategia
+    #por defecto en laberintos grandes a cambio de archivos algo mayores
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 15, 9, zlib.Z_RLE)
+    pending = []
+    size = 0
+    for row in rows:
+        data = compressor.compress(b"\x00" + row) #Filtro 0 (ninguno) por fila
+        if data:
+            pending.append(data)
+            size += len(data)
+            if size >= _IDAT_BYTES:
+                out.write(_png_chunk(b"IDAT", b"".join(pending)))
+                pending, size = [], 0
+    pending.append(compressor.flush())
+    out.write(_png_chunk(b"IDAT", b"".join(pending)))
+    out.write(_png_chunk(b"IEND", b""))
+
+
+def write_ppm(rows: Iterable[bytes], width: int, height: int, out) -> None:
+    #PPM binario (P6): cabecera de texto y luego RGB crudo fila a fila
+    out.write(f"P6\n{width} {height}\n255\n".encode())
+    for row in rows:
+        out.write(row)
+
+
+def export_image(
+    laberinth: Union[Grid, list[list[int]]],
+    paths: list[list[tuple[int, int]]],
+    path: str,
+    scale: int = 1,
+    goal_value: int = 9,
+) -> None:
+    """
+    Dibuja el laberinto y los caminos (oficial en azul, alternativas en otros
+    colores) en path. El formato sale de la extensión: .png o .ppm.
+    scale = píxeles por celda.
+    """
+    grid = as_grid(laberinth)
+    if scale < 1:
+        raise ValueError("scale debe ser al menos 1.")
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in IMAGE_FORMATS: #Antes de abrir: no dejar un archivo vacío
+        raise ValueError("Formato de imagen no soportado (use .png o .ppm).")
+    width, height = grid.cols * scale, grid.rows * scale
+    indexes = _index_rows(grid, paths, goal_value)
+    with open(path, "wb") as f:
+        if extension == ".ppm":
+            pixel = [bytes(rgb) * scale for rgb in PALETTE] + [b""] * (256 - len(PALETTE))
+            write_ppm(_scaled_rows(indexes, scale, pixel), width, height, f)
+        else:
+            pixel = [bytes((i,)) * scale for i in range(256)]
+            rows = indexes if scale == 1 else _scaled_rows(indexes, scale, pixel)
+            write_png(rows, width, height, f)
+
+
+# ---- Formato compacto de caminos ----
+_LETTERS = {"↑": "U", "↓": "D", "←": "L", "→": "R"}
+_STEPS = {"U": (-1, 0), "D": (1, 0), "L": (0, -1), "R": (0, 1)}
+
+
+def encode_path(path: list[tuple[int, int]]) -> str:
+    #(1,0) -> ... -> "1,0:RD7R4D2R6"
+    row, column = path[0]
+    runs = []
+    for token in compressed_directions(path_to_directions(path)).split():
+        arrow, count = token[0], token[2:] #"↓x7" -> ("↓", "7")
+        runs.append(_LETTERS[arrow] + ("" if count == "1" else count))
+    return f"{row},{column}:" + "".join(runs)
+
+
+def decode_path(text: str) -> list[tuple[int, int]]:
+    head, _, runs = text.strip().partition(":")
+    row, column = (int(value) for value in head.split(","))
+    path = [(row, column)]
+    i = 0
+    while i < len(runs):
+        dr, dc = _STEPS[runs[i]]
+        j = i + 1
+        while j < len(runs) and runs[j].isdigit():
+            j += 1
+        for _ in range(int(runs[i + 1:j] or 1)):
+            row += dr
+            column += dc
+            path.append((row, column))
+        i = j
+    return path
+
+
+def export_paths(paths: Iterable[list[tuple[int, int]]], path: str) -> int:
+    #Un camino por línea; retorna cuántos se escribieron
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for route in paths:
+            f.write(encode_path(route) + "\n")
+            count += 1
+    return count
+
+
+def load_paths(path: str) -> list[list[tuple[int, int]]]:
+    with open(path, encoding="utf-8") as f:
+        return [decode_path(line) for line in f if line.strip() and not line.startswith("#")]
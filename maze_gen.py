@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import argparse
+import random
+import re
+from array import array
+from typing import Callable, Optional, Union
+
+from .maze_grid import MAX_WEIGHT, MIN_WEIGHT, WALL, Grid
+from .maze_solver import _numpy
+
+# ------------------------------------------------------------
+# Generadores de laberintos deterministas (misma semilla -> mismo laberinto)
+# que escriben directamente en un Grid.
+#
+# Laberintos "de celdas": las celdas lógicas están en coordenadas pares y las
+# posiciones intermedias son paredes que el algoritmo abre. Los algoritmos
+# trabajan sobre dos arrays de pasos (este / sur) con un borde de relleno, y
+# _render los vuelca al Grid fila a fila con operaciones sobre bytes.
+#
+#   backtracker  DFS iterativo (pasillos largos, pocos cruces)
+#   kruskal      aristas en orden aleatorio + union-find
+#   wilson       caminatas aleatorias con borrado de ciclos (árbol uniforme)
+#   binary_tree  cada celda abre sur o este; vectorizado por filas (10k x 10k
+#                en menos de un segundo) pero muy sesgado (diagonal hacia 0, 0)
+#   sidewinder   por filas: tramos al azar hacia el este y un paso al norte
+#                desde una celda al azar de cada tramo; menos sesgado que
+#                binary_tree y, con NumPy, 10k x 10k en segundos
+#
+# backtracker, kruskal y wilson recorren celda por celda en Python: unos 2,5,
+# 6,5 y 7 s en 2000 x 2000 y del orden de un minuto o más en 10k x 10k.
+# Para tamaños enormes, sidewinder (o binary_tree).
+#
+# Otros: rooms (salas abiertas con puertas) y obstacles (paredes al azar).
+# braid > 0 abre esa fracción de paredes entre celdas para crear ciclos.
+# terrain > 0 da un peso al azar (2..8) a esa fracción de celdas libres.
+# ------------------------------------------------------------
+
+_ROOM = 16  #Lado de cada sala en "rooms"
+_INVERT = bytes.maketrans(b"\x00\x01", b"\x01\x00")  #Paso abierto (1) -> celda libre (0)
+_RUNS = re.compile(rb"\x01*\x00")  #Tramo de sidewinder: pasos al este abiertos hasta el primero cerrado
+
+
+def _threshold_table(probability: float) -> bytes:
+    #Byte aleatorio -> 0 con esa probabilidad, 1 en otro caso
+    cut = round(probability * 256)
+    return bytes(0 if value < cut else 1 for value in range(256))
+
+
+def _bitwise_and(a: bytes, b: bytes) -> bytes:
+    #AND byte a byte de dos secuencias 0/1 del mismo largo (en C, vía enteros)
+    return (int.from_bytes(a, "little") & int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+
+def _bitwise_or(a: bytes, b: bytes) -> bytes:
+    return (int.from_bytes(a, "little") | int.from_bytes(b, "little")).to_bytes(len(a), "little")
+
+
+class _Cells:
+    #Celdas lógicas con borde de relleno: id = (r + 1) * stride + c + 1
+    def __init__(self, rows: int, cols: int):
+        self.rows = (rows + 1) // 2
+        self.cols = (cols + 1) // 2
+        self.stride = self.cols + 2
+        size = (self.rows + 2) * self.stride
+        self.east = bytearray(size)   #1 = abierto hacia la celda de la derecha
+        self.south = bytearray(size)  #1 = abierto hacia la celda de abajo
+
+    def border(self) -> bytearray:
+        #1 en el relleno, 0 en las celdas reales
+        mark = bytearray([1]) * len(self.east)
+        stride = self.stride
+        for r in range(self.rows):
+            base = (r + 1) * stride + 1
+            mark[base:base + self.cols] = bytes(self.cols)
+        return mark
+
+    def link(self, a: int, b: int) -> None: #Abrir el paso entre dos celdas vecinas
+        if a > b:
+            a, b = b, a
+        if b - a == 1:
+            self.east[a] = 1
+        else:
+            self.south[a] = 1
+
+
+def _render(cells: _Cells, rows: int, cols: int) -> Grid:
+    grid = Grid(rows, cols)
+    out = grid.cells
+    stride = cells.stride
+    east_width = cols // 2  #Posiciones impares de una fila de celdas
+    for r in range(cells.rows):
+        base = (r + 1) * stride + 1
+        row = bytearray(cols)
+        row[1::2] = cells.east[base:base + east_width].translate(_INVERT)
+        start = grid.cell_id(2 * r, 0)
+        out[start:start + cols] = row
+        if 2 * r + 1 < rows: #Fila de paredes entre esta fila de celdas y la siguiente
+            row = bytearray([WALL]) * cols
+            row[0::2] = cells.south[base:base + cells.cols].translate(_INVERT)
+            start = grid.cell_id(2 * r + 1, 0)
+            out[start:start + cols] = row
+    return grid
+
+
+# ---- Laberintos perfectos (un único camino entre dos celdas) ----
+def _backtracker(rows: int, cols: int, rnd: random.Random) -> Grid:
+    cells = _Cells(rows, cols)
+    stride = cells.stride
+    seen = cells.border()
+    east, south = cells.east, cells.south
+    rand = rnd.random
+    start = stride + 1
+    seen[start] = 1
+    stack = [start]
+    push, pop = stack.append, stack.pop
+    while stack:
+        p = stack[-1]
+        options = [q for q in (p - stride, p + stride, p - 1, p + 1) if not seen[q]]
+        if not options:
+            pop()
+            continue
+        q = options[int(rand() * len(options))]
+        seen[q] = 1
+        if q == p + 1:
+            east[p] = 1
+        elif q == p - 1:
+            east[q] = 1
+        elif q > p:
+            south[p] = 1
+        else:
+            south[q] = 1
+        push(q)
+    return _render(cells, rows, cols)
+
+
+def _kruskal(rows: int, cols: int, rnd: random.Random) -> Grid:
+    cells = _Cells(rows, cols)
+    stride = cells.stride
+    pad = cells.border()
+    parent = array("i", range(len(pad)))
+    #Arista = 2 * celda + (0 este, 1 sur), solo si el vecino es una celda real
+    edges = [2 * p + kind for p in range(len(pad)) if not pad[p]
+             for kind, q in ((0, p + 1), (1, p + stride)) if not pad[q]]
+    rnd.shuffle(edges)
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]] #Compresión por división a la mitad
+            x = parent[x]
+        return x
+
+    east, south = cells.east, cells.south
+    for edge in edges:
+        p, kind = edge >> 1, edge & 1
+        a, b = find(p), find(p + (stride if kind else 1))
+        if a != b:
+            parent[a] = b
+            (south if kind else east)[p] = 1
+    return _render(cells, rows, cols)
+
+
+def _wilson(rows: int, cols: int, rnd: random.Random) -> Grid:
+    cells = _Cells(rows, cols)
+    stride = cells.stride
+    in_tree = cells.border() #El relleno cuenta como "no elegible" (se salta al caminar)
+    pad = bytes(in_tree)
+    steps = (-stride, stride, -1, 1)
+    heading = bytearray(len(pad))  #Última dirección tomada desde cada celda (1..4)
+    randrange = rnd.randrange
+    real = [p for p in range(len(pad)) if not pad[p]]
+    in_tree[real[randrange(len(real))]] = 1
+    for origin in real:
+        if in_tree[origin]:
+            continue
+        p = origin #Caminata aleatoria hasta tocar el árbol; heading borra los ciclos
+        while not in_tree[p]:
+            code = randrange(4)
+            q = p + steps[code]
+            if pad[q]:
+                continue
+            heading[p] = code + 1
+            p = q
+        p = origin #Recorrer el camino sin ciclos y añadirlo al árbol
+        while not in_tree[p]:
+            q = p + steps[heading[p] - 1]
+            cells.link(p, q)
+            in_tree[p] = 1
+            p = q
+    return _render(cells, rows, cols)
+
+
+def _binary_tree(rows: int, cols: int, rnd: random.Random) -> Grid:
+    #Cada celda abre al sur o al este (50 %); última fila solo este, última columna solo sur
+    cells = _Cells(rows, cols)
+    stride, width = cells.stride, cells.cols
+    half = _threshold_table(0.5)
+    for r in range(cells.rows):
+        base = (r + 1) * stride + 1
+        if r == cells.rows - 1:
+            east = bytearray([1]) * width
+            south = bytearray(width)
+        else:
+            east = bytearray(rnd.randbytes(width).translate(half))
+            south = east.translate(_INVERT)
+            south[-1] = 1
+        east[-1] = 0
+        cells.east[base:base + width] = east
+        cells.south[base:base + width] = south
+    return _render(cells, rows, cols)
+
+
+def _sidewinder(rows: int, cols: int, rnd: random.Random) -> Grid:
+    #Primera fila: un pasillo. En las demás cada celda abre al este (50 %) y de cada tramo
+    #así formado sube al norte una celda elegida con la clave (u16) de su primera celda:
+    #inicio + clave * largo >> 16. NumPy y el recorrido en Python usan los mismos bytes
+    #aleatorios, así que la semilla da el mismo laberinto con o sin NumPy
+    cells = _Cells(rows, cols)
+    stride, width = cells.stride, cells.cols
+    half = _threshold_table(0.5)
+    np = _numpy()
+    for r in range(cells.rows):
+        base = (r + 1) * stride + 1
+        if r == 0:
+            east = bytearray([1]) * width
+        else:
+            east = bytearray(rnd.randbytes(width).translate(half))
+            east[-1] = 0 #La última celda cierra el último tramo
+            keys = rnd.randbytes(2 * width)
+            above = base - stride
+            if np:
+                closed = np.frombuffer(bytes(east), dtype=np.uint8) == 0
+                starts = np.flatnonzero(np.concatenate(([True], closed[:-1])))
+                lengths = np.diff(np.append(starts, width))
+                picks = starts + (np.frombuffer(keys, dtype="<u2")[starts].astype(np.int64) * lengths >> 16)
+                north = np.zeros(width, dtype=np.uint8)
+                north[picks] = 1
+                cells.south[above:above + width] = north.tobytes()
+            else:
+                key = array("H", keys) #Orden de bytes nativo: igual que "<u2" en x86 y ARM
+                north = bytearray(width)
+                for run in _RUNS.finditer(east):
+                    start, end = run.span()
+                    north[start + (key[start] * (end - start) >> 16)] = 1
+                cells.south[above:above + width] = north
+        east[-1] = 0
+        cells.east[base:base + width] = east
+    return _render(cells, rows, cols)
+
+
+# ---- Espacios abiertos ----
+def _rooms(rows: int, cols: int, rnd: random.Random) -> Grid:
+    #Salas abiertas de _ROOM x _ROOM separadas por paredes con una puerta por lado
+    grid = Grid(rows, cols)
+    cells = grid.cells
+    row = bytearray(cols)
+    row[_ROOM::_ROOM] = bytes([WALL]) * len(row[_ROOM::_ROOM])
+    for r in range(rows):
+        if r and r % _ROOM == 0:
+            continue #Fila de pared
+        base = grid.cell_id(r, 0)
+        cells[base:base + cols] = row
+    for top in range(0, rows, _ROOM):
+        for left in range(0, cols, _ROOM):
+            height = min(_ROOM - (top > 0), rows - top - (top > 0))
+            width = min(_ROOM - (left > 0), cols - left - (left > 0))
+            if height <= 0 or width <= 0: #El laberinto termina justo en una pared: no hay sala
+                continue
+            if top + _ROOM < rows: #Puerta hacia la sala de abajo
+                cells[grid.cell_id(top + _ROOM, left + (left > 0) + rnd.randrange(width))] = 0
+            if left + _ROOM < cols: #Puerta hacia la sala de la derecha
+                cells[grid.cell_id(top + (top > 0) + rnd.randrange(height), left + _ROOM)] = 0
+    return grid
+
+
+def _obstacles(rows: int, cols: int, rnd: random.Random, density: float = 0.3) -> Grid:
+    #Campo abierto con paredes sueltas al azar (no garantiza que haya camino)
+    grid = Grid(rows, cols)
+    cells = grid.cells
+    table = bytes(1 - bit for bit in _threshold_table(density)) #1 (pared) con esa probabilidad
+    for r in range(rows):
+        base = grid.cell_id(r, 0)
+        cells[base:base + cols] = rnd.randbytes(cols).translate(table)
+    cells[grid.cell_id(0, 0)] = 0
+    cells[grid.cell_id(rows - 1, cols - 1)] = 0
+    return grid
+
+
+# ---- Ciclos ----
+def braid(grid: Grid, fraction: float, rnd: random.Random) -> Grid:
+    """
+    Abre al azar (probabilidad fraction) las paredes que separan dos celdas
+    lógicas, es decir, las posiciones (par, impar) y (impar, par). Convierte
+    un laberinto perfecto en uno con ciclos y varias rutas alternativas.
+    """
+    if fraction <= 0:
+        return grid
+    cells = grid.cells
+    rows, cols = grid.rows, grid.cols
+    table = _threshold_table(fraction)
+    for r in range(rows):
+        if r % 2 == 0: #Paredes entre columnas de celdas
+            positions = slice(1, cols - 1, 2)
+        elif r + 1 < rows: #Paredes entre filas de celdas
+            positions = slice(0, cols, 2)
+        else:
+            continue
+        base = grid.cell_id(r, 0)
+        row = bytearray(cells[base:base + cols])
+        current = bytes(row[positions])
+        row[positions] = _bitwise_and(current, rnd.randbytes(len(current)).translate(table))
+        cells[base:base + cols] = row
+    grid.version += 1
+    return grid
+
+
+def terrain(grid: Grid, fraction: float, rnd: random.Random, max_weight: int = MAX_WEIGHT) -> Grid:
+    """
+    Convierte al azar (probabilidad fraction) celdas libres en celdas con
+    peso entre 2 y max_weight: costo de entrar en ellas para los solvers.
+    """
+    if fraction <= 0:
+        return grid
+    cells = grid.cells
+    cols = grid.cols
+    cut = round(fraction * 256)
+    span = max_weight - MIN_WEIGHT + 1
+    weights = bytes(MIN_WEIGHT + value % span if value < cut else 0 for value in range(256))
+    free = bytes(0xFF if value == 0 else 0 for value in range(256))  #Máscara de celdas libres
+    for r in range(grid.rows):
+        base = grid.cell_id(r, 0)
+        row = bytes(cells[base:base + cols])
+        drawn = _bitwise_and(rnd.randbytes(cols).translate(weights), row.translate(free))
+        cells[base:base + cols] = _bitwise_or(row, drawn)
+    grid.version += 1
+    return grid
+
+
+GENERATORS: dict[str, Callable[..., Grid]] = {
+    "backtracker": _backtracker,
+    "kruskal": _kruskal,
+    "wilson": _wilson,
+    "binary_tree": _binary_tree,
+    "sidewinder": _sidewinder,
+    "rooms": _rooms,
+    "obstacles": _obstacles,
+}
+
+
+def generate(
+    rows: int,
+    cols: Optional[int] = None,
+    algorithm: str = "backtracker",
+    seed: Union[int, str] = 0,
+    braid_fraction: float = 0.0,
+    density: float = 0.3,
+    goal_value: int = 9,
+    terrain_fraction: float = 0.0,
+) -> Grid:
+    """
+    Genera un laberinto de rows x cols (cols = rows si se omite). La celda
+    (0, 0) es el inicio y la última celda libre (en orden fila-columna)
+    recibe goal_value. density solo aplica a "obstacles"; terrain_fraction
+    = fracción de celdas libres que reciben un peso 2..8.
+    """
+    cols = rows if cols is None else cols
+    if rows < 1 or cols < 1:
+        raise ValueError("El laberinto necesita al menos 1 fila y 1 columna.")
+    try:
+        build = GENERATORS[algorithm]
+    except KeyError:
+        raise ValueError(f"Generador desconocido: {algorithm!r} (opciones: {', '.join(GENERATORS)})") from None
+    rnd = random.Random(seed)
+    grid = build(rows, cols, rnd, density) if algorithm == "obstacles" else build(rows, cols, rnd)
+    braid(grid, braid_fraction, rnd)
+    last = grid.cells.rfind(b"\x00")
+    if last != -1:
+        grid.cells[last] = goal_value
+    terrain(grid, terrain_fraction, rnd)
+    return grid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Genera un laberinto y lo guarda en archivo.")
+    parser.add_argument("rows", type=int, help="Filas.")
+    parser.add_argument("cols", type=int, nargs="?", help="Columnas (default: igual a filas).")
+    parser.add_argument("--algorithm", choices=list(GENERATORS), default="backtracker",
+                        help="Algoritmo de generación (default: backtracker).")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla (default: 0).")
+    parser.add_argument("--braid", type=float, default=0.0,
+                        help="Fracción de paredes entre celdas que se abren para crear ciclos (default: 0).")
+    parser.add_argument("--density", type=float, default=0.3, help="Densidad de paredes en 'obstacles' (default: 0.3).")
+    parser.add_argument("--terrain", type=float, default=0.0,
+                        help="Fracción de celdas libres con peso 2..8 (default: 0).")
+    parser.add_argument("--out", required=True, help="Archivo de salida (binario .maze, o texto con --text).")
+    parser.add_argument("--text", action="store_true", help="Guarda en formato texto.")
+    args = parser.parse_args()
+
+    from .maze_io import save_binary, save_text
+    grid = generate(args.rows, args.cols, algorithm=args.algorithm, seed=args.seed,
+                    braid_fraction=args.braid, density=args.density, terrain_fraction=args.terrain)
+    if args.text:
+        save_text(grid, args.out)
+    else:
+        save_binary(grid, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+from __future__ import annotations
+
+from array import array
+from heapq import heapify, heappop, heappush, heapreplace, nsmallest
+from itertools import count
+from time import perf_counter
+from typing import Iterator, Optional
+from weakref import WeakKeyDictionary
+
+from .maze_grid import WALL, WEIGHTS, Grid
+
+# ------------------------------------------------------------
+# Grafo de pasillos: los laberintos son casi todo pasillos de una celda de
+# ancho, así que se contraen en un grafo de cruces con pesos. Nodos = celdas
+# con grado distinto de 2 (cruces, callejones) más las salidas; cada arista
+# es un pasillo con su costo y sus celdas interiores, para expandir el
+# resultado de vuelta a celdas.
+#
+# Las búsquedas desempatan igual que la BFS por celdas: entre los caminos de
+# costo mínimo eligen el de menor secuencia de direcciones (arriba, abajo,
+# izquierda, derecha). Dos caminos solo pueden separarse en un nodo, así que
+# basta con recorrer las aristas de cada nodo en ese orden: los caminos
+# expandidos son idénticos a los de bfs_shortest_paths / k_shortest_paths.
+# ------------------------------------------------------------
+
+_FREE = bytes(0 if value == WALL else 1 for value in range(256))
+#Byte = 8 * libre + grado: es nodo si la celda es libre y su grado no es 2
+_NODE = bytes(1 if value >= 8 and value != 10 else 0 for value in range(256))
+
+# Entrada de adyacencia (una por sentido de cada pasillo):
+#   (código, otro nodo, costo hacia otro, costo desde otro, celdas, sentido, código de vuelta)
+# código = dirección del primer paso (1..4 = arriba, abajo, izquierda, derecha)
+# celdas = array de ids interiores; sentido True = en orden de este nodo hacia el otro
+_CODE, _OTHER, _COST_OUT, _COST_IN, _CELLS, _FORWARD, _BACK = range(7)
+
+_ENTRY_BYTES = 100  #Estimación por entrada de dict/heap para stats (como en maze_solver)
+
+_graphs: "WeakKeyDictionary[Grid, dict]" = WeakKeyDictionary()  #Grid -> {goal_value: (versión, grafo)}
+
+
+class JunctionGraph:
+    """
+    Grafo de cruces de un Grid para un valor de salida. adj[nodo] = entradas
+    de adyacencia en orden de dirección; edge_of[id] = pasillo que contiene
+    la celda (-1 si es nodo, pared o un ciclo sin cruces).
+    """
+
+    def __init__(self, grid: Grid, goal_value: int = 9):
+        self.grid = grid
+        self.goal_value = goal_value
+        self.version = grid.version
+        cells = grid.cells
+        size = len(cells)
+        stride = grid.stride
+        offsets = grid.offsets
+        weights = WEIGHTS
+
+        #Grado de cada celda sumando las cuatro máscaras desplazadas (en C, vía enteros)
+        free = int.from_bytes(bytes(cells).translate(_FREE), "little")
+        degree = (free << 8 * stride) + (free >> 8 * stride) + (free << 8) + (free >> 8) + (free << 3)
+        is_node = bytearray(degree.to_bytes(size + stride + 1, "little")[:size].translate(_NODE))
+        for goal in grid.goal_ids(goal_value):
+            is_node[goal] = 1
+        nodes = []
+        cell = is_node.find(1)
+        while cell != -1:
+            nodes.append(cell)
+            cell = is_node.find(1, cell + 1)
+
+        self.edge_of = array("i", [-1]) * size
+        self.edges: list[tuple] = []  #(a, código en a, b, código en b, celdas interiores de a hacia b)
+        adj: dict[int, list[tuple]] = {node: [] for node in nodes}
+        back_codes = {offset: code for code, offset in enumerate(offsets, 1)}
+        walked = set()
+        for node in nodes:
+            for code, offset in enumerate(offsets, 1):
+                if cells[node + offset] == WALL or (node, code) in walked:
+                    continue
+                interior = array("i")
+                cost = 0
+                prev, current = node, node + offset
+                while not is_node[current]: #Pasillo: la única salida que no es la celda anterior
+                    interior.append(current)
+                    cost += weights[cells[current]]
+                    for step in offsets:
+                        following = current + step
+                        if following != prev and cells[following] != WALL:
+                            break
+                    prev, current = current, following
+                back = back_codes[prev - current]
+                walked.add((current, back))
+                index = len(self.edges)
+                self.edges.append((node, code, current, back, interior))
+                for inner in interior:
+                    self.edge_of[inner] = index
+                if current == node: #Ciclo que vuelve al mismo cruce: nunca forma parte de un camino simple
+                    continue
+                adj[node].append((code, current, cost + weights[cells[current]], cost + weights[cells[node]],
+                                  interior, True, back))
+                adj[current].append((back, node, cost + weights[cells[node]], cost + weights[cells[current]],
+                                     interior, False, code))
+        for entries in adj.values():
+            entries.sort()
+        self.adj = adj
+        self._fields: dict[tuple[int, ...], dict[int, int]] = {}
+
+    # ---- Campo de costos hasta la salida ----
+    def field(self, targets: tuple[int, ...]) -> dict[int, int]:
+        #Dijkstra inversa desde los nodos destino: nodo -> costo mínimo hasta el más cercano
+        dist = self._fields.get(targets)
+        if dist is not None:
+            return dist
+        adj = self.adj
+        dist = {}
+        heap = [(0, target) for target in targets]
+        heapify(heap)
+        while heap:
+            cost, node = heappop(heap)
+            if node in dist:
+                continue
+            dist[node] = cost
+            for entry in adj[node]: #Hacia atrás: de otro a este nodo se paga costo desde otro
+                other = entry[_OTHER]
+                if other not in dist:
+                    heappush(heap, (cost + entry[_COST_IN], other))
+        self._fields[targets] = dist
+        return dist
+
+    # ---- Celdas que no son nodos ----
+    def attach(self, cell: int, dist: dict[int, int]) -> Optional["_View"]:
+        """
+        Vista del grafo con cell como nodo (p. ej. un inicio en mitad de un
+        pasillo): el pasillo se parte en dos aristas. None si la celda no está
+        en ningún pasillo con cruces.
+        """
+        if cell in self.adj:
+            return _View(self.adj, {}, dist)
+        index = self.edge_of[cell]
+        if index < 0:
+            return None
+        a, code_a, b, code_b, interior = self.edges[index]
+        cells = self.grid.cells
+        weights = WEIGHTS
+        stride_codes = {offset: code for code, offset in enumerate(self.grid.offsets, 1)}
+        position = interior.index(cell)
+        toward_a = interior[:position]  #Celdas entre a y cell, en orden de a hacia cell
+        toward_b = interior[position + 1:]
+        inner_a = sum(weights[cells[inner]] for inner in toward_a)
+        inner_b = sum(weights[cells[inner]] for inner in toward_b)
+        step_a = toward_a[-1] if toward_a else a
+        step_b = toward_b[0] if toward_b else b
+        code_to_a = stride_codes[step_a - cell]
+        code_to_b = stride_codes[step_b - cell]
+        own = weights[cells[cell]]
+
+        #Aristas de cell (hacia a y hacia b) y las de a / b sin el pasillo completo
+        mine = sorted([
+            (code_to_a, a, inner_a + weights[cells[a]], inner_a + own, toward_a, False, code_a),
+            (code_to_b, b, inner_b + weights[cells[b]], inner_b + own, toward_b, True, code_b),
+        ])
+        overlay = {cell: mine}
+        for node, code, back, inner, cells_in, forward in ((a, code_a, code_to_a, inner_a, toward_a, True),
+                                                           (b, code_b, code_to_b, inner_b, toward_b, False)):
+            entries = [entry for entry in overlay.get(node, self.adj[node]) if entry[_CODE] != code]
+            entries.append((code, cell, inner + own, inner + weights[cells[node]], cells_in, forward, back))
+            entries.sort()
+            overlay[node] = entries  #Si a == b (pasillo en ciclo) la segunda vuelta parte de la primera
+        view_dist = dict(dist)
+        best = [entry[_COST_OUT] + dist[entry[_OTHER]] for entry in mine if entry[_OTHER] in dist]
+        if best:
+            view_dist[cell] = min(best)
+        return _View(self.adj, overlay, view_dist)
+
+
+class _View:
+    #Adyacencia del grafo con algunas listas reemplazadas (nodos agregados con attach)
+    __slots__ = ("base", "overlay", "dist")
+
+    def __init__(self, base, overlay, dist):
+        self.base = base
+        self.overlay = overlay
+        self.dist = dist
+
+    def __getitem__(self, node):
+        entries = self.overlay.get(node)
+        return entries if entries is not None else self.base[node]
+
+
+def corridor_graph(grid: Grid, goal_value: int = 9) -> JunctionGraph:
+    #Grafo del Grid, construido una vez por versión y valor de salida
+    graphs = _graphs.get(grid)
+    if graphs is None:
+        graphs = _graphs[grid] = {}
+    cached = graphs.get(goal_value)
+    if cached is None or cached.version != grid.version:
+        cached = graphs[goal_value] = JunctionGraph(grid, goal_value)
+    return cached
+
+
+# ------------------------------------------------------------
+# Búsquedas sobre el grafo. Un camino es (nodo inicial, [entradas]): el
+# código de cada entrada es el primer paso del pasillo, así que la tupla de
+# códigos identifica el camino desde un mismo inicio.
+# ------------------------------------------------------------
+def _descend(adj, dist, node, blocked=None, blocked_codes=None) -> Optional[list]:
+    #Bajar por el campo tomando la primera arista (en orden de dirección) que acerca a la salida
+    remaining = dist.get(node)
+    if remaining is None:
+        return None
+    hops = []
+    first = True
+    while remaining:
+        for entry in adj[node]:
+            other = entry[_OTHER]
+            left = dist.get(other)
+            if left is None or left + entry[_COST_OUT] != remaining:
+                continue
+            if blocked is not None and other in blocked:
+                continue
+            if first and blocked_codes and entry[_CODE] in blocked_codes:
+                continue
+            break
+        else:
+            return None  #Sin continuación libre: hace falta una búsqueda completa
+        hops.append(entry)
+        node, remaining, first = other, left, False
+    return hops
+
+
+def _lexmin_search(adj, dist, spur, targets, blocked, blocked_codes, limit=None, stats=None) -> Optional[list]:
+    """
+    Camino de costo mínimo desde spur sin pasar por blocked ni salir por
+    blocked_codes, y entre los de ese costo el de menor secuencia de
+    direcciones. A* con el campo sin bloqueos como heurística (consistente);
+    limit = se descartan los nodos con costo + dist >= limit.
+    """
+    if spur not in dist:
+        return None
+    if stats is not None:
+        stats.searches += 1
+    best = {spur: 0}
+    settled = set()
+    heap = [(dist[spur], 0, spur)]
+    found = None
+    while heap:
+        f, cost, node = heappop(heap)
+        if found is not None and f > found:
+            break  #Ya están fijados todos los nodos de los caminos mínimos
+        if node in settled or cost != best[node]:
+            continue
+        settled.add(node)
+        if stats is not None:
+            stats.level(1, 0, len(heap) + 1, _ENTRY_BYTES * (len(best) + len(heap)))
+        if node in targets:
+            if found is None:
+                found = cost
+            continue  #Los caminos terminan en la primera salida
+        for entry in adj[node]:
+            other = entry[_OTHER]
+            if other in blocked or other in settled:
+                continue
+            if node == spur and entry[_CODE] in blocked_codes:
+                continue
+            left = dist.get(other)
+            if left is None:
+                continue
+            new_cost = cost + entry[_COST_OUT]
+            if limit is not None and new_cost + left >= limit:
+                continue
+            if new_cost < best.get(other, new_cost + 1):
+                best[other] = new_cost
+                heappush(heap, (new_cost + left, new_cost, other))
+    if found is None:
+        return None
+
+    #Nodos que están en algún camino mínimo: hacia atrás desde las salidas por aristas ajustadas
+    useful = {node for node in settled if node in targets and best[node] == found}
+    stack = list(useful)
+    while stack:
+        node = stack.pop()
+        for entry in adj[node]:
+            other = entry[_OTHER]
+            if other in useful or other not in settled or other in targets or other in blocked:
+                continue
+            if best[other] + entry[_COST_IN] != best[node]:
+                continue
+            useful.add(other)
+            stack.append(other)
+    if spur not in useful:
+        return None
+
+    #Primera arista ajustada hacia un nodo útil, en orden de dirección
+    hops = []
+    node = spur
+    while node not in targets:
+        for entry in adj[node]:
+            other = entry[_OTHER]
+            if other not in useful or best[node] + entry[_COST_OUT] != best[other]:
+                continue
+            if node == spur and entry[_CODE] in blocked_codes:
+                continue
+            break
+        hops.append(entry)
+        node = other
+    return hops
+
+
+def _expand(start: int, hops: list) -> list[int]:
+    #Ids de celda de un camino del grafo
+    path = [start]
+    for entry in hops:
+        cells = entry[_CELLS]
+        path.extend(cells if entry[_FORWARD] else reversed(cells))
+        path.append(entry[_OTHER])
+    return path
+
+
+def corridor_path(grid: Grid, source: int, targets: tuple[int, ...], goal_value: int = 9, stats=None):
+    #Camino más corto (ids) de source a la salida más cercana de targets; False si el grafo no aplica
+    graph = corridor_graph(grid, goal_value)
+    if any(target not in graph.adj for target in targets):
+        return False
+    if stats is not None:
+        stats.searches += 1
+    view = graph.attach(source, graph.field(targets))
+    if view is None:
+        return False
+    hops = _descend(view, view.dist, source)
+    return _expand(source, hops) if hops is not None else None
+
+
+def iter_corridor_paths(grid: Grid, source: int, targets: tuple[int, ...], goal_value: int = 9,
+                        limit: Optional[int] = None, stats=None) -> Optional[Iterator[list[int]]]:
+    """
+    Yen sobre el grafo de pasillos: mismos caminos y mismo orden que
+    maze_solver.iter_shortest_paths con la BFS, pero los desvíos solo se
+    prueban en los nodos (en una celda de pasillo no hay a dónde desviarse).
+    Retorna None si el grafo no aplica (inicio en un ciclo sin cruces).
+    """
+    graph = corridor_graph(grid, goal_value)
+    if stats is not None:
+        stats.searches += 1
+    view = graph.attach(source, graph.field(targets))
+    if view is None:
+        return None
+    return _yen(view, source, frozenset(targets), limit, stats)
+
+
+def _yen(view: _View, source: int, targets: frozenset, limit: Optional[int], stats) -> Iterator[list[int]]:
+    dist = view.dist
+    first = _descend(view, dist, source)
+    if first is None:
+        return
+    yield _expand(source, first)
+    if limit is not None and limit <= 1:
+        return
+
+    A = [first]  #Caminos aceptados (listas de entradas desde source)
+    B = []  #Heap de candidatos (costo, orden de llegada, entradas)
+    order = count()
+    seen_candidates = set()
+    while limit is None or len(A) < limit:
+        remaining = limit - len(A) if limit is not None else None
+        cheapest = [-entry[0] for entry in nsmallest(remaining, B)] if remaining is not None else []
+        heapify(cheapest)
+        bound = -cheapest[0] if remaining is not None and len(cheapest) == remaining else None
+        last = A[-1]
+        sharing = A
+        node = source
+        root_cost = 0
+        root = set()  #Nodos de la raíz antes del nodo de desviación
+        for j in range(len(last)):
+            if j:
+                previous = last[j - 1]
+                root.add(node)
+                root_cost += previous[_COST_OUT]
+                node = previous[_OTHER]
+                sharing = [path for path in sharing if path[j - 1][_CODE] == previous[_CODE]]
+
+            if bound is not None and root_cost + dist.get(node, bound) >= bound: #Ni el mejor desvío mejora la cota
+                if stats is not None:
+                    stats.pruned += 1
+                continue
+            if stats is not None:
+                started = perf_counter()
+            blocked_codes = {path[j][_CODE] for path in sharing}
+            spur = _descend(view, dist, node, root, blocked_codes)
+            method = "descend"
+            if spur is None:
+                method = "corridors"
+                spur = _lexmin_search(view, dist, node, targets, root, blocked_codes,
+                                      bound - root_cost if bound is not None else None, stats)
+            if stats is not None:
+                stats.spur(len(A), j, perf_counter() - started, method, spur is not None)
+            if spur is None:
+                continue
+
+            total = last[:j] + spur
+            key = tuple(entry[_CODE] for entry in total)
+            if key in seen_candidates:
+                continue
+            seen_candidates.add(key)
+            cost = root_cost + sum(entry[_COST_OUT] for entry in spur)
+            heappush(B, (cost, next(order), total))
+            if remaining is not None:
+                if len(cheapest) < remaining:
+                    heappush(cheapest, -cost)
+                elif cost < -cheapest[0]:
+                    heapreplace(cheapest, -cost)
+                if len(cheapest) == remaining:
+                    bound = -cheapest[0]
+
+        if not B:
+            return
+        best = heappop(B)[2]
+        A.append(best)
+        yield _expand(source, best)
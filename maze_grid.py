@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Union
+
+# ------------------------------------------------------------
+# Grid compacto: buffer plano de 1 byte por celda con un borde
+# centinela de paredes, para que los solvers trabajen con ids enteros
+# (id = fila * stride + columna) sin comprobar límites ni crear tuplas.
+# ------------------------------------------------------------
+
+WALL = 1  #Valor de pared (también usado en el borde centinela)
+
+#Celdas con peso: los valores 2..8 cuestan su valor al entrar; libre (0) y salida, 1
+MIN_WEIGHT, MAX_WEIGHT = 2, 8
+WEIGHTS = bytes(value if MIN_WEIGHT <= value <= MAX_WEIGHT else 1 for value in range(256))
+
+_FIND_CHUNK = 1 << 20  #Bytes copiados por bloque al buscar en buffers sin find()
+
+# Orden de exploración de todos los solvers: arriba, abajo, izquierda, derecha
+DIRECTIONS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+
+class Grid:
+    """
+    Laberinto almacenado en un bytearray plano de (rows + 2) x (cols + 2)
+    celdas; la fila/columna extra a cada lado es pared. Se puede indexar
+    como la lista anidada original (grid[r][c], len(grid), len(grid[0]))
+    para el renderizado y los tests, pero los solvers usan los ids.
+    """
+
+    __slots__ = ("rows", "cols", "stride", "cells", "offsets", "version", "_weighted", "_goals", "__weakref__")
+
+    def __init__(self, rows: int, cols: int, cells=None):
+        self.rows = rows
+        self.cols = cols
+        self.stride = cols + 2  #Ancho real de cada fila (con el borde)
+        size = (rows + 2) * self.stride
+        if cells is None:
+            cells = bytearray([WALL]) * size
+        if len(cells) != size:
+            raise ValueError(f"El buffer tiene {len(cells)} celdas, se esperaban {size}.")
+        self.cells = cells
+        #Desplazamientos de id para cada dirección de DIRECTIONS
+        self.offsets = (-self.stride, self.stride, -1, 1)
+        self.version = 0  #Aumenta con cada set(): los índices derivados lo usan para invalidarse
+        self._weighted = None  #(versión, ¿hay celdas con peso?)
+        self._goals: dict[int, tuple[int, tuple[int, ...]]] = {}  #valor -> (versión, ids de las salidas)
+
+    @classmethod
+    def from_rows(cls, laberinth: list[list[int]]) -> "Grid":
+        rows, cols = len(laberinth), len(laberinth[0])
+        grid = cls(rows, cols)
+        stride = grid.stride
+        cells = grid.cells
+        for r, row in enumerate(laberinth):
+            if len(row) != cols:
+                raise ValueError(f"La fila {r} tiene {len(row)} columnas, se esperaban {cols}.")
+            base = (r + 1) * stride + 1
+            cells[base:base + cols] = bytes(row)
+        return grid
+
+    # ---- Conversión coordenadas <-> ids ----
+    def in_bounds(self, row: int, column: int) -> bool:
+        return 0 <= row < self.rows and 0 <= column < self.cols
+
+    def cell_id(self, row: int, column: int) -> int:
+        return (row + 1) * self.stride + column + 1
+
+    def coords(self, cell: int) -> tuple[int, int]:
+        row, column = divmod(cell, self.stride)
+        return (row - 1, column - 1)
+
+    def to_coords(self, cells: Iterable[int]) -> list[tuple[int, int]]:
+        stride = self.stride
+        out = []
+        for cell in cells:
+            row, column = divmod(cell, stride)
+            out.append((row - 1, column - 1))
+        return out
+
+    def to_ids(self, positions: Iterable[tuple[int, int]]) -> list[int]:
+        stride = self.stride
+        return [(r + 1) * stride + c + 1 for r, c in positions]
+
+    def find(self, value: int, begin: int = 0) -> int:
+        #Primer id (en orden fila-columna) con ese valor, o -1
+        cells = self.cells
+        needle = bytes((value,))
+        finder = getattr(cells, "find", None)
+        if finder is not None:
+            return finder(needle, begin)
+        #Buffers sin find (memoryview de memoria compartida o mmap): por bloques
+        size = len(cells)
+        for chunk_start in range(begin, size, _FIND_CHUNK):
+            found = bytes(cells[chunk_start:chunk_start + _FIND_CHUNK]).find(needle)
+            if found != -1:
+                return chunk_start + found
+        return -1
+
+    def goal_ids(self, value: int = 9) -> tuple[int, ...]:
+        #Ids (orden fila-columna) de todas las celdas con ese valor; se busca una vez por versión
+        cached = self._goals.get(value)
+        if cached is None or cached[0] != self.version:
+            found = []
+            cell = self.find(value)
+            while cell != -1:
+                if self.in_bounds(*self.coords(cell)): #Ignorar el borde centinela
+                    found.append(cell)
+                cell = self.find(value, cell + 1)
+            cached = self._goals[value] = (self.version, tuple(found))
+        return cached[1]
+
+    def is_weighted(self) -> bool:
+        #¿Hay alguna celda con peso (2..8)? Se recalcula solo si cambió la versión
+        cached = self._weighted
+        if cached is None or cached[0] != self.version:
+            found = any(self.find(value) != -1 for value in range(MIN_WEIGHT, MAX_WEIGHT + 1))
+            self._weighted = cached = (self.version, found)
+        return cached[1]
+
+    # ---- Modificación ----
+    def set(self, row: int, column: int, value: int) -> None:
+        #Única vía de escritura (las filas de grid[r] son de solo lectura)
+        if not self.in_bounds(row, column):
+            raise IndexError("celda fuera del laberinto")
+        self.cells[self.cell_id(row, column)] = value
+        self.version += 1
+
+    # ---- Acceso compatible con la lista anidada ----
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, row: int) -> memoryview:
+        if row < 0:
+            row += self.rows
+        if not 0 <= row < self.rows:
+            raise IndexError("fila fuera del laberinto")
+        base = (row + 1) * self.stride + 1
+        return memoryview(self.cells)[base:base + self.cols].toreadonly()
+
+    def __iter__(self) -> Iterator[memoryview]:
+        for row in range(self.rows):
+            yield self[row]
+
+    def to_rows(self) -> list[list[int]]:
+        return [list(row) for row in self]
+
+
+def as_grid(laberinth: Union[Grid, list[list[int]]]) -> Grid:
+    #Conversión única en la frontera: las listas anidadas se copian a un Grid
+    if isinstance(laberinth, Grid):
+        return laberinth
+    return Grid.from_rows(laberinth)
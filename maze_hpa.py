@@ -0,0 +1,409 @@
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from heapq import heappop, heappush
+from time import perf_counter
+from typing import Optional, Union
+from weakref import WeakKeyDictionary
+
+from .maze_grid import WALL, WEIGHTS, Grid, as_grid
+from .maze_solver import _cost_field, _descend, _descend_weighted, _distance_field
+
+# ------------------------------------------------------------
+# Búsqueda jerárquica (HPA*): el laberinto se parte en bloques de
+# cluster_size x cluster_size. Las entradas son las celdas a ambos lados de
+# cada paso entre dos bloques vecinos; una vez se calcula, dentro de cada
+# bloque, el costo entre cada par de sus entradas. Una consulta busca en ese
+# grafo abstracto (pocos nodos) y solo después refina, con una BFS local,
+# los bloques por los que pasa el camino elegido.
+#
+#   exact=True  todos los pasos entre bloques son entradas: el costo es el
+#               mismo que el de la BFS (todo camino cruza de bloque por uno
+#               de ellos y entre dos cruces no sale del bloque)
+#   exact=False una entrada por tramo continuo de pasos (HPA* clásico):
+#               menos nodos en zonas abiertas, costo >= al óptimo
+#
+# Con celdas de peso los campos locales son de costo (Dijkstra inversa) y
+# cada arista es dirigida (se paga el peso de la celda a la que se entra).
+# ------------------------------------------------------------
+
+_LOCAL_GRIDS = 64  #Bloques locales retenidos entre consultas
+_CHUNK = 64  #Bloques por tarea del pool
+_ENGINE_CLUSTER = 32  #Tamaño de bloque del motor "hpa" de maze_solver
+
+
+def _local_grid(grid: Grid, r0: int, c0: int, height: int, width: int) -> Grid:
+    #Copia del bloque con su propio borde de paredes
+    local = Grid(height, width)
+    stride, local_stride = grid.stride, local.stride
+    for r in range(height):
+        base = (r0 + r + 1) * stride + c0 + 1
+        local_base = (r + 1) * local_stride + 1
+        local.cells[local_base:local_base + width] = grid.cells[base:base + width]
+    return local
+
+
+def _cluster_edges(grid: Grid, task: tuple) -> array:
+    #Aristas (x, e, costo de x a e) entre las entradas de un bloque, calculadas con un campo por entrada
+    r0, c0, height, width, entrances = task
+    local = _local_grid(grid, r0, c0, height, width)
+    build = _cost_field if local.is_weighted() else _distance_field
+    stride, local_stride = grid.stride, local.stride
+    local_ids = []
+    for cell in entrances:
+        r, c = divmod(cell, stride)
+        local_ids.append((r - r0) * local_stride + c - c0)
+    out = array("i")
+    for e, local_e in zip(entrances, local_ids):
+        dist = build(local, (local_e,))
+        for x, local_x in zip(entrances, local_ids):
+            if x != e and dist[local_x] >= 0:
+                out.extend((x, e, dist[local_x]))
+    return out
+
+
+def _cluster_chunk(maze: tuple, tasks: list[tuple]) -> list[array]:
+    #Worker: el laberinto llega como (nombre en memoria compartida, filas, columnas)
+    from .maze_batch import attach
+    grid = attach(*maze).grid
+    return [_cluster_edges(grid, task) for task in tasks]
+
+
+class HierarchicalIndex:
+    """
+    Grafo abstracto de un Grid para consultas de camino más corto entre
+    cualquier par de celdas. Se reconstruye si el grid cambió (Grid.version).
+    workers = procesos para el preproceso (None = todos los núcleos; 0 o 1 = en este proceso).
+    """
+
+    def __init__(self, laberinth: Union[Grid, list[list[int]]], cluster_size: int = 32, exact: bool = True,
+                 workers: Optional[int] = None):
+        if cluster_size < 2:
+            raise ValueError("cluster_size debe ser al menos 2.")
+        self.grid = as_grid(laberinth)
+        self.cluster_size = cluster_size
+        self.exact = exact
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self._version: Optional[int] = None
+        self._locals: dict[int, Grid] = {}
+        self.preprocess_seconds = 0.0
+
+    # ---- Construcción ----
+    @property
+    def stale(self) -> bool:
+        return self._version != self.grid.version
+
+    def _cluster_of(self, cell: int) -> int:
+        r, c = divmod(cell, self.grid.stride)
+        size = self.cluster_size
+        return (r - 1) // size * self._cluster_cols + (c - 1) // size
+
+    def _bounds(self, cluster: int) -> tuple[int, int, int, int]:
+        #(fila, columna, alto, ancho) del bloque
+        size, grid = self.cluster_size, self.grid
+        r0, c0 = cluster // self._cluster_cols * size, cluster % self._cluster_cols * size
+        return r0, c0, min(size, grid.rows - r0), min(size, grid.cols - c0)
+
+    def _transitions(self) -> list[tuple[int, int]]:
+        #Pares (a, b) de celdas libres vecinas en bloques distintos; en modo aproximado, el centro de cada tramo
+        grid, size = self.grid, self.cluster_size
+        cells, stride = grid.cells, grid.stride
+        free = bytes(0 if value == WALL else 1 for value in range(256))
+        pairs = []
+
+        def scan(line_a: bytes, line_b: bytes, id_a, id_b) -> None:
+            #Posiciones libres en las dos líneas a la vez (AND de enteros) y tramos por bloque
+            both = (int.from_bytes(line_a.translate(free), "little")
+                    & int.from_bytes(line_b.translate(free), "little")).to_bytes(len(line_a), "little")
+            position = both.find(1)
+            while position != -1:
+                end = position
+                limit = (position // size + 1) * size  #Un tramo no pasa de un bloque al siguiente
+                while end + 1 < min(limit, len(both)) and both[end + 1]:
+                    end += 1
+                chosen = range(position, end + 1) if self.exact else ((position + end) // 2,)
+                pairs.extend((id_a(i), id_b(i)) for i in chosen)
+                position = both.find(1, end + 1)
+
+        for r in range(size, grid.rows, size): #Bordes horizontales: filas r - 1 y r
+            top, bottom = r * stride + 1, (r + 1) * stride + 1
+            scan(bytes(cells[top:top + grid.cols]), bytes(cells[bottom:bottom + grid.cols]),
+                 lambda i, top=top: top + i, lambda i, bottom=bottom: bottom + i)
+        for c in range(size, grid.cols, size): #Bordes verticales: columnas c - 1 y c
+            left = stride + c
+            column_end = left + grid.rows * stride
+            scan(bytes(cells[left:column_end:stride]), bytes(cells[left + 1:column_end + 1:stride]),
+                 lambda i, left=left: left + i * stride, lambda i, left=left: left + 1 + i * stride)
+        return pairs
+
+    def rebuild(self) -> None:
+        started = perf_counter()
+        grid, size = self.grid, self.cluster_size
+        self._cluster_cols = (grid.cols + size - 1) // size
+        clusters = ((grid.rows + size - 1) // size) * self._cluster_cols
+        pairs = self._transitions()
+
+        #Entradas por bloque y tareas (una por bloque con al menos dos entradas)
+        per_cluster: dict[int, set[int]] = {}
+        for a, b in pairs:
+            per_cluster.setdefault(self._cluster_of(a), set()).add(a)
+            per_cluster.setdefault(self._cluster_of(b), set()).add(b)
+        tasks = [(*self._bounds(cluster), sorted(entrances)) for cluster, entrances in per_cluster.items()
+                 if len(entrances) > 1]
+        if self.workers > 1 and len(tasks) > _CHUNK:
+            from .maze_batch import SharedMazes
+            shared = SharedMazes()
+            try:
+                maze = shared.publish(grid)
+                chunks = [tasks[i:i + _CHUNK] for i in range(0, len(tasks), _CHUNK)]
+                with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                    results = [edges for chunk in pool.map(_cluster_chunk, [maze] * len(chunks), chunks)
+                               for edges in chunk]
+            finally:
+                shared.close()
+        else:
+            results = [_cluster_edges(grid, task) for task in tasks]
+
+        #Grafo abstracto en CSR: nodos ordenados por id, aristas salientes contiguas
+        nodes = sorted({cell for entrances in per_cluster.values() for cell in entrances})
+        position = {cell: i for i, cell in enumerate(nodes)}
+        outgoing: list[list[tuple[int, int]]] = [[] for _ in nodes]
+        for a, b in pairs: #Cruce entre bloques: se paga la celda a la que se entra
+            outgoing[position[a]].append((position[b], WEIGHTS[grid.cells[b]]))
+            outgoing[position[b]].append((position[a], WEIGHTS[grid.cells[a]]))
+        for edges in results:
+            for i in range(0, len(edges), 3):
+                outgoing[position[edges[i]]].append((position[edges[i + 1]], edges[i + 2]))
+        self._nodes = array("i", nodes)
+        self._offsets = array("i", [0]) * (len(nodes) + 1)
+        self._targets = array("i")
+        self._costs = array("i")
+        for i, edges in enumerate(outgoing):
+            for target, cost in edges:
+                self._targets.append(target)
+                self._costs.append(cost)
+            self._offsets[i + 1] = len(self._targets)
+        #Entradas de cada bloque (posiciones en _nodes), para enlazar inicio y destino
+        self._cluster_nodes = {cluster: array("i", sorted(position[cell] for cell in entrances))
+                               for cluster, entrances in per_cluster.items()}
+        self._clusters = clusters
+        self._weighted = grid.is_weighted()
+        self._locals.clear()
+        self._version = grid.version
+        self.preprocess_seconds = perf_counter() - started
+
+    def report(self) -> dict:
+        #Tamaño del grafo abstracto, tiempo de preproceso y memoria (arrays + entradas por bloque)
+        if self.stale:
+            self.rebuild()
+        memory = sum(data.itemsize * len(data) for data in (self._nodes, self._offsets, self._targets, self._costs))
+        memory += sum(data.itemsize * len(data) for data in self._cluster_nodes.values())
+        return {
+            "cluster_size": self.cluster_size,
+            "exact": self.exact,
+            "clusters": self._clusters,
+            "nodes": len(self._nodes),
+            "edges": len(self._targets),
+            "preprocess_ms": round(self.preprocess_seconds * 1000, 3),
+            "memory_bytes": memory,
+            "grid_bytes": len(self.grid.cells),
+        }
+
+    # ---- Consultas ----
+    def _local(self, cluster: int) -> Grid:
+        local = self._locals.get(cluster)
+        if local is None:
+            if len(self._locals) >= _LOCAL_GRIDS:
+                self._locals.clear()
+            local = self._locals[cluster] = _local_grid(self.grid, *self._bounds(cluster))
+        return local
+
+    def _to_local(self, cluster: int, cell: int) -> int:
+        r0, c0, _, width = self._bounds(cluster)
+        r, c = divmod(cell, self.grid.stride)
+        return (r - r0) * (width + 2) + c - c0
+
+    def _to_global(self, cluster: int, local_cell: int) -> int:
+        r0, c0, _, width = self._bounds(cluster)
+        r, c = divmod(local_cell, width + 2)
+        return (r + r0) * self.grid.stride + c + c0
+
+    def _segment(self, cluster: int, source: int, target: int, dist=None) -> list[int]:
+        #Camino más corto de source a target dentro del bloque (refinamiento de una arista)
+        local = self._local(cluster)
+        if dist is None:
+            build = _cost_field if self._weighted else _distance_field
+            dist = build(local, (self._to_local(cluster, target),))
+        descend = _descend_weighted if self._weighted else _descend
+        path = descend(local, dist, self._to_local(cluster, source))
+        return [self._to_global(cluster, cell) for cell in path]
+
+    def _endpoints(self, start: tuple[int, int], goal: tuple[int, int]) -> Optional[tuple[int, int]]:
+        grid = self.grid
+        if not grid.in_bounds(*start) or not grid.in_bounds(*goal):
+            return None
+        return grid.cell_id(*start), grid.cell_id(*goal)
+
+    def distance(self, start: tuple[int, int], goal: tuple[int, int]) -> Optional[int]:
+        ids = self._endpoints(start, goal)
+        found = self._search(*ids) if ids is not None else None
+        return found[0] if found is not None else None
+
+    def path(self, start: tuple[int, int], goal: tuple[int, int]) -> Optional[list[tuple[int, int]]]:
+        #Camino refinado a celdas (exact=True: mismo costo que bfs_shortest_paths)
+        ids = self._endpoints(start, goal)
+        cells = self.path_ids(*ids) if ids is not None else None
+        return self.grid.to_coords(cells) if cells is not None else None
+
+    def path_ids(self, source: int, target: int) -> Optional[list[int]]:
+        found = self._search(source, target)
+        if found is None:
+            return None
+        _, source, target, route = found
+        nodes = self._nodes
+        cells = [source]
+        waypoints = [source] + [nodes[p] for p in route] + [target]
+        for a, b in zip(waypoints, waypoints[1:]):
+            if a == b:
+                continue
+            cluster_a, cluster_b = self._cluster_of(a), self._cluster_of(b)
+            if cluster_a != cluster_b: #Cruce entre bloques: celdas vecinas
+                cells.append(b)
+            else:
+                cells.extend(self._segment(cluster_a, a, b)[1:])
+        return cells
+
+    def _search(self, source: int, target: int):
+        #A* (Manhattan) sobre el grafo abstracto con inicio y destino enlazados a las entradas de su bloque
+        if self.stale:
+            self.rebuild()
+        grid = self.grid
+        cells = grid.cells
+        if cells[source] == WALL or cells[target] == WALL:
+            return None
+        if source == target:
+            return (0, source, target, [])
+        build = _cost_field if self._weighted else _distance_field
+        cluster_s, cluster_t = self._cluster_of(source), self._cluster_of(target)
+        nodes, offsets, targets, costs = self._nodes, self._offsets, self._targets, self._costs
+
+        #Desde el inicio: campo local hacia source; costo de ida = campo + peso(entrada) - peso(inicio)
+        from_start = build(self._local(cluster_s), (self._to_local(cluster_s, source),))
+        to_goal_field = build(self._local(cluster_t), (self._to_local(cluster_t, target),))
+        to_goal = {}
+        for p in self._cluster_nodes.get(cluster_t, ()):
+            cost = to_goal_field[self._to_local(cluster_t, nodes[p])]
+            if cost >= 0:
+                to_goal[p] = cost
+        best, best_node = None, None
+        if cluster_s == cluster_t: #Camino directo sin salir del bloque
+            direct = to_goal_field[self._to_local(cluster_t, source)]
+            if direct >= 0:
+                best = direct
+
+        goal_row, goal_column = divmod(target, grid.stride)
+        stride = grid.stride
+
+        def h(p):
+            r, c = divmod(nodes[p], stride)
+            return abs(r - goal_row) + abs(c - goal_column)
+
+        g: dict[int, int] = {}
+        parent: dict[int, int] = {}
+        heap = []
+        for p in self._cluster_nodes.get(cluster_s, ()):
+            cell = nodes[p]
+            back = from_start[self._to_local(cluster_s, cell)]
+            if back >= 0:
+                cost = back + WEIGHTS[cells[cell]] - WEIGHTS[cells[source]]
+                if cost < g.get(p, cost + 1):
+                    g[p] = cost
+                    parent[p] = -1
+                    heappush(heap, (cost + h(p), cost, p))
+        closed = set()
+        while heap:
+            f, cost, p = heappop(heap)
+            if best is not None and f >= best:
+                break
+            if p in closed or cost != g[p]:
+                continue
+            closed.add(p)
+            if p in to_goal and (best is None or cost + to_goal[p] < best):
+                best, best_node = cost + to_goal[p], p
+            for i in range(offsets[p], offsets[p + 1]):
+                q = targets[i]
+                new_cost = cost + costs[i]
+                if q not in closed and new_cost < g.get(q, new_cost + 1):
+                    g[q] = new_cost
+                    parent[q] = p
+                    heappush(heap, (new_cost + h(q), new_cost, q))
+        if best is None:
+            return None
+        route = []
+        p = best_node
+        while p is not None and p != -1:
+            route.append(p)
+            p = parent[p]
+        route.reverse()
+        return (best, source, target, route)
+
+
+_indexes: "WeakKeyDictionary[Grid, HierarchicalIndex]" = WeakKeyDictionary()
+
+
+def hierarchical_index(grid: Grid) -> HierarchicalIndex:
+    #Índice exacto del Grid para el motor "hpa", construido en el primer uso (en este proceso:
+    #el motor también corre dentro de los workers de maze_batch) y reconstruido si el Grid cambia
+    index = _indexes.get(grid)
+    if index is None:
+        index = _indexes[grid] = HierarchicalIndex(grid, cluster_size=_ENGINE_CLUSTER, exact=True, workers=1)
+    return index
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Preproceso HPA* y consultas frente a la BFS para elegir el tamaño de bloque.")
+    parser.add_argument("maze", nargs="?", help="Archivo de laberinto (texto o .maze); sin él se genera uno.")
+    parser.add_argument("--generate", type=int, default=501, help="Lado del laberinto generado (default: 501).")
+    parser.add_argument("--braid", type=float, default=0.05, help="Ciclos del laberinto generado (default: 0.05).")
+    parser.add_argument("--clusters", default="16,32,64", help="Tamaños de bloque a comparar (default: 16,32,64).")
+    parser.add_argument("--approx", action="store_true", help="Una entrada por tramo (HPA* clásico, no exacto).")
+    parser.add_argument("--queries", type=int, default=20, help="Consultas aleatorias por tamaño (default: 20).")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos del preproceso (default: todos los núcleos).")
+    parser.add_argument("--seed", type=int, default=0, help="Semilla de laberinto y consultas (default: 0).")
+    args = parser.parse_args()
+
+    from .maze_solver import path_cost, shortest_path
+    if args.maze:
+        from .maze_io import load_maze
+        grid = load_maze(args.maze)
+    else:
+        from .maze_gen import generate
+        grid = generate(args.generate, seed=args.seed, braid_fraction=args.braid)
+    rnd = random.Random(args.seed)
+    free = [cell for cell in range(len(grid.cells)) if grid.cells[cell] != WALL and grid.in_bounds(*grid.coords(cell))]
+    queries = [(grid.coords(rnd.choice(free)), grid.coords(rnd.choice(free))) for _ in range(args.queries)]
+
+    started = perf_counter()
+    reference = [shortest_path(grid, a, b) for a, b in queries]
+    bfs_ms = (perf_counter() - started) * 1000 / max(len(queries), 1)
+    print(f"[HPA] {grid.rows}x{grid.cols}: bfs={bfs_ms:.2f} ms/consulta")
+    for size in (int(item) for item in args.clusters.split(",") if item):
+        index = HierarchicalIndex(grid, cluster_size=size, exact=not args.approx, workers=args.workers)
+        report = index.report()
+        started = perf_counter()
+        paths = [index.path(a, b) for a, b in queries]
+        query_ms = (perf_counter() - started) * 1000 / max(len(queries), 1)
+        extra = [path_cost(grid, p) / max(path_cost(grid, q), 1) for p, q in zip(paths, reference) if p and q]
+        print(f"[HPA] bloque={size}: nodos={report['nodes']} aristas={report['edges']} "
+              f"preproceso={report['preprocess_ms']:.0f} ms memoria={report['memory_bytes'] / 1024:.0f} KiB "
+              f"consulta={query_ms:.2f} ms costo/óptimo={max(extra, default=1.0):.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import Optional, Union
+
+from .maze_grid import WALL, Grid, as_grid
+from .maze_solver import _cost_field, _descend, _descend_weighted, _distance_field, _find_goal_id
+
+# ------------------------------------------------------------
+# Índice de distancias a la salida: una BFS inversa desde la salida
+# responde "camino/distancia desde cualquier celda" sin volver a buscar.
+# ------------------------------------------------------------
+
+
+class MazeIndex:
+    """
+    Campo de distancias (array de enteros, 4 bytes por celda) desde la salida
+    del laberinto. El siguiente paso desde cualquier celda es el primer vecino
+    (arriba, abajo, izquierda, derecha) con distancia - 1, así que el campo
+    sirve también de mapa de siguiente salto y los caminos coinciden con los
+    de bfs_shortest_paths. Se recalcula solo si el grid cambió (Grid.version).
+    Con celdas de peso el campo guarda costos (Dijkstra inversa) en vez de movimientos.
+    all_goals = el campo parte de todas las salidas: distancia a la más cercana.
+    """
+
+    def __init__(self, laberinth: Union[Grid, list[list[int]]], goal_value: int = 9, all_goals: bool = False):
+        self.grid = as_grid(laberinth)
+        self.goal_value = goal_value
+        self.all_goals = all_goals
+        self._version: Optional[int] = None
+        self._goal: Optional[int] = None
+        self._dist = None
+        self._weighted = False
+
+    # ---- Construcción / invalidación ----
+    @property
+    def stale(self) -> bool:
+        return self._version != self.grid.version
+
+    def rebuild(self) -> None:
+        grid = self.grid
+        self._goal = _find_goal_id(grid, self.goal_value)
+        self._weighted = grid.is_weighted()
+        build = _cost_field if self._weighted else _distance_field
+        targets = grid.goal_ids(self.goal_value) if self.all_goals else (self._goal,)
+        self._dist = build(grid, targets) if self._goal is not None else None
+        self._version = grid.version
+
+    def field(self):
+        #(id de la salida, campo de distancias) actualizados; para k_shortest_paths
+        if self.stale:
+            self.rebuild()
+        return self._goal, self._dist
+
+    # ---- Consultas ----
+    @property
+    def goal(self) -> Optional[tuple[int, int]]:
+        goal, _ = self.field()
+        return self.grid.coords(goal) if goal is not None else None
+
+    def _source(self, start: tuple[int, int]) -> Optional[int]:
+        goal, dist = self.field()
+        if goal is None or not self.grid.in_bounds(*start):
+            return None
+        source = self.grid.cell_id(*start)
+        if self.grid.cells[source] == WALL or dist[source] < 0:
+            return None  #Pared o sin camino a la salida
+        return source
+
+    def distance(self, start: tuple[int, int]) -> Optional[int]:
+        #Costo del camino más corto desde start: movimientos si no hay pesos (None si no hay camino)
+        source = self._source(start)
+        return self._dist[source] if source is not None else None
+
+    def path(self, start: tuple[int, int]) -> Optional[list[tuple[int, int]]]:
+        #Camino más corto desde start en O(largo del camino)
+        source = self._source(start)
+        if source is None:
+            return None
+        descend = _descend_weighted if self._weighted else _descend
+        return self.grid.to_coords(descend(self.grid, self._dist, source))
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import argparse
+import mmap
+import re
+import struct
+from typing import Union
+
+from .maze_grid import WALL, Grid, as_grid
+
+# ------------------------------------------------------------
+# Carga y guardado de laberintos en archivo.
+#
+# Texto: una fila por línea con los dígitos 0/1/9 (se admiten espacios o
+#        comas entre celdas; líneas vacías o solo con separadores y las que
+#        empiezan con # se ignoran).
+#
+# Binario (little endian):
+#   0  magic     b"MAZE"
+#   4  versión   u8  (1)
+#   5  bits      u8  (8 o 1 por celda)
+#   6  reservado u16
+#   8  filas     u32
+#   12 columnas  u32
+#   16 datos
+#      bits = 8: el buffer del Grid tal cual, (filas+2) x (columnas+2) con el
+#                borde de paredes; se abre con mmap y se usa sin copiar.
+#      bits = 1: filas x columnas bits (1 = pared, MSB primero, sin borde),
+#                seguido de u32 n y n registros (u32 fila*columnas+col, u8 valor)
+#                para las celdas que no son 0 ni 1 (salidas, costos...).
+# ------------------------------------------------------------
+
+MAGIC = b"MAZE"
+_HEADER = struct.Struct("<4sBBHII")
+_SPECIAL = struct.Struct("<IB")
+_COUNT = struct.Struct("<I")
+
+_SEPARATORS = b" ,;\t\r\n"
+_DIGITS = bytes.maketrans(b"0123456789", bytes(range(10)))
+_WALL_BITS = bytes(b"1"[0] if value == WALL else b"0"[0] for value in range(256))
+_SPECIAL_CELLS = re.compile(rb"[^\x00\x01]")  #Celdas que no son libre ni pared
+#Cada byte empaquetado -> sus 8 celdas (bit alto primero)
+_UNPACK = [bytes((value >> shift) & 1 for shift in range(7, -1, -1)) for value in range(256)]
+
+
+# ---- Texto ----
+def parse_text(data: Union[bytes, str]) -> Grid:
+    if isinstance(data, str):
+        data = data.encode()
+    rows = []
+    for number, line in enumerate(data.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith(b"#"):
+            continue
+        row = line.translate(_DIGITS, _SEPARATORS) #Dígitos -> valores en bloque
+        if not row: #Solo separadores: como una línea vacía
+            continue
+        if max(row) > 9:
+            raise ValueError(f"Línea {number}: solo se admiten dígitos 0-9.")
+        rows.append(row)
+    if not rows:
+        raise ValueError("El archivo no contiene filas.")
+
+    cols = len(rows[0])
+    grid = Grid(len(rows), cols)
+    stride = grid.stride
+    for r, row in enumerate(rows):
+        if len(row) != cols:
+            raise ValueError(f"La fila {r} tiene {len(row)} columnas, se esperaban {cols}.")
+        base = (r + 1) * stride + 1
+        grid.cells[base:base + cols] = row
+    return grid
+
+
+def save_text(laberinth, path: str) -> None:
+    grid = as_grid(laberinth)
+    digits = bytes.maketrans(bytes(range(10)), b"0123456789")
+    with open(path, "wb") as f:
+        for row in grid:
+            f.write(bytes(row).translate(digits) + b"\n")
+
+
+# ---- Binario ----
+def save_binary(laberinth, path: str, bits: int = 8) -> None:
+    grid = as_grid(laberinth)
+    if bits not in (1, 8):
+        raise ValueError("bits debe ser 8 o 1.")
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, 1, bits, 0, grid.rows, grid.cols))
+        if bits == 8:
+            f.write(grid.cells)
+            return
+        flat = b"".join(bytes(row) for row in grid) #Celdas sin borde, fila a fila
+        bits_text = flat.translate(_WALL_BITS) #b"1" pared, b"0" el resto
+        bits_text += b"0" * (-len(bits_text) % 8)
+        packed = int(bits_text, 2).to_bytes(len(bits_text) // 8, "big") if bits_text else b""
+        specials = [(match.start(), flat[match.start()]) for match in _SPECIAL_CELLS.finditer(flat)]
+        f.write(packed)
+        f.write(_COUNT.pack(len(specials)))
+        for cell, value in specials:
+            f.write(_SPECIAL.pack(cell, value))
+
+
+def _read_header(buffer) -> tuple[int, int, int]:
+    if len(buffer) < _HEADER.size:
+        raise ValueError("Archivo binario truncado.")
+    magic, version, bits, _, rows, cols = _HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != 1 or bits not in (1, 8):
+        raise ValueError("Formato binario de laberinto no reconocido.")
+    return bits, rows, cols
+
+
+def load_binary(path: str) -> Grid:
+    with open(path, "rb") as f:
+        #Copia privada bajo demanda: Grid.set funciona sin tocar el archivo
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    keep = False #Solo el Grid de 8 bits sigue usando el mapeo; si no (o si falla), se cierra
+    try:
+        bits, rows, cols = _read_header(mapped)
+        if bits == 1:
+            return _unpack_bits(mapped, rows, cols)
+
+        #Sin copia: el Grid usa directamente las páginas del archivo
+        start = _HEADER.size
+        size = (rows + 2) * (cols + 2)
+        if len(mapped) < start + size:
+            raise ValueError("Archivo binario truncado.")
+        cells = memoryview(mapped)[start:start + size]
+        try:
+            stride = cols + 2
+            border = (bytes(cells[:stride]) + bytes(cells[-stride:])
+                      + bytes(cells[::stride]) + bytes(cells[stride - 1::stride]))
+            if border.strip(bytes((WALL,))): #Los solvers confían en el borde centinela
+                raise ValueError("El borde del laberinto binario no es pared.")
+            grid = Grid(rows, cols, cells=cells)
+        except BaseException:
+            cells.release() #Sin vistas abiertas el mmap se puede cerrar
+            raise
+        keep = True
+        return grid
+    finally:
+        if not keep:
+            mapped.close()
+
+
+def _unpack_bits(mapped, rows: int, cols: int) -> Grid:
+    start = _HEADER.size
+    total = rows * cols
+    end = start + (total + 7) // 8
+    if len(mapped) < end + _COUNT.size:
+        raise ValueError("Archivo binario truncado.")
+    cells = b"".join(map(_UNPACK.__getitem__, mapped[start:end])) #Un byte por celda, en bloque
+    grid = Grid(rows, cols)
+    stride = grid.stride
+    for r in range(rows):
+        base = (r + 1) * stride + 1
+        grid.cells[base:base + cols] = cells[r * cols:(r + 1) * cols]
+    (count,) = _COUNT.unpack_from(mapped, end)
+    offset = end + _COUNT.size
+    if len(mapped) < offset + count * _SPECIAL.size:
+        raise ValueError("Archivo binario truncado.")
+    for _ in range(count):
+        cell, value = _SPECIAL.unpack_from(mapped, offset)
+        offset += _SPECIAL.size
+        if cell >= total: #Fuera del laberinto caería en el borde o en otra fila
+            raise ValueError(f"Celda especial {cell} fuera de un laberinto de {rows}x{cols}.")
+        row, column = divmod(cell, cols)
+        grid.cells[grid.cell_id(row, column)] = value
+    return grid
+
+
+# ---- Detección automática ----
+def load_maze(path: str) -> Grid:
+    #Binario si empieza con la firma MAZE; si no, texto
+    with open(path, "rb") as f:
+        head = f.read(len(MAGIC))
+        if head != MAGIC: #Texto: se lee del mismo handle (sirve también para /dev/stdin)
+            return parse_text(head + f.read())
+    return load_binary(path)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Convierte laberintos entre texto y binario.")
+    parser.add_argument("source", help="Laberinto de entrada (texto o binario).")
+    parser.add_argument("target", help="Archivo de salida.")
+    parser.add_argument("--bits", type=int, choices=(8, 1), default=8,
+                        help="Binario con 8 bits (mmap sin copia) o 1 bit por celda (default: 8).")
+    parser.add_argument("--text", action="store_true", help="Escribe el resultado como texto.")
+    args = parser.parse_args()
+
+    grid = load_maze(args.source)
+    if args.text:
+        save_text(grid, args.target)
+    else:
+        save_binary(grid, args.target, bits=args.bits)
+
+
+if __name__ == "__main__":
+    main()
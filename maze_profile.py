@@ -0,0 +1,204 @@
+import os
+import sys
+from collections import Counter
+from contextlib import contextmanager
+from time import perf_counter, process_time
+from typing import Iterator, Optional
+
+# ------------------------------------------------------------
+# Medición por etapa del CLI. main solo importa este módulo si se pide
+# --profile-startup (tiempos) o --profile (cProfile + tracemalloc); sin esas
+# opciones cada etapa es un nullcontext() y no se mide nada.
+# ------------------------------------------------------------
+STAGE_ORDER = ("import", "load", "solve", "render", "export", "tests", "metrics")
+
+
+def _ordered(names) -> list[str]:
+    return [name for name in STAGE_ORDER if name in names] + [name for name in names if name not in STAGE_ORDER]
+
+
+class StageTimer:
+    """
+    Acumula el tiempo de pared de cada etapa (una etapa puede abrirse varias
+    veces: los imports diferidos de cada opción suman en "import").
+    started = perf_counter() al cargar main: lo transcurrido hasta crear el
+    timer (imports de main y lectura de argumentos) cuenta como "import".
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.started = perf_counter() if started is None else started
+        self.seconds: dict[str, float] = {}
+        self._inner: list[float] = []  #Tiempo de las etapas anidadas en cada etapa abierta
+        if started is not None:
+            self.seconds["import"] = perf_counter() - started
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        #Una etapa anidada se descuenta de la de afuera
+        began = perf_counter()
+        self._inner.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = perf_counter() - began
+            inner = self._inner.pop()
+            self.seconds[name] = self.seconds.get(name, 0.0) + elapsed - inner
+            if self._inner:
+                self._inner[-1] += elapsed
+
+    def report(self) -> str:
+        parts = [f"{name}={self.seconds[name] * 1000:.1f} ms" for name in _ordered(self.seconds)]
+        parts.append(f"total={(perf_counter() - self.started) * 1000:.1f} ms")
+        return "[STARTUP] " + " ".join(parts)
+
+
+# ------------------------------------------------------------
+# --profile: un cProfile por etapa (acumulado si la etapa se repite) y
+# tracemalloc desde que se crea el perfilador. Por etapa: tiempo de pared,
+# CPU, bloques de memoria netos (sys.getallocatedblocks) y pico de memoria
+# sobre lo que ya estaba asignado al entrar. En una etapa anidada el
+# cProfile de afuera se pausa. dump_dir = un .pstats (snakeviz, pstats) y un
+# .collapsed (flamegraph.pl, speedscope) por etapa.
+# ------------------------------------------------------------
+class _Entry:
+    __slots__ = ("name", "wall", "cpu", "blocks", "base", "peak", "inner")
+
+    def __init__(self, name: str, base: int):
+        self.name = name
+        self.wall, self.cpu, self.blocks = perf_counter(), process_time(), sys.getallocatedblocks()
+        self.base = self.peak = base
+        self.inner = [0.0, 0.0, 0]  #Pared, CPU y bloques de las etapas anidadas
+
+
+class StageProfiler(StageTimer):
+    def __init__(self, started: Optional[float] = None, dump_dir: Optional[str] = None, top: int = 5):
+        import cProfile
+        import tracemalloc
+        super().__init__(started)
+        self._cprofile, self._tracemalloc = cProfile, tracemalloc
+        self.dump_dir = dump_dir
+        self.top = top
+        self.profiles: dict = {}
+        self.cpu: dict[str, float] = {}
+        self.blocks: dict[str, int] = {}
+        self.peak: dict[str, int] = {}
+        self._stack: list[_Entry] = []
+        tracemalloc.start()
+
+    def _profile(self, name: str):
+        profile = self.profiles.get(name)
+        if profile is None:
+            profile = self.profiles[name] = self._cprofile.Profile()
+        return profile
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        tracemalloc = self._tracemalloc
+        current, peak = tracemalloc.get_traced_memory()
+        if self._stack: #La etapa de afuera guarda su pico y deja de perfilar
+            outer = self._stack[-1]
+            outer.peak = max(outer.peak, peak)
+            self.profiles[outer.name].disable()
+        tracemalloc.reset_peak()
+        entry = _Entry(name, current)
+        self._stack.append(entry)
+        profile = self._profile(name)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            wall = perf_counter() - entry.wall
+            cpu = process_time() - entry.cpu
+            blocks = sys.getallocatedblocks() - entry.blocks
+            peak = max(entry.peak, tracemalloc.get_traced_memory()[1])
+            self._stack.pop()
+            self.seconds[name] = self.seconds.get(name, 0.0) + wall - entry.inner[0]
+            self.cpu[name] = self.cpu.get(name, 0.0) + cpu - entry.inner[1]
+            self.blocks[name] = self.blocks.get(name, 0) + blocks - entry.inner[2]
+            self.peak[name] = max(self.peak.get(name, 0), peak - entry.base)
+            if self._stack: #Retoma la de afuera: su pico incluye el de la anidada
+                outer = self._stack[-1]
+                outer.inner[0] += wall
+                outer.inner[1] += cpu
+                outer.inner[2] += blocks
+                outer.peak = max(outer.peak, peak)
+                tracemalloc.reset_peak()
+                self.profiles[outer.name].enable()
+
+    def report(self) -> str:
+        import pstats
+        self._tracemalloc.stop()
+        lines = []
+        for name in _ordered(self.seconds):
+            if name not in self.profiles: #Imports de main: antes de crear el perfilador
+                lines.append(f"[PROFILE] {name}: pared={self.seconds[name] * 1000:.1f} ms")
+                continue
+            lines.append(f"[PROFILE] {name}: pared={self.seconds[name] * 1000:.1f} ms "
+                         f"cpu={self.cpu[name] * 1000:.1f} ms bloques={self.blocks[name]:+d} "
+                         f"pico={self.peak[name] / 1024:.1f} KiB")
+            stats = _own_code(pstats.Stats(self.profiles[name]).stats)
+            ranked = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:self.top]
+            for func, (_, calls, own, cumulative, _) in ranked: #Funciones con más tiempo propio
+                lines.append(f"    {own * 1000:8.1f} ms propio {cumulative * 1000:8.1f} ms total "
+                             f"{calls:>8} llamadas  {_label(func)}")
+            if self.dump_dir:
+                os.makedirs(self.dump_dir, exist_ok=True)
+                base = os.path.join(self.dump_dir, name)
+                self.profiles[name].dump_stats(base + ".pstats")
+                with open(base + ".collapsed", "w", encoding="utf-8") as handle:
+                    for stack, micros in sorted(collapsed_stacks(stats).items()):
+                        handle.write(f"{stack} {micros}\n")
+        if self.dump_dir:
+            lines.append(f"[PROFILE] archivos: {os.path.join(self.dump_dir, '<etapa>')}.pstats / .collapsed")
+        lines.append(f"[PROFILE] total={(perf_counter() - self.started) * 1000:.1f} ms")
+        return "\n".join(lines)
+
+
+def _own_code(stats: dict) -> dict:
+    #Sin los marcos del propio perfilador (entrar/salir de etapas, enable/disable)
+    import contextlib
+    internal = {__file__, contextlib.__file__}
+    keep = {func for func in stats if func[0] not in internal and "_lsprof" not in func[2]}
+    return {func: (*entry[:4], {caller: edge for caller, edge in entry[4].items() if caller in keep})
+            for func, entry in stats.items() if func in keep}
+
+
+def _label(func: tuple) -> str:
+    filename, line, name = func
+    if filename == "~": #Funciones de C: "<built-in method ...>"
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats: dict, min_micros: int = 1) -> Counter:
+    """
+    Pilas "a;b;c" -> microsegundos de tiempo propio, a partir de pstats
+    (Stats.stats). cProfile solo guarda aristas llamador -> llamado, así que
+    el tiempo de cada función se reparte entre sus llamadores en proporción
+    al tiempo acumulado de cada arista; las recursiones se cortan.
+    """
+    callees: dict[tuple, list[tuple[tuple, float]]] = {}
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    out: Counter = Counter()
+    roots = [func for func, entry in stats.items() if not entry[4]]
+
+    def walk(func, stack, on_stack, share):
+        #share = tiempo acumulado de func que corresponde a esta pila
+        cumulative, own = stats[func][3], stats[func][2]
+        if share * 1e6 < min_micros or cumulative <= 0:
+            return
+        label = f"{stack};{_label(func)}" if stack else _label(func)
+        fraction = share / cumulative
+        out[label] += int(own * fraction * 1e6)
+        for callee, edge_time in callees.get(func, ()):
+            if callee not in on_stack:
+                on_stack.add(callee)
+                walk(callee, label, on_stack, edge_time * fraction)
+                on_stack.discard(callee)
+
+    for root in roots:
+        walk(root, "", {root}, stats[root][3])
+    return +out  #Sin entradas en cero
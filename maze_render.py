@@ -1,40 +1,132 @@
+import sys
+
+from .maze_grid import MAX_WEIGHT, MIN_WEIGHT, as_grid
+from .maze_solver import path_cost
+
 # ------------------------------------------------------------
-# Impresión del mapa (alineado, bonito, uniforme)
+# Salida con búfer: todas las funciones escriben en `out` (por defecto
+# sys.stdout) en bloques de líneas, en lugar de un print por fila.
 # ------------------------------------------------------------
-def print_laberinth(laberinth, path):
-    step = {pos: i for i, pos in enumerate(path)}  #Mapa de pasos para el camino
-    rows, columns = len(laberinth), len(laberinth[0]) #Dimensiones del laberinto
+_FLUSH_LINES = 512  #Líneas acumuladas antes de escribir un bloque
+
+RENDER_MODES = ("full", "overlay", "diff", "summary", "none")
+
+
+class _Lines:
+    #Acumula líneas y las escribe en bloques sobre el mismo destino
+    def __init__(self, out=None):
+        self.out = out if out is not None else sys.stdout
+        self.lines = []
+
+    def add(self, line=""):
+        self.lines.append(line)
+        if len(self.lines) >= _FLUSH_LINES:
+            self.flush()
+
+    def flush(self):
+        if self.lines:
+            self.out.write("\n".join(self.lines) + "\n")
+            self.lines = []
+
+
+def _cell_strings(W): #Texto de cada valor de celda, calculado una sola vez por mapa
+    table = [".".rjust(W)] * 256  # " ." Camino libre
+    table[1] = "█" * W            # "██" Pared
+    table[9] = "E".rjust(W)       # " E" Salida
+    for value in range(MIN_WEIGHT, MAX_WEIGHT + 1): # " 5" Celda con peso
+        table[value] = str(value).rjust(W)
+    return table
+
+
+def _window(laberinth, cells, crop): #Filas y columnas a dibujar (recorte al camino + 1 de margen)
+    rows, columns = len(laberinth), len(laberinth[0])
+    if not crop or not cells:
+        return 0, rows, 0, columns
+    r0 = max(min(r for r, _ in cells) - 1, 0)
+    r1 = min(max(r for r, _ in cells) + 2, rows)
+    c0 = max(min(c for _, c in cells) - 1, 0)
+    c1 = min(max(c for _, c in cells) + 2, columns)
+    return r0, r1, c0, c1
 
-    W = max(3, len(str(len(path) - 1)))  #Ancho dinamico, minimo 3, y que soporte el mayor indice
 
-    def cell_str(r, c):
-        if (r, c) == path[0]:
-            return "S".rjust(W)           # " S" Inicio
-        if laberinth[r][c] == 9:
-            return "E".rjust(W)           # " E" Salida
-        if laberinth[r][c] == 1:
-            return "█" * W                # "██" Pared
-        if (r, c) in step:
-            return f"{step[(r, c)]:0{W}d}"  # "00", "01", ... Paso en el camino
-        return ".".rjust(W)               # " ." Camino libre
+def _draw(laberinth, marks, W, lines, window, start=None):
+    #marks = {fila: [(columna, texto), ...]} se superpone a las celdas libres
+    #start = celda de inicio: "S" siempre, incluso sobre la salida
+    r0, r1, c0, c1 = window
+    table = _cell_strings(W)
+    get = table.__getitem__
 
     #Encabezado de columnas
-    print("   " + " ".join(f"{c:0{W}d}" for c in range(columns)))
-    print("   " + ("-" * (columns * (W + 1) - 1)))
+    lines.add("   " + " ".join(f"{c:0{W}d}" for c in range(c0, c1)))
+    lines.add("   " + ("-" * ((c1 - c0) * (W + 1) - 1)))
 
     #Recorrer filas e imprimirlas con su indice
-    for r in range(rows): 
-        row_cells = [cell_str(r, c) for c in range(columns)]
-        print(f"{r:02d}| " + " ".join(row_cells)) 
+    for r in range(r0, r1):
+        row = laberinth[r]
+        row_cells = list(map(get, row[c0:c1]))
+        for c, text in marks.get(r, ()):
+            if c0 <= c < c1 and row[c] != 1 and row[c] != 9: #Paredes y salida tienen prioridad
+                row_cells[c - c0] = text
+        if start is not None and start[0] == r and c0 <= start[1] < c1:
+            row_cells[start[1] - c0] = "S".rjust(W) # " S" Inicio
+        lines.add(f"{r:02d}| " + " ".join(row_cells))
+
+
+# ------------------------------------------------------------
+# Impresión del mapa (alineado, bonito, uniforme)
+# ------------------------------------------------------------
+def print_laberinth(laberinth, path, out=None, crop=False):
+    W = max(3, len(str(len(path) - 1)))  #Ancho dinamico, minimo 3, y que soporte el mayor indice
+    marks = {}
+    for i, (r, c) in enumerate(path): #Paso en el camino: "00", "01", ...
+        marks.setdefault(r, []).append((c, f"{i:0{W}d}"))
+    lines = _Lines(out)
+    _draw(laberinth, marks, W, lines, _window(laberinth, path, crop), start=path[0])
+    lines.flush()
+
+
+def print_overlay(laberinth, paths, out=None, crop=False):
+    #Todos los caminos en un solo mapa: cada celda muestra cuántos pasan por ella
+    W = 3
+    uses = {}
+    for path in paths:
+        for pos in set(path):
+            uses[pos] = uses.get(pos, 0) + 1
+    marks = {}
+    for (r, c), n in uses.items():
+        marks.setdefault(r, []).append((c, (str(n) if n < 100 else "+").rjust(W)))
+    lines = _Lines(out)
+    lines.add(f"Mapa combinado de {len(paths)} caminos (número = caminos que pasan por la celda)\n")
+    _draw(laberinth, marks, W, lines, _window(laberinth, list(uses), crop), start=paths[0][0])
+    lines.flush()
+
+
+def print_diff(laberinth, official, path, out=None):
+    #Solo la zona donde el camino difiere del oficial: + nuevo, - dejado, = compartido
+    W = 3
+    ours, theirs = set(path), set(official)
+    changed = ours ^ theirs
+    marks = {}
+    for pos in ours | theirs:
+        symbol = "+" if pos not in theirs else "-" if pos not in ours else "="
+        marks.setdefault(pos[0], []).append((pos[1], symbol.rjust(W)))
+    lines = _Lines(out)
+    if not changed:
+        lines.add("(mismo recorrido que la solución oficial)")
+    else:
+        _draw(laberinth, marks, W, lines, _window(laberinth, list(changed), True))
+    lines.flush()
 
 # ------------------------------------------------------------
 # Reportes (oficial)
 # ------------------------------------------------------------
-def print_path_steps(path): #Imprimir el camino paso a paso
-    print(f"\nCamino a la salida (paso a paso):")
-    print("-" * 36)
+def print_path_steps(path, out=None): #Imprimir el camino paso a paso
+    lines = _Lines(out)
+    lines.add(f"\nCamino a la salida (paso a paso):")
+    lines.add("-" * 36)
     for i, (row, column) in enumerate(path):
-        print(f"Paso {i+1:02d} | fila {row:02d} | columna {column:02d}")
+        lines.add(f"Paso {i+1:02d} | fila {row:02d} | columna {column:02d}")
+    lines.flush()
 
 def path_to_directions(path): #Convertir el camino en direcciones
     directions = []
@@ -45,11 +137,13 @@ def path_to_directions(path): #Convertir el camino en direcciones
         elif c2 == c1 + 1: directions.append("→")
     return directions
 
-def print_directions(directions, per_line=40):
-    print("\nDirecciones:")
-    print("-" * 36)
+def print_directions(directions, per_line=40, out=None):
+    lines = _Lines(out)
+    lines.add("\nDirecciones:")
+    lines.add("-" * 36)
     for i in range(0, len(directions), per_line):
-        print(" ".join(directions[i:i+per_line]))
+        lines.add(" ".join(directions[i:i+per_line]))
+    lines.flush()
 
 def compressed_directions(directions): #Comprimir las direcciones e imprimirlas
     if not directions: # Si la lista de direcciones esta vacia, retornamos la cadena vacia
@@ -67,63 +161,100 @@ def compressed_directions(directions): #Comprimir las direcciones e imprimirlas
     out.append(f"{current}x{count}")
     return " ".join(out) #Retornar las direcciones comprimidas como una cadena
 
-def print_summary(path): #Imprimir resumen del camino
-    print(f"\nResumen:")
-    print("-" * 36)
-    print(f"Inicio: {path[0]}")
-    print(f"Salida: {path[-1]}")
-    print(f"Celdas recorridas: {len(path)}")
-    print(f"Movimientos realizados: {len(path) -1}")
+def print_summary(path, out=None, cost=None): #Imprimir resumen del camino (cost solo con celdas de peso)
+    lines = _Lines(out)
+    lines.add(f"\nResumen:")
+    lines.add("-" * 36)
+    lines.add(f"Inicio: {path[0]}")
+    lines.add(f"Salida: {path[-1]}")
+    lines.add(f"Celdas recorridas: {len(path)}")
+    lines.add(f"Movimientos realizados: {len(path) -1}")
+    if cost is not None:
+        lines.add(f"Costo total: {cost}")
+    lines.flush()
 
 # ------------------------------------------------------------
 # Resultado oficial completo + opciones reducidas
 # ------------------------------------------------------------
-def print_solution_official_and_options(laberinth, paths): #Imprimir la solucion oficial y las opciones
-    if not paths: #Si no hay caminos encontrados, lo indicamos
-        print("No se encontró ningún camino a la salida.")
-        return
-    
-    official_path = paths[0] #Camino mas corto (oficial)
-    opt_paths = paths[1:]#Caminos alternativos (opciones)
+def print_solution_official_and_options(laberinth, paths, render="full", crop=False, out=None): #Imprimir la solucion oficial y las opciones
+    #paths puede ser una lista o un generador (iter_shortest_paths): la solucion oficial
+    #se imprime antes de que se calculen las alternativas. Retorna los caminos impresos.
+    #render: full = mapa por camino | overlay = un mapa con todos | diff = solo lo que
+    #cambia respecto al oficial | summary = sin mapas | none = no imprime nada
+    #crop = recortar los mapas al rectángulo que ocupa el camino
+    if render not in RENDER_MODES:
+        raise ValueError(f"Modo de render desconocido: {render!r} (opciones: {', '.join(RENDER_MODES)})")
+    paths = iter(paths)
+    if render == "none": #Solo calcular
+        return list(paths)
+    lines = _Lines(out)
+    official_path = next(paths, None) #Camino mas corto (oficial)
+    if official_path is None: #Si no hay caminos encontrados, lo indicamos
+        lines.add("No se encontró ningún camino a la salida.")
+        lines.flush()
+        return []
+    maps = render != "summary"
+    grid = as_grid(laberinth)
+    weighted = grid.is_weighted()
+
+    def cost_note(path, label="Costo: "): #Con celdas de peso el orden es por costo: se muestra junto a los movimientos
+        return f" | {label}{path_cost(grid, path)}" if weighted else ""
 
     #Mostramos por pantalla la solucion oficial y sus detalles
 
-    print("\n" + "=" * 48)
-    print(f"SOLUCION OFICIAL (TOP -1) + OPCIONES")
-    print("=" * 48)
+    lines.add("\n" + "=" * 48)
+    lines.add(f"SOLUCION OFICIAL (TOP -1) + OPCIONES")
+    lines.add("=" * 48)
 
     #Imprimir la solucion oficial
 
-    print("\nSOLUCION OFICIAL (CAMINO MAS CORTO):")
-    print("-" * 48)
-    print(f"Movimientos: {len(official_path) - 1} | Celdas: {len(official_path)}\n")
-
-    print_laberinth(laberinth, official_path) #Imprimir el laberinto con el camino oficial
-    print_path_steps(official_path) #Imprimir el camino oficial paso a paso
+    lines.add("\nSOLUCION OFICIAL (CAMINO MAS CORTO):")
+    lines.add("-" * 48)
+    lines.add(f"Movimientos: {len(official_path) - 1} | Celdas: {len(official_path)}{cost_note(official_path)}\n")
+    lines.flush()
 
     directions = path_to_directions(official_path)
-    print_directions(directions, per_line=40)#Imprimir las direcciones oficiales
+    if maps:
+        print_laberinth(laberinth, official_path, out=lines.out, crop=crop) #Imprimir el laberinto con el camino oficial
+        print_path_steps(official_path, out=lines.out) #Imprimir el camino oficial paso a paso
+        print_directions(directions, per_line=40, out=lines.out)#Imprimir las direcciones oficiales
 
     compressed = compressed_directions(directions) #Comprimir las direcciones y las imprimimos
-    print("\nDirecciones comprimidas:")
-    print("-" * 36)
-    print(compressed)
+    lines.add("\nDirecciones comprimidas:")
+    lines.add("-" * 36)
+    lines.add(compressed)
+    lines.flush()
 
-    print_summary(official_path) #Imprimir resumen del camino oficial
+    print_summary(official_path, out=lines.out, cost=path_cost(grid, official_path) if weighted else None) #Imprimir resumen del camino oficial
 
-    #Imprimir las opciones alternativas (solo metricas + mapa)
-    if opt_paths: #si hay caminos alternativos, lo mostramos
-        print("\n" + "=" * 48)
-        print(f"OPCIONES ALTERNATIVAS")
-        print("=" * 48)
+    #Imprimir las opciones alternativas (solo metricas + mapa), a medida que se generan
+    shown = [official_path]
+    for i, opt_path in enumerate(paths, 1): #Recorrer las opciones alternativas y mostrarlas
+        if i == 1: #si hay caminos alternativos, lo mostramos
+            lines.add("\n" + "=" * 48)
+            lines.add(f"OPCIONES ALTERNATIVAS")
+            lines.add("=" * 48)
 
-        for i, opt_path in enumerate(opt_paths, 1): #Recorrer las opciones alternativas y mostrarlas
-            print(f"\nOPCION {i}:")
-            print("-" * 48)
-            print(f"Movimientos: {len(opt_path) - 1} | Celdas: {len(opt_path)}\n")
-            print_laberinth(laberinth, opt_path) 
+        if render == "summary" or render == "overlay": #Una línea por opción (el mapa va al final)
+            lines.add(f"OPCION {i}: movimientos={len(opt_path) - 1} | celdas={len(opt_path)}{cost_note(opt_path, 'costo=')}")
+        else:
+            lines.add(f"\nOPCION {i}:")
+            lines.add("-" * 48)
+            lines.add(f"Movimientos: {len(opt_path) - 1} | Celdas: {len(opt_path)}{cost_note(opt_path)}\n")
+            lines.flush()
+            if render == "diff":
+                print_diff(laberinth, official_path, opt_path, out=lines.out)
+            else:
+                print_laberinth(laberinth, opt_path, out=lines.out, crop=crop)
+        shown.append(opt_path)
 
-    else: #Si no hay caminos alternativos, lo indicamos
-        print("\nNo hay opciones alternativas disponibles.")
+    if len(shown) == 1: #Si no hay caminos alternativos, lo indicamos
+        lines.add("\nNo hay opciones alternativas disponibles.")
+    elif render == "overlay":
+        lines.add("")
+        lines.flush()
+        print_overlay(laberinth, shown, out=lines.out, crop=crop)
 
-    print("\n" + "=" * 48 + "\n")
\ No newline at end of file
+    lines.add("\n" + "=" * 48 + "\n")
+    lines.flush()
+    return shown
@@ -0,0 +1,168 @@
+import sys
+from itertools import compress
+from typing import Optional
+
+from .maze_grid import WALL, WEIGHTS, as_grid
+from .maze_solver import _cost_field, _descend, _descend_weighted, _distance_field, _find_goal_id, _numpy
+
+#Celdas a partir de las que las aristas de las mesetas se buscan con NumPy (si está instalado)
+_NUMPY_CELLS = 100_000
+
+# ------------------------------------------------------------
+# Rutas alternativas diversas (método de mesetas / "plateaus").
+# Yen devuelve los k caminos más cortos, que en un laberinto real casi siempre
+# son el oficial con un desvío de pocas celdas. Aquí se calculan solo dos
+# campos completos: costo desde el inicio y costo hasta la salida. Una meseta
+# es un tramo que está a la vez en el árbol de caminos más cortos desde el
+# inicio y en el de caminos más cortos hacia la salida; cada meseta u..v da
+# una ruta inicio -> u -> v -> salida que es localmente óptima. Se eligen las
+# mesetas más largas cuya ruta no supere max_stretch veces el óptimo ni
+# comparta más de max_overlap de sus celdas con las rutas ya elegidas.
+# ------------------------------------------------------------
+
+
+def diverse_paths(laberinth, start_row, start_column, k=4, goal_value=9, max_stretch=1.5, max_overlap=0.5,
+                  all_goals=False) -> list[list[tuple[int, int]]]:
+    """
+    Hasta k rutas distintas a la salida: la primera es la oficial (la misma
+    que la BFS) y las demás tienen costo <= max_stretch * óptimo y como mucho
+    max_overlap (fracción de sus celdas) en común con las anteriores.
+    Se retornan ordenadas por costo, como k_shortest_paths.
+    """
+    grid = as_grid(laberinth)
+    if not grid.in_bounds(start_row, start_column):
+        return []
+    goal = _find_goal_id(grid, goal_value)
+    source = grid.cell_id(start_row, start_column)
+    if goal is None or grid.cells[source] == WALL:
+        return []
+    targets = grid.goal_ids(goal_value) if all_goals else (goal,)
+    weighted = grid.is_weighted()
+    build = _cost_field if weighted else _distance_field
+    descend = _descend_weighted if weighted else _descend
+    cells, offsets = grid.cells, grid.offsets
+
+    to_goal = build(grid, targets) #Costo de cada celda hasta la salida
+    official = descend(grid, to_goal, source)
+    if official is None:
+        return []
+    if k <= 1:
+        return [grid.to_coords(official)]
+    #Costo desde el inicio sin construir otro campo: la búsqueda inversa desde source da
+    #back[x] = costo de x -> source, y el de ida paga la celda final en vez de la inicial:
+    #source -> x = back[x] + peso(x) - peso(source)
+    back = build(grid, (source,))
+    weights = WEIGHTS
+    bound = int(to_goal[source] * max_stretch)
+    limit = bound + weights[cells[source]]
+
+    vectorize = "numpy" in sys.modules or len(cells) >= _NUMPY_CELLS
+    links = _links_numpy if vectorize and _numpy() else _links_python
+    useful, link = links(grid, back, to_goal, limit, source)
+
+    def behind(cell): #Celda anterior en el árbol desde el inicio (primera dirección)
+        reached = back[cell]
+        for offset in offsets:
+            new = cell + offset
+            if useful[new] and back[new] + weights[cells[new]] == reached:
+                return new
+        return None
+
+    linked = set(link.values())
+    plateaus = []
+    for head in link:
+        if head in linked:
+            continue
+        plateau = [head]
+        while plateau[-1] in link:
+            plateau.append(link[plateau[-1]])
+        plateaus.append(plateau)
+    plateaus.sort(key=lambda plateau: (-len(plateau), back[plateau[0]] + weights[cells[plateau[0]]] + to_goal[plateau[0]],
+                                       plateau[0]))
+
+    chosen = [official]
+    used = set(official)
+    for plateau in plateaus:
+        if len(chosen) >= k:
+            break
+        route = _route(plateau, source, behind, descend(grid, to_goal, plateau[-1]))
+        if route is None or len(set(route)) != len(route):
+            continue  #La ruta se corta a sí misma
+        shared = sum(1 for cell in route if cell in used)
+        if shared > max_overlap * len(route):
+            continue
+        chosen.append(route)
+        used.update(route)
+    cost = lambda path: sum(weights[cells[cell]] for cell in path[1:])
+    chosen.sort(key=cost) #Estable: la oficial (óptima) queda primera
+    return [grid.to_coords(path) for path in chosen]
+
+
+def _links_python(grid, back, to_goal, limit, source):
+    #useful = máscara de celdas por las que pasa alguna ruta dentro del límite de costo.
+    #link[a] = b si la arista a -> b está en los dos árboles: b es la primera vecina de a
+    #hacia la salida (como _descend) y a la primera de b hacia el inicio
+    cells, offsets, weights = grid.cells, grid.offsets, WEIGHTS
+    useful = bytearray(len(cells))
+    for cell, (a, b, value) in enumerate(zip(back, to_goal, cells)):
+        if a >= 0 and b >= 0 and a + b + weights[value] <= limit:
+            useful[cell] = 1
+    link = {}
+    for cell in compress(range(len(useful)), useful):
+        remaining = to_goal[cell]
+        if cell == source or remaining <= 0:
+            continue
+        for offset in offsets:
+            new = cell + offset
+            if useful[new] and to_goal[new] + weights[cells[new]] == remaining:
+                break
+        else:
+            continue
+        reached = back[new]
+        for offset in offsets:
+            previous = new + offset
+            if useful[previous] and back[previous] + weights[cells[previous]] == reached:
+                if previous == cell:
+                    link[cell] = new
+                break
+    return useful, link
+
+
+def _links_numpy(grid, back, to_goal, limit, source):
+    #Lo mismo que _links_python, una dirección a la vez sobre todas las celdas útiles
+    np = _numpy()
+    cells = np.frombuffer(grid.cells, dtype=np.uint8)
+    weight = np.frombuffer(WEIGHTS, dtype=np.uint8).astype(np.int64)[cells]
+    back = np.frombuffer(back, dtype=np.int32).astype(np.int64)
+    to_goal = np.frombuffer(to_goal, dtype=np.int32).astype(np.int64)
+    useful = (back >= 0) & (to_goal >= 0) & (back + to_goal + weight <= limit)
+
+    def first(ids, field): #Primera vecina útil con field[vecina] + peso == field[celda] (-1 si no hay)
+        found = np.full(len(ids), -1, dtype=np.int64)
+        wanted = field[ids]
+        for offset in grid.offsets:
+            new = ids + offset #Las celdas útiles no son borde: el vecino está dentro del buffer
+            hit = (found < 0) & useful[new] & (field[new] + weight[new] == wanted)
+            found[hit] = new[hit]
+        return found
+
+    ids = np.flatnonzero(useful & (to_goal > 0))
+    ids = ids[ids != source]
+    ahead = first(ids, to_goal)
+    ids, ahead = ids[ahead >= 0], ahead[ahead >= 0]
+    both = first(ahead, back) == ids
+    return bytearray(useful.tobytes()), dict(zip(ids[both].tolist(), ahead[both].tolist()))
+
+
+def _route(plateau, source, behind, tail) -> Optional[list[int]]:
+    #inicio -> primera celda de la meseta (árbol desde el inicio) + meseta + bajada a la salida
+    head = [plateau[0]]
+    while head[-1] != source:
+        previous = behind(head[-1])
+        if previous is None:
+            return None
+        head.append(previous)
+    if tail is None:
+        return None
+    head.reverse()
+    return head + plateau[1:] + tail[1:]
@@ -0,0 +1,465 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import count
+from multiprocessing import resource_tracker
+from time import perf_counter
+from typing import Any, Iterable, Optional, Union
+
+from .maze_batch import LOCAL_INDEXES, SharedMazes, read_queries, solve_chunk, to_task
+from .maze_cache import fingerprint
+from .maze_grid import Grid, as_grid
+from .maze_index import MazeIndex
+from .metrics import latency_summary
+
+# ------------------------------------------------------------
+# Servidor de larga duración: JSON por línea sobre TCP o socket Unix. Evita
+# pagar el arranque del intérprete y la carga del laberinto en cada consulta:
+# los laberintos quedan publicados en memoria compartida y cada worker
+# conserva su MazeIndex entre peticiones.
+#
+#   python -m laberinth_proyect.maze_server serve 127.0.0.1:8765 --maze big.maze
+#   python -m laberinth_proyect.maze_server client 127.0.0.1:8765 consultas.jsonl
+#
+# Consulta: la misma que en maze_batch, más "op":
+#   "paths" (por defecto) = oficial + alternativas, "solve" = solo el oficial (k=1),
+#   "stats" = contadores y percentiles de latencia del servidor.
+# Las respuestas llevan el "id" de la consulta y salen en orden de llegada
+# a su fin (no de envío): con varias consultas en vuelo, el cliente las
+# empareja por id.
+# ------------------------------------------------------------
+
+_LINE_LIMIT = 1 << 26  #Máximo de bytes por línea (laberintos en línea)
+_LATENCIES = 10000  #Latencias retenidas para los percentiles
+_PREPARE_THREADS = 4  #Hilos que preparan consultas (JSON, laberinto en línea, huella)
+_PARSE_REMOTE = 1 << 16  #Con pool de procesos, las líneas más largas se parsean en un worker
+
+
+def parse_address(address: str) -> tuple[str, Union[str, int]]:
+    #"host:puerto" -> (host, puerto); "unix:/ruta" -> ("unix", ruta)
+    if address.startswith("unix:"):
+        return ("unix", address[5:])
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Dirección inválida: {address!r} (use host:puerto o unix:ruta)")
+    return (host, int(port))
+
+
+def _parse_query(line: bytes) -> Any:
+    #En un worker: json.loads de un laberinto grande retiene el GIL (~0.1 s por 4 MB) y
+    #frenaría al bucle de eventos; vuelve con el laberinto compacto (filas, columnas, bytes)
+    query = json.loads(line)
+    if isinstance(query, dict) and isinstance(query.get("maze"), list):
+        try:
+            grid = as_grid(query["maze"])
+        except (ValueError, TypeError): #Se deja tal cual: la preparación responde el error con su id
+            return query
+        query["maze"] = (grid.rows, grid.cols, bytes(grid.cells))
+    return query
+
+
+class MazeServer:
+    """
+    Atiende consultas en paralelo sin bloquear el bucle de eventos: las
+    búsquedas van a un pool (procesos si workers > 1; si no, un hilo) y la
+    preparación (JSON, laberinto en línea, huella, publicación) a un hilo
+    propio, así un laberinto grande no frena a las demás conexiones.
+    Los laberintos publicados tienen un tope (SharedMazes, LRU).
+      max_pending = consultas en vuelo como máximo entre todas las conexiones;
+                    al llegar al tope se deja de leer de los sockets (contrapresión)
+      timeout     = segundos por consulta; al vencer se responde con error
+                    (un worker de procesos no se puede interrumpir: termina su tarea)
+    """
+
+    def __init__(
+        self,
+        default_maze: Union[Grid, list[list[int]], None] = None,
+        workers: Optional[int] = None,
+        max_pending: int = 64,
+        timeout: float = 30.0,
+    ):
+        self.default_maze = as_grid(default_maze) if default_maze is not None else None
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_pending)
+        self.max_pending = max_pending
+        self._pool: Optional[Executor] = None
+        self._prepare: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()  #_files, _indexes y _shared entre los hilos de preparación y del pool
+        self._shared: Optional[SharedMazes] = None
+        self._files: dict[str, Grid] = {}  #Laberintos cargados desde archivo, por ruta
+        self._indexes: dict[str, MazeIndex] = {}  #Sin pool de procesos: índice por huella
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self._latencies: deque[float] = deque(maxlen=_LATENCIES)
+        self.counters = {"requests": 0, "errors": 0, "timeouts": 0, "in_flight": 0, "connections": 0}
+
+    # ---- Ciclo de vida ----
+    async def start(self, address: str) -> None:
+        self._prepare = ThreadPoolExecutor(max_workers=_PREPARE_THREADS)
+        if self.workers > 1:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            self._shared = SharedMazes()
+            #Arrancar los workers antes de escuchar: con fork heredarían los sockets abiertos
+            #y al cerrar una conexión desde el servidor el cliente no recibiría EOF. El registro
+            #de memoria compartida va antes, para que los workers lo compartan (ver attach)
+            resource_tracker.ensure_running()
+            await asyncio.wrap_future(self._pool.submit(os.getpid))
+        else: #Un solo hilo: MazeIndex no se comparte entre búsquedas concurrentes
+            self._pool = ThreadPoolExecutor(max_workers=1)
+        kind, where = parse_address(address)
+        if kind == "unix":
+            self._server = await asyncio.start_unix_server(self._handle, path=where, limit=_LINE_LIMIT)
+        else:
+            self._server = await asyncio.start_server(self._handle, kind, where, limit=_LINE_LIMIT)
+
+    async def serve_forever(self, address: str) -> None:
+        await self.start(address)
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            server.close()
+        for writer in self._connections.values(): #Las conexiones abiertas terminan su lectura con EOF
+            writer.close()
+        if self._connections:
+            await asyncio.gather(*self._connections, return_exceptions=True)
+        if server is not None:
+            await server.wait_closed()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._prepare is not None:
+            self._prepare.shutdown(wait=True)
+            self._prepare = None
+        if self._shared is not None:
+            with self._lock:
+                self._shared.close()
+                self._shared = None
+
+    @property
+    def sockets(self):
+        return self._server.sockets if self._server is not None else ()
+
+    # ---- Métricas ----
+    def stats(self) -> dict[str, Any]:
+        ordered = sorted(self._latencies)
+        report: dict[str, Any] = dict(self.counters)
+        report["mazes"] = len(self._shared) if self._shared is not None else len(self._indexes)
+        if ordered:
+            report["latency_ms"] = latency_summary(ordered)
+        return report
+
+    # ---- Conexiones ----
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.counters["connections"] += 1
+        handler = asyncio.current_task()
+        self._connections[handler] = writer
+        lock = asyncio.Lock()  #Una respuesta completa por vez en el socket
+        pending: set[asyncio.Task] = set()
+        try:
+            while True:
+                await self._slots.acquire() #Contrapresión: no leer más hasta que haya hueco
+                try:
+                    line = await reader.readline()
+                except ConnectionError:
+                    line = b""
+                except ValueError: #Línea demasiado larga: se avisa como otra consulta inválida y se cierra
+                    self._slots.release()
+                    await self._reject(writer, lock, f"ValueError: línea demasiado larga (máx. {_LINE_LIMIT} bytes)")
+                    break
+                if not line.strip():
+                    self._slots.release()
+                    if not line:
+                        break
+                    continue
+                task = asyncio.ensure_future(self._respond(line, writer, lock))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            del self._connections[handler]
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, line: bytes, writer: asyncio.StreamWriter, lock: asyncio.Lock) -> None:
+        started = perf_counter()
+        self.counters["requests"] += 1
+        self.counters["in_flight"] += 1
+        try:
+            result = await self._answer(line)
+        finally:
+            self.counters["in_flight"] -= 1
+            self._slots.release()
+        if "error" in result:
+            self.counters["errors"] += 1
+        data = json.dumps(result, separators=(",", ":")).encode() + b"\n"
+        async with lock:
+            try:
+                writer.write(data)
+                await writer.drain()
+            except ConnectionError:
+                return
+        self._latencies.append((perf_counter() - started) * 1000)
+
+    async def _reject(self, writer: asyncio.StreamWriter, lock: asyncio.Lock, error: str) -> None:
+        #Respuesta de error sin consulta asociada (id null)
+        self.counters["requests"] += 1
+        self.counters["errors"] += 1
+        data = json.dumps({"id": None, "error": error}, separators=(",", ":")).encode() + b"\n"
+        async with lock:
+            try:
+                writer.write(data)
+                await writer.drain()
+            except ConnectionError:
+                pass
+
+    def _prepare_task(self, line: Union[bytes, BaseException, Any]) -> tuple[Any, str, Any]:
+        #En un hilo de preparación: (id, "task", tarea) | (id, "stats", None) | (id, "error", resultado).
+        #line = la línea, o la consulta ya parseada por _parse_query (o su excepción)
+        try:
+            if isinstance(line, BaseException):
+                raise line
+            query = json.loads(line) if isinstance(line, bytes) else line
+            if not isinstance(query, dict):
+                raise ValueError("la consulta debe ser un objeto JSON")
+        except ValueError as exc:
+            return (None, "error", {"id": None, "error": f"{type(exc).__name__}: {exc}"})
+        qid = query.get("id")
+        op = query.get("op", "paths")
+        if op == "stats":
+            return (qid, "stats", None)
+        if op not in ("paths", "solve"):
+            return (qid, "error", {"id": qid, "error": f"ValueError: operación desconocida: {op!r}"})
+        if op == "solve":
+            query = dict(query, k=1)
+        try:
+            maze = query.get("maze")
+            if isinstance(maze, tuple): #Ya compacto (_parse_query)
+                query = dict(query, maze=Grid(maze[0], maze[1], cells=bytearray(maze[2])))
+            elif isinstance(maze, list): #Conversión y huella fuera del lock (lo más costoso)
+                query = dict(query, maze=as_grid(maze))
+            if isinstance(query.get("maze"), Grid):
+                fingerprint(query["maze"])
+            with self._lock:
+                qid, grid, *rest = to_task(query, self.default_maze, self._files)
+                if self._shared is not None: #El laberinto viaja como (nombre, filas, columnas)
+                    return (qid, "task", (qid, self._shared.publish(grid), *rest))
+                key = fingerprint(grid)
+                if key not in self._indexes:
+                    if len(self._indexes) >= LOCAL_INDEXES:
+                        self._indexes.clear()
+                    self._indexes[key] = MazeIndex(grid)
+                return (qid, "task", (qid, self._indexes[key], *rest))
+        except (KeyError, TypeError, ValueError, AttributeError, OSError) as exc:
+            return (qid, "error", {"id": qid, "error": f"{type(exc).__name__}: {exc}"})
+
+    def _releaser(self, maze: tuple[str, int, int]):
+        #Callback del futuro (hilo del pool): el bloque se puede desalojar
+        def release(_future) -> None:
+            with self._lock:
+                if self._shared is not None: #Cerrado: close() ya liberó todos los bloques
+                    self._shared.release(maze)
+        return release
+
+    async def _answer(self, line: bytes) -> dict:
+        loop = asyncio.get_running_loop()
+        if self._shared is not None and len(line) > _PARSE_REMOTE:
+            try:
+                line = await asyncio.wrap_future(self._pool.submit(_parse_query, line))
+            except (ValueError, TypeError) as exc: #JSON o laberinto inválidos: se informa como siempre
+                line = exc
+        qid, kind, payload = await loop.run_in_executor(self._prepare, self._prepare_task, line)
+        if kind == "stats":
+            return {"id": qid, "stats": self.stats()}
+        if kind == "error":
+            return payload
+        evicted = tuple(self._shared.evicted) if self._shared is not None else ()
+        work = self._pool.submit(solve_chunk, [payload], evicted)
+        if self._shared is not None: #El bloque queda reservado hasta que el worker termine (aunque venza el plazo)
+            work.add_done_callback(self._releaser(payload[1]))
+        try:
+            results = await asyncio.wait_for(asyncio.wrap_future(work), self.timeout)
+        except asyncio.TimeoutError:
+            self.counters["timeouts"] += 1
+            return {"id": qid, "error": f"TimeoutError: más de {self.timeout:g} s"}
+        return results[0]
+
+
+def run_server(address: str, default_maze=None, workers: Optional[int] = None, max_pending: int = 64,
+               timeout: float = 30.0) -> None:
+    #Bloquea hasta Ctrl+C; al salir imprime las métricas en stderr
+    server = MazeServer(default_maze, workers=workers, max_pending=max_pending, timeout=timeout)
+    print(f"[SERVER] escuchando en {address} (workers={server.workers})", file=sys.stderr)
+    try:
+        asyncio.run(server.serve_forever(address))
+    except KeyboardInterrupt:
+        pass
+    print(f"[SERVER] {json.dumps(server.stats())}", file=sys.stderr)
+
+
+# ------------------------------------------------------------
+# Cliente
+# ------------------------------------------------------------
+class MazeClient:
+    """
+    Cliente asíncrono: varias consultas en vuelo por una sola conexión,
+    emparejadas por id (se asigna uno si la consulta no lo trae).
+
+        async with MazeClient("127.0.0.1:8765") as client:
+            result = await client.request({"start": [1, 0], "k": 4})
+    """
+
+    def __init__(self, address: str):
+        self.address = address
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._waiting: dict[Any, asyncio.Future] = {}
+        self._ids = count(1)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def connect(self) -> "MazeClient":
+        kind, where = parse_address(self.address)
+        if kind == "unix":
+            self._reader, self._writer = await asyncio.open_unix_connection(where, limit=_LINE_LIMIT)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(kind, where, limit=_LINE_LIMIT)
+        self._listener = asyncio.ensure_future(self._listen())
+        return self
+
+    async def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except ConnectionError:
+                pass
+        if self._listener is not None:
+            self._listener.cancel()
+
+    async def __aenter__(self) -> "MazeClient":
+        return await self.connect()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _listen(self) -> None:
+        #Reparte cada respuesta a quien espera ese id
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            result = json.loads(line)
+            future = self._waiting.pop(result.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(result)
+        for future in self._waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError("el servidor cerró la conexión"))
+
+    async def request(self, query: dict) -> dict:
+        query = dict(query)
+        if query.get("id") is None or query["id"] in self._waiting:
+            query["id"] = f"c{next(self._ids)}"
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[query["id"]] = future
+        self._writer.write(json.dumps(query, separators=(",", ":")).encode() + b"\n")
+        await self._writer.drain()
+        return await future
+
+
+async def run_client(address: str, queries: Iterable[Union[dict, str]], concurrency: int = 16,
+                     out=None) -> dict[str, Any]:
+    """
+    Envía las consultas con hasta `concurrency` en vuelo, escribe cada
+    respuesta como una línea JSON y retorna las latencias vistas por el
+    cliente (p50/p90/p99/max en ms) y el total de errores.
+    """
+    out = out or sys.stdout
+    latencies: list[float] = []
+    errors = 0
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(client: MazeClient, query: Union[dict, str]) -> None:
+        nonlocal errors
+        try:
+            started = perf_counter()
+            if isinstance(query, str): #Línea de read_queries: un JSON inválido se informa sin enviarlo
+                try:
+                    query = json.loads(query)
+                    if not isinstance(query, dict):
+                        raise ValueError("la consulta debe ser un objeto JSON")
+                except ValueError as exc:
+                    errors += 1
+                    out.write(json.dumps({"id": None, "error": f"{type(exc).__name__}: {exc}"},
+                                         separators=(",", ":")) + "\n")
+                    return
+            result = await client.request(query)
+            latencies.append((perf_counter() - started) * 1000)
+            errors += "error" in result
+            out.write(json.dumps(result, separators=(",", ":")) + "\n")
+        finally:
+            slots.release()
+
+    started = perf_counter()
+    async with MazeClient(address) as client:
+        tasks = []
+        for query in queries:
+            await slots.acquire()
+            tasks.append(asyncio.ensure_future(one(client, query)))
+        await asyncio.gather(*tasks)
+    elapsed = perf_counter() - started
+    ordered = sorted(latencies)
+    report: dict[str, Any] = {"requests": len(ordered), "errors": errors, "seconds": round(elapsed, 3),
+                              "per_second": round(len(ordered) / elapsed, 1) if elapsed else 0.0}
+    if ordered:
+        report["latency_ms"] = latency_summary(ordered)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Servidor JSON por línea de consultas de laberintos y su cliente.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="Inicia el servidor.")
+    serve.add_argument("address", help="host:puerto o unix:ruta.")
+    serve.add_argument("--maze", metavar="PATH", help="Laberinto por defecto para consultas sin 'maze'.")
+    serve.add_argument("--workers", type=int, default=None,
+                       help="Procesos de búsqueda (default: todos los núcleos; 1 = un hilo).")
+    serve.add_argument("--max-pending", type=int, default=64,
+                       help="Consultas en vuelo como máximo antes de dejar de leer (default: 64).")
+    serve.add_argument("--timeout", type=float, default=30.0, help="Segundos por consulta (default: 30).")
+    client = commands.add_parser("client", help="Envía consultas (una por línea) e imprime las respuestas.")
+    client.add_argument("address", help="host:puerto o unix:ruta.")
+    client.add_argument("file", nargs="?", default="-", help="Consultas JSON por línea (default: '-' = stdin).")
+    client.add_argument("--concurrency", type=int, default=16, help="Consultas en vuelo (default: 16).")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        default_maze = None
+        if args.maze:
+            from .maze_io import load_maze
+            default_maze = load_maze(args.maze)
+        run_server(args.address, default_maze, workers=args.workers, max_pending=args.max_pending,
+                   timeout=args.timeout)
+    else:
+        report = asyncio.run(run_client(args.address, read_queries(args.file), concurrency=args.concurrency))
+        print(f"[CLIENT] {json.dumps(report)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+from __future__ import annotations
+
+from array import array
+from heapq import heappop, heappush
+from typing import Optional, Union
+
+from .maze_grid import WALL, WEIGHTS, Grid, as_grid
+from .maze_solver import _cost_field, _distance_field, k_shortest_paths
+
+# ------------------------------------------------------------
+# Sesión sobre un laberinto que cambia: D* Lite (LPA* desde la salida hacia
+# el inicio). Tras abrir/cerrar celdas solo se reparan los costos afectados
+# por el cambio, reutilizando g/rhs de la búsqueda anterior, en lugar de
+# volver a buscar desde cero.
+#
+#   g[id]   costo hasta la salida según la última expansión
+#   rhs[id] costo según los vecinos (min peso(vecino) + g[vecino]); la celda
+#           está "consistente" si g == rhs, y solo las inconsistentes van al heap
+#
+# Costo de un movimiento = peso de la celda a la que se entra (1 sin pesos).
+# ------------------------------------------------------------
+
+_INF = 2**31 - 1
+#Una reparación que expande más de 1/_REBUILD de las celdas (p. ej. cortar el único
+#pasillo de un laberinto casi perfecto) se abandona y se recalcula el campo completo,
+#que con la BFS por niveles es más barato que seguir propagando por el heap
+_REBUILD = 32
+
+
+class MazeSession:
+    """
+    Laberinto mutable con camino más corto incremental.
+
+        session = MazeSession(lab, (1, 0))
+        session.path()             #Primera búsqueda completa
+        session.close_cell(8, 5)   #Cambios: baratos, solo marcan celdas
+        session.path()             #Repara solo lo afectado
+
+    Los cambios se hacen sobre el Grid (con Grid.set, así que los índices
+    derivados se invalidan); una lista anidada se copia al crear la sesión.
+    all_goals = camino hacia la salida más cercana en vez de la primera.
+    stats = colector opcional (metrics.SearchStats): una búsqueda por
+    reparación y una expansión por celda procesada.
+    """
+
+    def __init__(
+        self,
+        laberinth: Union[Grid, list[list[int]]],
+        start: tuple[int, int],
+        goal_value: int = 9,
+        all_goals: bool = False,
+        stats=None,
+    ):
+        self.grid = as_grid(laberinth)
+        self.goal_value = goal_value
+        self.all_goals = all_goals
+        self.stats = stats
+        self.expanded = 0  #Celdas expandidas en la última reparación
+        if not self.grid.in_bounds(*start):
+            raise ValueError(f"Inicio fuera del laberinto: {start}")
+        self._start = self.grid.cell_id(*start)
+        self._reset()
+
+    # ---- Estado de la búsqueda ----
+    def _reset(self) -> None:
+        #Estado inicial: en vez de la primera búsqueda de D* Lite (una expansión con
+        #heap por celda), el campo de distancias completo desde las salidas. Todas
+        #las celdas quedan consistentes (g == rhs) y el heap vacío.
+        grid = self.grid
+        goals = grid.goal_ids(self.goal_value)
+        goals = goals if self.all_goals else goals[:1]
+        self._goals = set(goals)
+        build = _cost_field if grid.is_weighted() else _distance_field
+        dist = build(grid, goals, self.stats)
+        self._g = array("i", [_INF if value < 0 else value for value in dist])
+        self._rhs = array("i", self._g)
+        self._heap: list[tuple[int, int, int]] = []
+        self._km = 0  #Suma de desplazamientos del inicio (corrige las claves ya encoladas)
+
+    def _h(self, cell: int) -> int:
+        #Manhattan hasta el inicio: admisible porque cada paso cuesta al menos 1
+        stride = self.grid.stride
+        row, column = divmod(cell, stride)
+        start_row, start_column = divmod(self._start, stride)
+        return abs(row - start_row) + abs(column - start_column)
+
+    def _key(self, cell: int) -> tuple[int, int]:
+        best = min(self._g[cell], self._rhs[cell])
+        if best == _INF:
+            return (_INF, _INF)
+        return (best + self._h(cell) + self._km, best)
+
+    def _update(self, cell: int) -> None:
+        #Recalcular rhs desde los vecinos y encolar si quedó inconsistente
+        cells = self.grid.cells
+        g = self._g
+        if cell not in self._goals:
+            best = _INF
+            if cells[cell] != WALL:
+                for offset in self.grid.offsets:
+                    new = cell + offset
+                    value = cells[new]
+                    if value != WALL and g[new] != _INF:
+                        cost = g[new] + WEIGHTS[value]
+                        if cost < best:
+                            best = cost
+            self._rhs[cell] = best
+        if g[cell] != self._rhs[cell]:
+            heappush(self._heap, (*self._key(cell), cell))
+
+    def _repair(self) -> None:
+        #Procesar celdas inconsistentes hasta que el inicio quede resuelto
+        grid = self.grid
+        offsets = grid.offsets
+        g, rhs, heap = self._g, self._rhs, self._heap
+        start = self._start
+        stats = self.stats
+        if stats is not None:
+            stats.searches += 1
+        expanded = 0
+        budget = len(g) // _REBUILD
+        while heap:
+            k1, k2, cell = heap[0]
+            start_key = self._key(start)
+            if (k1, k2) >= start_key and rhs[start] == g[start]:
+                break
+            heappop(heap)
+            if g[cell] == rhs[cell]: #Entrada obsoleta: ya es consistente
+                continue
+            key = self._key(cell)
+            if (k1, k2) < key: #Clave vieja (km o g cambiaron): reencolar con la actual
+                heappush(heap, (*key, cell))
+                continue
+            expanded += 1
+            if expanded > budget:
+                self._reset()
+                self.expanded = expanded
+                return
+            if stats is not None:
+                stats.level(1, 0, len(heap) + 1, (len(g) + len(rhs)) * g.itemsize + 24 * len(heap))
+            if g[cell] > rhs[cell]: #Mejoró: fijarlo y propagar a los vecinos
+                g[cell] = rhs[cell]
+            else: #Empeoró: invalidarlo y recalcularlo junto con sus vecinos
+                g[cell] = _INF
+                self._update(cell)
+            for offset in offsets:
+                new = cell + offset
+                if grid.cells[new] != WALL:
+                    self._update(new)
+        self.expanded = expanded
+
+    # ---- Cambios ----
+    def set_cell(self, row: int, column: int, value: int) -> None:
+        #Cambia una celda; la reparación se hace en el siguiente path()
+        grid = self.grid
+        cell = grid.cell_id(row, column)
+        old = grid.cells[cell] if grid.in_bounds(row, column) else None
+        grid.set(row, column, value)  #Valida los límites
+        if old == value:
+            return
+        if old == self.goal_value or value == self.goal_value: #Cambió el conjunto de salidas
+            self._reset()
+            return
+        self._update(cell)
+        for offset in grid.offsets: #Sus vecinos pagan el peso de la celda al entrar
+            new = cell + offset
+            if grid.cells[new] != WALL:
+                self._update(new)
+
+    def open_cell(self, row: int, column: int, value: int = 0) -> None:
+        self.set_cell(row, column, value)
+
+    def close_cell(self, row: int, column: int) -> None:
+        self.set_cell(row, column, WALL)
+
+    def move_start(self, row: int, column: int) -> None:
+        #El inicio avanza (p. ej. el agente camina): las claves ya encoladas siguen valiendo con km
+        if not self.grid.in_bounds(row, column):
+            raise ValueError(f"Inicio fuera del laberinto: {(row, column)}")
+        new = self.grid.cell_id(row, column)
+        self._km += self._h(new)
+        self._start = new
+
+    @property
+    def start(self) -> tuple[int, int]:
+        return self.grid.coords(self._start)
+
+    # ---- Consultas ----
+    def cost(self) -> Optional[int]:
+        #Costo del camino más corto desde el inicio (movimientos si no hay pesos)
+        if self.grid.cells[self._start] == WALL:
+            return None
+        self._repair()
+        best = self._g[self._start]
+        return None if best == _INF else best
+
+    def path(self) -> Optional[list[tuple[int, int]]]:
+        #Camino más corto actual: bajar por g desde el inicio (primer vecino mínimo)
+        if self.cost() is None:
+            return None
+        grid = self.grid
+        cells = grid.cells
+        g = self._g
+        current = self._start
+        path = [current]
+        while current not in self._goals:
+            best, step = _INF, None
+            for offset in grid.offsets:
+                new = current + offset
+                value = cells[new]
+                if value == WALL or g[new] == _INF:
+                    continue
+                cost = g[new] + WEIGHTS[value]
+                if cost < best:
+                    best, step = cost, new
+            path.append(step)
+            current = step
+        return grid.to_coords(path)
+
+    def k_shortest_paths(self, k: int = 4, algorithm: str = "bfs") -> list[list[tuple[int, int]]]:
+        #Alternativas sobre el laberinto actual (Yen completo: no es incremental)
+        row, column = self.start
+        return k_shortest_paths(self.grid, row, column, k=k, goal_value=self.goal_value, algorithm=algorithm,
+                                all_goals=self.all_goals)
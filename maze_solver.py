@@ -1,182 +1,1090 @@
-from collections import deque
+from array import array
+from heapq import heapify, heappop, heappush, heapreplace, nsmallest
+from itertools import count, islice
+from time import perf_counter
 from typing import Optional
 
+from .maze_grid import MAX_WEIGHT, WALL, WEIGHTS, Grid, as_grid
+
+_ENTRY_BYTES = 100  #Estimación por entrada de dict/heap (clave, tupla y enteros) para stats
+
+np = None  #Opcional: solo lo usa el motor "numpy"; se importa en el primer uso (_numpy), no al arrancar
+
+
+def _numpy():
+    #NumPy importado bajo demanda (unos 90 ms): retorna el módulo o False si no está instalado
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            np = False
+        else:
+            np = numpy
+    return np
+
+
+# Los solvers aceptan un Grid (o la lista anidada, que se convierte una sola
+# vez al entrar) y trabajan internamente con ids enteros de celda.
+#
+# stats = colector opcional (metrics.SearchStats). Con None no se mide nada:
+# las BFS lo consultan una vez por nivel y los demás motores una vez por
+# celda expandida.
+
 # ------------------------------------------------------------
-# Utilidad: encontrar la salida (9)
+# Utilidad: encontrar la salida (9). Las salidas se indexan una sola vez por
+# versión del Grid (Grid.goal_ids), no en cada llamada.
 # ------------------------------------------------------------
+def _find_goal_id(grid: Grid, goal_value=9): #Id de la primera salida en orden fila-columna
+    goals = grid.goal_ids(goal_value)
+    return goals[0] if goals else None
+
+
 def find_goal(laberinth, goal_value=9): #Buscar la posición de la salida en el laberinto
-    for rows in range(len(laberinth)): 
-        for columns in range(len(laberinth[0])):
-            if laberinth[rows][columns] == goal_value: #Si es la salida
-                return (rows, columns) #Retornar la posición
-    return None
+    grid = as_grid(laberinth)
+    cell = _find_goal_id(grid, goal_value)
+    if cell is None:
+        return None
+    return grid.coords(cell) #Retornar la posición
+
+
+def find_goals(laberinth, goal_value=9): #Todas las salidas, en orden fila-columna
+    grid = as_grid(laberinth)
+    return grid.to_coords(grid.goal_ids(goal_value))
 
 
 # ------------------------------------------------------------
-# (Opcional) DFS + Backtracking: excelente para recursividad,
-# pero NO garantiza el camino más corto.
+# (Opcional) DFS + Backtracking con pila explícita: sin límite de
+# recursión ni una llamada por celda, pero NO garantiza el camino más corto.
 # ------------------------------------------------------------
-def solve_puzzle_dfs(laberinth, row, column, path=None, visited=None):
+def _dfs_ids(grid: Grid, source, goal_value=9, visited=None, unmark=False, stats=None):
+    #visited = bytearray de visitados (1 byte por celda, reutilizable)
+    #unmark = desmarcar al retroceder (backtracking clásico: exponencial con ciclos);
+    #         sin desmarcar cada celda se visita como mucho una vez
+    #Retorna (camino de ids o None, celdas exploradas)
+    cells = grid.cells
+    offsets = grid.offsets
+    if visited is None:
+        visited = bytearray(len(cells))
+    if cells[source] == WALL or visited[source]: #Pared (o borde) o ya visitada
+        return None, 0
+
+    visited[source] = 1  #Marcar la pocision como visitada
+    explored = 1
+    if stats is not None:
+        stats.searches += 1
+        stats.level(1, 0, 1, len(visited))
+    if cells[source] == goal_value: #Caso base: el inicio ya es la salida
+        return [source], explored
+
+    path = [source]  #Pila de celdas = camino actual
+    branch = [0]  #Siguiente dirección a probar en cada nivel de la pila
+    while path:
+        current = path[-1]
+        direction = branch[-1]
+        if direction == 4: #Sin más direcciones: backtracking
+            path.pop()
+            branch.pop()
+            if unmark:
+                visited[current] = 0  #Desmarcar la pocision como visitada
+            continue
+        branch[-1] = direction + 1
+
+        new = current + offsets[direction] #Arriba, abajo, izquierda, derecha
+        if cells[new] == WALL or visited[new]:
+            continue
+        visited[new] = 1
+        explored += 1
+        path.append(new)  #Agregar la pocision al camino
+        branch.append(0)
+        if stats is not None: #Cada celda se expande una vez y llega por una arista
+            stats.level(1, 1, len(path), len(visited))
+        if cells[new] == goal_value: #Hemos encontrado la salida
+            return path, explored
+
+    return None, explored  #No se encontro la salida
+
+
+def solve_puzzle_dfs(laberinth, row, column, path=None, visited=None, unmark=False, stats=None):
     #fila,columna = son las pocisiones actuales
     #path = lista que guarda las pocisiones recorridas
+    #unmark = True reproduce el backtracking que desmarca celdas (ver _dfs_ids)
     if path is None:
         path = [] #Signfica que estamos en el inicio del laberinto
     if visited is None:
         visited = set()  #Conjunto para almacenar las posiciones visitadas
 
+    grid = as_grid(laberinth)
+
     #Verificar si la pocision es valida
-    if not (0 <= row < len(laberinth) and 0 <= column < len(laberinth[0])):
+    if not grid.in_bounds(row, column):
         return None  #Fuera de los limites del laberinto
-    
-    #Verificar si la posicion actual es una pared (1) o ya ha sido visitada
-    if laberinth[row][column] == 1 or (row, column) in visited:
-        return None  # No es una pocision valida
-    
-    visited.add((row, column))  #Marcar la pocision como visitada
-    path.append((row, column))  #Agregar la pocision actual al camino
 
-    #Caso base: verificar si hemos llegado a la salida (9)
-    if laberinth[row][column] == 9:
-        return path  #Hemos encontrado la salida
-    
-    #Explorar las cuatro direcciones posibles: arriba, abajo, izquierda, derecha
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+    seen = bytearray(len(grid.cells)) #Visitados como bytearray indexado por id
+    for cell in grid.to_ids(p for p in visited if grid.in_bounds(*p)):
+        seen[cell] = 1
+
+    found, _ = _dfs_ids(grid, grid.cell_id(row, column), 9, seen, unmark, stats)
+    if found is None:
+        return None  #No se encontro la salida
+
+    found_path = grid.to_coords(found)
+    visited.update(found_path) #Las celdas del camino quedan marcadas, como antes
+    path.extend(found_path)
+    return path
+
+
+# ------------------------------------------------------------
+# BFS: camino más corto con soporte de bloqueos (celdas y movimientos [nodos/aristas])
+# ------------------------------------------------------------
+def _trace_root(came, offsets, cell): #Como _trace_path, hasta cualquier celda de inicio (código 5)
+    path = [cell]
+    while came[cell] != 5:
+        cell -= offsets[came[cell] - 1]
+        path.append(cell)
+    path.reverse()
+    return path
+
 
-    #Recorrer cada direccion
-    for move in directions:
-        new_row = row + move[0] #Calcular la nueva fila
-        new_column = column + move[1] #Calcular la nueva columna
+def _trace_path(came, offsets, source, target): #Reconstruir el camino desde los códigos de dirección
+    path = [target]
+    current = target
+    while current != source:
+        current -= offsets[came[current] - 1] #Retroceder al padre
+        path.append(current)
+    path.reverse() #Invertir el camino para que vaya de inicio a salida
+    return path
 
-        #Llamada recursiva para explorar la nueva pocision
-        result_path = solve_puzzle_dfs(laberinth, new_row, new_column, path, visited)
 
-        if result_path is not None:
-            return result_path  #Si encontramos la salida, retornar el camino
-        
-    path.pop()  #Eliminar la pocision actual del camino (backtracking)
-    visited.discard((row, column))  #Desmarcar la pocision como visitada
+def _bfs_ids(grid: Grid, source, target, blocked=None, blocked_moves=None, dist=None, limit=None, came=None, stats=None):
+    #blocked = ids de celdas prohibidas
+    #blocked_moves = {id_origen: {ids_destino}} movimientos prohibidos
+    #dist + limit = poda: se descarta la celda si profundidad + dist[celda] >= limit
+    #came = buffer de trabajo reutilizable (todo a 0 salvo celdas bloqueadas con 6);
+    #       se devuelve en el mismo estado para no reservar memoria en cada búsqueda
+    if stats is not None:
+        stats.searches += 1
+    if source == target:
+        return [source]
+
+    cells = grid.cells
+    reuse = came is not None
+    #came[id] = 0 sin visitar, 1..4 dirección por la que se llegó, 5 inicio, 6 bloqueada
+    if not reuse:
+        came = bytearray(len(cells))
+    if blocked:
+        for cell in blocked:
+            came[cell] = 6
+    came[source] = 5
+    moves = tuple(zip((1, 2, 3, 4), grid.offsets))
+
+    frontier = [source] #Nivel actual (el orden equivale a la cola FIFO)
+    levels = [frontier] #Celdas tocadas, para limpiar el buffer reutilizado
+    depth = 0
+    while frontier: #Mientras haya celdas por explorar
+        depth += 1
+        cap = limit - depth if limit is not None else None #Distancia restante permitida
+        next_frontier = []
+        push = next_frontier.append
+        if reuse:
+            levels.append(next_frontier)
+        for current in frontier:
+            bm = blocked_moves.get(current) if blocked_moves else None
+            for code, offset in moves: #Explorar las cuatro direcciones
+                new = current + offset
+                if came[new] or cells[new] == WALL: #Visitada, bloqueada o pared
+                    continue
+                if bm is not None and new in bm: #Si el movimiento esta bloqueado
+                    continue
+                if cap is not None and not 0 <= dist[new] < cap: #No puede mejorar la cota
+                    continue
+                came[new] = code #Registrar de dónde venimos
+                if new == target: #Su padre ya es definitivo: reconstruir el camino
+                    if stats is not None: #Nivel parcial: hasta la celda actual
+                        stats.level(frontier.index(current) + 1, len(next_frontier) + 1,
+                                    len(frontier) + len(next_frontier) + 1, len(came))
+                    path = _trace_path(came, grid.offsets, source, target)
+                    if reuse:
+                        came[target] = 0
+                        _clear_levels(came, levels)
+                    return path
+                push(new)
+        if stats is not None:
+            stats.level(len(frontier), len(next_frontier), len(frontier) + len(next_frontier), len(came))
+        frontier = next_frontier
+
+    if reuse:
+        _clear_levels(came, levels)
+    return None  #No se encontro un camino a la salida
 
-    return None  #No se encontro la salida desde esta pocision
+
+def _clear_levels(came, levels): #Dejar a 0 las celdas visitadas del buffer reutilizado
+    for level in levels:
+        for cell in level:
+            came[cell] = 0
+
+
+def _distance_field(grid: Grid, targets, stats=None):
+    #BFS inversa desde las salidas (ids): dist[id] = movimientos hasta la más cercana (-1 inalcanzable)
+    cells = grid.cells
+    offsets = grid.offsets
+    dist = array("i", [-1]) * len(cells)
+    if stats is not None:
+        stats.searches += 1
+    frontier = list(targets)
+    for target in frontier:
+        dist[target] = 0
+    depth = 0
+    while frontier:
+        depth += 1
+        next_frontier = []
+        push = next_frontier.append
+        for current in frontier:
+            for offset in offsets:
+                new = current + offset
+                if dist[new] < 0 and cells[new] != WALL:
+                    dist[new] = depth
+                    push(new)
+        if stats is not None:
+            stats.level(len(frontier), len(next_frontier), len(frontier) + len(next_frontier),
+                        len(dist) * dist.itemsize)
+        frontier = next_frontier
+    return dist
+
+
+def _descend(grid: Grid, dist, source, came=None, blocked_next=None):
+    #Camino más corto bajando por el campo de distancias, tomando siempre la primera
+    #dirección (arriba, abajo, izquierda, derecha) que acerca a la salida: es el mismo
+    #camino que devolvería la BFS. Si una celda bloqueada (came != 0) o un movimiento
+    #prohibido desde el inicio (blocked_next) deja sin salida, retorna None.
+    offsets = grid.offsets
+    remaining = dist[source]
+    if remaining < 0:
+        return None
+    path = [source]
+    current = source
+    while remaining:
+        remaining -= 1
+        for offset in offsets:
+            new = current + offset
+            if dist[new] != remaining:
+                continue
+            if came is not None and came[new]:
+                continue
+            if blocked_next and current == source and new in blocked_next:
+                continue
+            break
+        else:
+            return None  #Sin continuación libre: hace falta una búsqueda completa
+        path.append(new)
+        current = new
+    return path
+
+
+def _moves_to_ids(grid: Grid, blocked_moves): #{(pos, pos)} -> {id_origen: {ids_destino}}
+    out: dict[int, set[int]] = {}
+    for (a, b) in blocked_moves:
+        if grid.in_bounds(*a) and grid.in_bounds(*b):
+            out.setdefault(grid.cell_id(*a), set()).add(grid.cell_id(*b))
+    return out
 
 
 # ------------------------------------------------------------
-# BFS: camino más corto con soporte de bloqueos (celdas y movimientos [nodos/aristas])
+# BFS bidireccional: dos BFS por niveles (inicio y salida) que expanden
+# siempre la frontera más pequeña y paran al encontrarse.
 # ------------------------------------------------------------
-def bfs_shortest_paths(laberinth, start, goal, blocked_cells=None, blocked_moves=None):
-    rows, columns = len(laberinth), len(laberinth[0]) #Dimensiones del laberinto
-    blocked_cells = blocked_cells or set()  #Celdas bloqueadas
-    blocked_moves = blocked_moves or set()  #Movimientos bloqueados
+def _expand_level(grid: Grid, frontier, mine, other, blocked_moves, backwards, stats=None):
+    #Expande un nivel completo; retorna (nueva frontera, celda de encuentro o None)
+    #mine/other = códigos de dirección de cada lado (0 = sin visitar, 6 = bloqueada)
+    cells = grid.cells
+    moves = tuple(zip((1, 2, 3, 4), grid.offsets))
+    check_moves = bool(blocked_moves)
+    next_frontier = []
+    push = next_frontier.append
+    for current in frontier:
+        for code, offset in moves:
+            new = current + offset
+            if mine[new] or cells[new] == WALL:
+                continue
+            if check_moves: #Hacia atrás el movimiento real es new -> current
+                src, dst = (new, current) if backwards else (current, new)
+                bm = blocked_moves.get(src)
+                if bm is not None and dst in bm:
+                    continue
+            mine[new] = code
+            if other[new]: #Antes de cada nivel ninguna celda está en ambos lados, así
+                if stats is not None:  #que el primer encuentro ya es un camino óptimo
+                    stats.level(frontier.index(current) + 1, len(next_frontier) + 1,
+                                len(frontier) + len(next_frontier) + 1, 2 * len(mine))
+                return next_frontier, new
+            push(new)
+    if stats is not None:
+        stats.level(len(frontier), len(next_frontier), len(frontier) + len(next_frontier), 2 * len(mine))
+    return next_frontier, None
 
-    (start_row, start_column) = start#Posición de inicio
-    (goal_row, goal_column) = goal #Posición de la salida
 
-    if not(0 <= start_row < rows and 0 <= start_column < columns): # Si la posición de inicio no es válida
-        return None  #Inicio fuera de los limites
-    if not(0 <= goal_row < rows and 0 <= goal_column < columns): # Si la posición de la salida no es válida
-        return None  #Salida fuera de los limites
-    
-    if laberinth[start_row][start_column] == 1 or laberinth[goal_row][goal_column] == 1: #Si inicio o salida es una pared
-        return None  #No es una pocision valida
-    if start in blocked_cells or goal in blocked_cells: #Si inicio o salida estan bloqueados
-        return None  #No es una pocision valida
-    
-    queue = deque([start])  #Cola para BFS
-    parent: dict[tuple[int, int], Optional[tuple[int, int]]] = {start: None}  #Diccionario para rastrear el camino
+def _bidirectional_bfs_ids(grid: Grid, source, target, blocked=None, blocked_moves=None, stats=None):
+    if stats is not None:
+        stats.searches += 1
+    if source == target:
+        return [source]
+    offsets = grid.offsets
+    forward = bytearray(len(grid.cells))
+    backward = bytearray(len(grid.cells))
+    if blocked:
+        for cell in blocked:
+            forward[cell] = backward[cell] = 6
+    forward[source] = backward[target] = 5
+    front, back = [source], [target]
+
+    while front and back:
+        if len(front) <= len(back):
+            front, meet = _expand_level(grid, front, forward, backward, blocked_moves, False, stats)
+        else:
+            back, meet = _expand_level(grid, back, backward, forward, blocked_moves, True, stats)
+        if meet is not None:
+            path = _trace_path(forward, offsets, source, meet) #Mitad desde el inicio
+            current = meet
+            while current != target: #Mitad hasta la salida
+                current -= offsets[backward[current] - 1]
+                path.append(current)
+            return path
+    return None
+
+
+# ------------------------------------------------------------
+# A*: heurística Manhattan (admisible y consistente en 4 direcciones)
+# ------------------------------------------------------------
+def _astar_ids(grid: Grid, source, target, blocked=None, blocked_moves=None, stats=None):
+    if stats is not None:
+        stats.searches += 1
+    if source == target:
+        return [source]
+    cells = grid.cells
+    stride = grid.stride
+    target_row, target_column = divmod(target, stride)
+
+    came = bytearray(len(cells)) #Mismos códigos que la BFS (6 = bloqueada)
+    if blocked:
+        for cell in blocked:
+            came[cell] = 6
+    came[source] = 5
+    moves = tuple(zip((1, 2, 3, 4), grid.offsets))
+    best = {source: 0} #Mejor costo conocido (g)
+    row, column = divmod(source, stride)
+    heap = [(abs(row - target_row) + abs(column - target_column), 0, source)] #(f, -g, id): empata por el más profundo
+
+    while heap:
+        _, neg_cost, current = heappop(heap)
+        cost = -neg_cost
+        if cost != best[current]: #Entrada obsoleta
+            continue
+        if stats is not None:
+            stats.level(1, 0, len(heap) + 1, len(came) + _ENTRY_BYTES * (len(best) + len(heap)))
+        if current == target:
+            return _trace_path(came, grid.offsets, source, target)
+        bm = blocked_moves.get(current) if blocked_moves else None
+        cost += 1
+        for code, offset in moves:
+            new = current + offset
+            if cells[new] == WALL or came[new] == 6:
+                continue
+            if bm is not None and new in bm:
+                continue
+            if cost < best.get(new, cost + 1):
+                best[new] = cost
+                came[new] = code
+                if stats is not None:
+                    stats.edges += 1
+                row, column = divmod(new, stride)
+                heappush(heap, (cost + abs(row - target_row) + abs(column - target_column), -cost, new))
+    return None
+
+
+# ------------------------------------------------------------
+# Jump point search (4 direcciones): A* que solo se detiene en celdas donde
+# se puede girar, en la salida o en celdas con movimientos bloqueados.
+# ------------------------------------------------------------
+def _jump(grid: Grid, cell, offset, side_offsets, target, blocked, blocked_moves):
+    cells = grid.cells
+    side_a, side_b = side_offsets
+    while True:
+        cell += offset
+        if cells[cell] == WALL or cell in blocked: #Pasillo cortado
+            return None
+        if cell == target:
+            return cell
+        if cells[cell + side_a] != WALL or cells[cell + side_b] != WALL: #Se puede girar
+            return cell
+        if blocked_moves and cell in blocked_moves:
+            return cell
+
+
+def _jps_ids(grid: Grid, source, target, blocked=None, blocked_moves=None, stats=None):
+    if stats is not None:
+        stats.searches += 1
+    if source == target:
+        return [source]
+    stride = grid.stride
+    blocked = set(blocked) if blocked else ()
+    target_row, target_column = divmod(target, stride)
+    #Cada dirección con sus dos perpendiculares
+    sides = {-stride: (-1, 1), stride: (-1, 1), -1: (-stride, stride), 1: (-stride, stride)}
+
+    parent = {source: -1} #Punto de salto anterior
+    best = {source: 0}
+    row, column = divmod(source, stride)
+    heap = [(abs(row - target_row) + abs(column - target_column), 0, source)]
 
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)] #Arriba, Abajo, Izquierda, Derecha
+    while heap:
+        _, neg_cost, current = heappop(heap)
+        cost = -neg_cost
+        if cost != best[current]:
+            continue
+        if stats is not None:
+            stats.level(1, 0, len(heap) + 1, _ENTRY_BYTES * (len(best) + len(parent) + len(heap)))
+        if current == target:
+            jumps = []
+            while current != -1:
+                jumps.append(current)
+                current = parent[current]
+            jumps.reverse()
+            path = [source]
+            for a, b in zip(jumps, jumps[1:]): #Rellenar los tramos rectos
+                step = stride if abs(b - a) >= stride else 1
+                if b < a:
+                    step = -step
+                path.extend(range(a + step, b + step, step))
+            return path
+        bm = blocked_moves.get(current) if blocked_moves else None
+        for offset in grid.offsets:
+            if bm is not None and current + offset in bm:
+                continue
+            new = _jump(grid, current, offset, sides[offset], target, blocked, blocked_moves)
+            if new is None:
+                continue
+            new_cost = cost + abs(new - current) // abs(offset)
+            if new_cost < best.get(new, new_cost + 1):
+                best[new] = new_cost
+                parent[new] = current
+                if stats is not None:
+                    stats.edges += 1
+                row, column = divmod(new, stride)
+                heappush(heap, (new_cost + abs(row - target_row) + abs(column - target_column), -new_cost, new))
+    return None
+
+
+# ------------------------------------------------------------
+# BFS vectorizada con NumPy: expande cada nivel entero con operaciones sobre
+# arrays (frontera + desplazamientos de las cuatro direcciones) en lugar de un
+# bucle Python por celda. La búsqueda va desde la salida hacia el inicio y el
+# camino se obtiene bajando por el campo de distancias, así que coincide con
+# el de la BFS. Sin NumPy instalado se usa la BFS normal.
+# ------------------------------------------------------------
+def _numpy_bfs_ids(grid: Grid, source, target, blocked=None, blocked_moves=None, stats=None):
+    if not _numpy():
+        return _bfs_ids(grid, source, target, blocked, blocked_moves, stats=stats)
+    if stats is not None:
+        stats.searches += 1
+    if source == target:
+        return [source]
+
+    size = len(grid.cells)
+    passable = np.frombuffer(grid.cells, dtype=np.uint8) != WALL #Copia booleana (el Grid no se toca)
+    if blocked:
+        passable[np.fromiter(blocked, dtype=np.intp)] = False
+    forbidden = None
+    if blocked_moves: #Movimiento a -> b prohibido = en sentido inverso no se llega a a desde b
+        forbidden = np.fromiter((a * size + b for a, ends in blocked_moves.items() for b in ends), dtype=np.int64)
+
+    dist = np.full(size, -1, dtype=np.int32)
+    dist[target] = 0
+    offsets = np.array(grid.offsets, dtype=np.intp)
+    frontier = np.array([target], dtype=np.intp)
+    depth = 0
+    while frontier.size and dist[source] < 0: #Hasta cerrar el nivel del inicio
+        depth += 1
+        reached = (frontier[:, None] + offsets).ravel() #Vecinos de todo el nivel (el borde es pared)
+        keep = passable[reached] & (dist[reached] < 0)
+        if forbidden is not None:
+            origins = np.repeat(frontier, len(offsets))
+            keep &= ~np.isin(reached.astype(np.int64) * size + origins, forbidden)
+        reached = reached[keep]
+        #Sin ordenar: cada celda repetida guarda una marca distinta (-2 - posición)
+        #en dist y sobrevive solo la última escrita
+        marks = -2 - np.arange(reached.size, dtype=np.int32)
+        dist[reached] = marks
+        expanded = frontier.size
+        frontier = reached[dist[reached] == marks]
+        dist[frontier] = depth
+        if stats is not None:
+            stats.level(expanded, frontier.size, expanded + frontier.size, passable.nbytes + dist.nbytes)
+
+    #Descenso en Python sobre una vista del array (enteros sin crear escalares NumPy)
+    levels = memoryview(dist)
+    remaining = levels[source]
+    if remaining < 0:
+        return None  #No se encontro un camino a la salida
+    path = [source]
+    current = source
+    while remaining:
+        remaining -= 1
+        bm = blocked_moves.get(current) if blocked_moves else None
+        for offset in grid.offsets: #Primera dirección que baja un nivel: el camino de la BFS
+            new = current + offset
+            if levels[new] == remaining and (bm is None or new not in bm):
+                break
+        path.append(new)
+        current = new
+    return path
 
-    while queue: #Mientras haya celdas por explorar
-        cur_rows, cur_columns = queue.popleft() #Obtener la siguiente celda
 
-        if (cur_rows, cur_columns) == goal: #Si hemos llegado a la salida
-            #Reconstruir el camino desde inicio hasta la salida
-            path = [] #Camino encontrado
-            current = goal #Posición actual
+# ------------------------------------------------------------
+# Celdas con peso (2..8): Dijkstra y A* con cola de cubetas (Dial). Los
+# costos son enteros pequeños, así que en lugar de un heap basta un anillo
+# de listas indexado por costo (o f = costo + Manhattan). Con pesos unitarios
+# expande en el mismo orden que la BFS y devuelve el mismo camino.
+# ------------------------------------------------------------
+_RING = MAX_WEIGHT + 2  #Mayor salto de f entre una celda y su vecina (+1 por la heurística) + 1
 
-            while current is not None:#Mientras no lleguemos al inicio
-                path.append(current) #Agregar la posición al camino
-                current = parent[current] #Mover al padre
-            path.reverse() #Invertir el camino para que vaya de inicio a salida
 
-            return path  #Retornar el camino encontrado
-        
-        for dir_row, dir_column in directions: #Explorar las cuatro direcciones
-            new_row = cur_rows + dir_row #Calcular la nueva posición
-            new_column = cur_columns + dir_column #Calcular la nueva posición
-            new_pos = (new_row, new_column) #Nueva posición como tupla
+def _ids_cost(grid: Grid, path): #Costo de un camino de ids: suma del peso de cada celda en la que se entra
+    cells = grid.cells
+    weights = WEIGHTS
+    return sum(weights[cells[cell]] for cell in islice(path, 1, None))
 
-            if not (0 <= new_row < rows and 0 <= new_column < columns): #Si la nueva posición esta fuera de los limites
-                continue  #Ignorar esta posición
 
-            if laberinth[new_row][new_column] == 1: #Si la nueva posición es una pared
-                continue  #Ignorar esta posición
+def path_cost(laberinth, path): #Costo de un camino (fila, columna); sin pesos = movimientos
+    grid = as_grid(laberinth)
+    return _ids_cost(grid, grid.to_ids(path))
 
-            if new_pos in blocked_cells: #Si la nueva posición esta bloqueada
-                continue  #Ignorar esta posición
 
-            if ( (cur_rows, cur_columns), new_pos) in blocked_moves: #Si el movimiento esta bloqueado
-                continue  #Ignorar este movimiento
+def _dial_ids(grid: Grid, sources, targets, blocked, blocked_moves, heuristic, dist=None, limit=None, stats=None):
+    #Desde todos los sources a la vez hasta el primero de targets que se extrae
+    #heuristic = A* (f = costo + Manhattan; con pesos >= 1 es consistente), solo con un source y un target
+    #dist + limit = poda como en la BFS: costo + dist[celda] >= limit se descarta
+    if stats is not None:
+        stats.searches += 1
+    cells = grid.cells
+    weights = WEIGHTS
+    stride = grid.stride
+    goal = bytearray(len(cells))
+    for target in targets:
+        goal[target] = 1
+    for source in sources:
+        if goal[source]:
+            return [source]
 
-            if new_pos not in parent: #Si ya hemos visitado esta posición
-                parent[new_pos] = (cur_rows, cur_columns) #Registrar el padre
-                queue.append(new_pos) #Agregar la nueva posición a la cola
+    came = bytearray(len(cells)) #Mismos códigos que la BFS (5 = inicio, 6 = bloqueada)
+    if blocked:
+        for cell in blocked:
+            came[cell] = 6
+    done = bytearray(len(cells)) #Celdas ya extraídas (su costo es definitivo)
+    best = array("i", [-1]) * len(cells)
+    moves = tuple(zip((1, 2, 3, 4), grid.offsets))
 
+    f = 0
+    if heuristic:
+        target_row, target_column = divmod(targets[0], stride)
+        row, column = divmod(sources[0], stride)
+        f = abs(row - target_row) + abs(column - target_column)
+    ring = [[] for _ in range(_RING)] #ring[f % _RING] = celdas con ese f, en orden de llegada
+    for source in sources:
+        came[source] = 5
+        best[source] = 0
+        ring[f % _RING].append(source)
+    pending = len(ring[f % _RING])
+    while pending:
+        slot = f % _RING
+        bucket = ring[slot]
+        i = 0
+        while i < len(bucket): #La cubeta puede crecer mientras se recorre (A* con f igual)
+            current = bucket[i]
+            i += 1
+            if done[current]: #Entrada obsoleta
+                continue
+            done[current] = 1
+            if stats is not None:
+                stats.level(1, 0, pending - i + 1, 3 * len(came) + len(best) * best.itemsize)
+            if goal[current]:
+                return _trace_root(came, grid.offsets, current)
+            cost = best[current]
+            bm = blocked_moves.get(current) if blocked_moves else None
+            for code, offset in moves:
+                new = current + offset
+                value = cells[new]
+                if value == WALL or came[new] >= 5 or done[new]:
+                    continue
+                if bm is not None and new in bm:
+                    continue
+                new_cost = cost + weights[value]
+                known = best[new]
+                if 0 <= known <= new_cost:
+                    continue
+                if limit is not None and not 0 <= dist[new] < limit - new_cost: #No puede mejorar la cota
+                    continue
+                best[new] = new_cost
+                came[new] = code
+                if stats is not None:
+                    stats.edges += 1
+                if heuristic:
+                    row, column = divmod(new, stride)
+                    ring[(new_cost + abs(row - target_row) + abs(column - target_column)) % _RING].append(new)
+                else:
+                    ring[new_cost % _RING].append(new)
+                pending += 1
+        pending -= len(bucket)
+        ring[slot] = []
+        f += 1
     return None  #No se encontro un camino a la salida
 
 
+def _prefix_costs(grid: Grid, path): #costs[i] = costo de path[:i + 1]
+    cells = grid.cells
+    weights = WEIGHTS
+    costs = [0]
+    total = 0
+    for cell in islice(path, 1, None):
+        total += weights[cells[cell]]
+        costs.append(total)
+    return costs
+
+
+def _dijkstra_ids(grid: Grid, source, target, blocked=None, blocked_moves=None, dist=None, limit=None, stats=None):
+    if not blocked and not blocked_moves and dist is None:
+        return _descend_dijkstra(grid, source, (target,), stats)
+    return _dial_ids(grid, (source,), (target,), blocked, blocked_moves, False, dist, limit, stats)
+
+
+def _descend_dijkstra(grid: Grid, source, targets, stats=None):
+    #Sin bloqueos: Dijkstra inversa desde las salidas hasta fijar el costo del inicio y bajada por
+    #ese campo. Es el mismo camino que da _descend_weighted sobre el campo completo (el oficial de
+    #Yen): ante un empate de costo, la primera dirección desde el inicio, como la BFS sin pesos
+    return _descend_weighted(grid, _cost_field(grid, targets, stats, stop=source), source)
+
+
+def _weighted_astar_ids(grid: Grid, source, target, blocked=None, blocked_moves=None, stats=None):
+    return _dial_ids(grid, (source,), (target,), blocked, blocked_moves, True, stats=stats)
+
+
+def _cost_field(grid: Grid, targets, stats=None, stop=None):
+    #Dijkstra inversa desde las salidas: dist[id] = costo mínimo hasta la más cercana (-1 inalcanzable).
+    #Desde la celda b se llega hacia atrás a su vecina a pagando el peso de b.
+    #stop = celda en la que se corta: al extraerla ya es definitivo todo costo menor que el suyo
+    cells = grid.cells
+    weights = WEIGHTS
+    offsets = grid.offsets
+    dist = array("i", [-1]) * len(cells)
+    done = bytearray(len(cells))
+    if stats is not None:
+        stats.searches += 1
+    ring = [[] for _ in range(_RING)]
+    for target in targets:
+        dist[target] = 0
+        ring[0].append(target)
+    pending = len(ring[0])
+    cost = 0
+    while pending:
+        slot = cost % _RING
+        bucket = ring[slot]
+        expanded = 0
+        for current in bucket:
+            if done[current]:
+                continue
+            done[current] = 1
+            expanded += 1
+            if current == stop:
+                if stats is not None:
+                    stats.level(expanded, 0, pending, len(dist) * dist.itemsize + len(done))
+                return dist
+            new_cost = cost + weights[cells[current]]
+            for offset in offsets:
+                new = current + offset
+                if cells[new] == WALL or done[new]:
+                    continue
+                known = dist[new]
+                if 0 <= known <= new_cost:
+                    continue
+                dist[new] = new_cost
+                ring[new_cost % _RING].append(new)
+                pending += 1
+        if stats is not None:
+            stats.level(expanded, 0, pending, len(dist) * dist.itemsize + len(done))
+        pending -= len(bucket)
+        ring[slot] = []
+        cost += 1
+    return dist
+
+
+def _descend_weighted(grid: Grid, dist, source, came=None, blocked_next=None):
+    #Como _descend, pero el siguiente paso es el primer vecino con dist + peso == dist actual
+    cells = grid.cells
+    weights = WEIGHTS
+    offsets = grid.offsets
+    remaining = dist[source]
+    if remaining < 0:
+        return None
+    path = [source]
+    current = source
+    while remaining:
+        for offset in offsets:
+            new = current + offset
+            left = dist[new]
+            if left < 0 or left + weights[cells[new]] != remaining:
+                continue
+            if came is not None and came[new]:
+                continue
+            if blocked_next and current == source and new in blocked_next:
+                continue
+            break
+        else:
+            return None  #Sin continuación libre: hace falta una búsqueda completa
+        path.append(new)
+        current = new
+        remaining = left
+    return path
+
+
 # ------------------------------------------------------------
-# K caminos más cortos (Yen) usando BFS
+# Varias salidas (y varios inicios): una sola búsqueda que parte de todos los
+# inicios a la vez y se detiene en la primera salida alcanzada, la más
+# cercana, en lugar de una búsqueda por cada par inicio/salida.
+# ------------------------------------------------------------
+def _multi_ids(grid: Grid, sources, targets, blocked=None, blocked_moves=None, dist=None, limit=None, stats=None):
+    #BFS por niveles (Dijkstra con cubetas si hay celdas con peso); mismos bloqueos y poda que _bfs_ids
+    if grid.is_weighted():
+        if len(sources) == 1 and not blocked and not blocked_moves and dist is None: #Como _dijkstra_ids
+            return _descend_dijkstra(grid, sources[0], targets, stats)
+        return _dial_ids(grid, sources, targets, blocked, blocked_moves, False, dist, limit, stats)
+    if stats is not None:
+        stats.searches += 1
+    cells = grid.cells
+    goal = bytearray(len(cells))
+    for target in targets:
+        goal[target] = 1
+    came = bytearray(len(cells))
+    if blocked:
+        for cell in blocked:
+            came[cell] = 6
+    for source in sources:
+        if goal[source]:
+            return [source]
+        came[source] = 5
+    moves = tuple(zip((1, 2, 3, 4), grid.offsets))
+
+    frontier = list(sources)
+    depth = 0
+    while frontier:
+        depth += 1
+        cap = limit - depth if limit is not None else None
+        next_frontier = []
+        push = next_frontier.append
+        for current in frontier:
+            bm = blocked_moves.get(current) if blocked_moves else None
+            for code, offset in moves:
+                new = current + offset
+                if came[new] or cells[new] == WALL:
+                    continue
+                if bm is not None and new in bm:
+                    continue
+                if cap is not None and not 0 <= dist[new] < cap:
+                    continue
+                came[new] = code
+                if goal[new]:
+                    if stats is not None:
+                        stats.level(frontier.index(current) + 1, len(next_frontier) + 1,
+                                    len(frontier) + len(next_frontier) + 1, 2 * len(came))
+                    return _trace_root(came, grid.offsets, new)
+                push(new)
+        if stats is not None:
+            stats.level(len(frontier), len(next_frontier), len(frontier) + len(next_frontier), 2 * len(came))
+        frontier = next_frontier
+    return None
+
+
+def nearest_path(laberinth, starts, goals=None, goal_value=9, blocked_cells=None, blocked_moves=None, stats=None):
+    """
+    Camino más corto (de menor costo si hay celdas con peso) desde cualquiera
+    de starts hasta la salida más cercana, con una sola búsqueda. goals =
+    celdas destino; por defecto todas las celdas con goal_value (indexadas
+    una vez por versión del Grid). Retorna None si no hay camino.
+    """
+    grid = as_grid(laberinth)
+    cells = grid.cells
+    blocked_cells = set(blocked_cells or ())
+
+    def usable(positions): #Ids dentro del laberinto, sin paredes ni bloqueos
+        return [grid.cell_id(*p) for p in dict.fromkeys(map(tuple, positions))
+                if grid.in_bounds(*p) and p not in blocked_cells and cells[grid.cell_id(*p)] != WALL]
+
+    sources = usable(starts)
+    targets = grid.goal_ids(goal_value) if goals is None else usable(goals)
+    if blocked_cells and goals is None:
+        targets = [cell for cell in targets if grid.coords(cell) not in blocked_cells]
+    if not sources or not targets:
+        return None
+    blocked = grid.to_ids(p for p in blocked_cells if grid.in_bounds(*p))
+    path = _multi_ids(grid, sources, targets, blocked, _moves_to_ids(grid, blocked_moves or ()), stats=stats)
+    return grid.to_coords(path) if path is not None else None
+
+
+def _corridor_ids(grid: Grid, source, target, blocked=None, blocked_moves=None, stats=None):
+    #Búsqueda en el grafo de pasillos (maze_graph), construido una vez por versión del Grid.
+    #Con bloqueos o un destino que no es nodo del grafo (salida o cruce) se usa la búsqueda por celdas.
+    if not blocked and not blocked_moves:
+        from .maze_graph import corridor_path #Solo lo carga este motor, no el arranque
+        path = corridor_path(grid, source, (target,), stats=stats)
+        if path is not False:
+            return path
+    if grid.is_weighted():
+        return _dijkstra_ids(grid, source, target, blocked, blocked_moves, stats=stats)
+    return _bfs_ids(grid, source, target, blocked, blocked_moves, stats=stats)
+
+
+def _hpa_ids(grid: Grid, source, target, blocked=None, blocked_moves=None, stats=None):
+    #Búsqueda jerárquica exacta (maze_hpa), con el índice construido una vez por versión del Grid.
+    #Los bloqueos no entran en el grafo abstracto: con ellos se usa la búsqueda por celdas
+    if blocked or blocked_moves:
+        if grid.is_weighted():
+            return _dijkstra_ids(grid, source, target, blocked, blocked_moves, stats=stats)
+        return _bfs_ids(grid, source, target, blocked, blocked_moves, stats=stats)
+    from .maze_hpa import hierarchical_index
+    if stats is not None:
+        stats.searches += 1
+    return hierarchical_index(grid).path_ids(source, target)
+
+
+# ------------------------------------------------------------
+# Interfaz común: todos los motores reciben
+#   (grid, source, target, blocked=ids, blocked_moves={id: {ids}}, stats=None)
+# y retornan una lista de ids de costo óptimo (o None).
+#
+# En un laberinto con celdas de peso los motores de costo unitario no sirven:
+# "astar" pasa a su versión con pesos y los demás a "dijkstra" ("corridors"
+# y "hpa" ya usan los costos de los pasillos y de los bloques).
+# ------------------------------------------------------------
+SOLVERS = {
+    "bfs": _bfs_ids,
+    "bidirectional": _bidirectional_bfs_ids,
+    "astar": _astar_ids,
+    "jps": _jps_ids,
+    "numpy": _numpy_bfs_ids,
+    "dijkstra": _dijkstra_ids,
+    "corridors": _corridor_ids,
+    "hpa": _hpa_ids,
+}
+
+
+def _get_solver(algorithm, weighted=False):
+    try:
+        search = SOLVERS[algorithm]
+    except KeyError:
+        raise ValueError(f"Algoritmo desconocido: {algorithm!r} (opciones: {', '.join(SOLVERS)})") from None
+    if weighted and search is not _corridor_ids and search is not _hpa_ids:
+        return _weighted_astar_ids if search is _astar_ids else _dijkstra_ids
+    return search
+
+
+def shortest_path(laberinth, start, goal, blocked_cells=None, blocked_moves=None, algorithm="bfs", stats=None):
+    grid = as_grid(laberinth)
+    search = _get_solver(algorithm, grid.is_weighted())
+    blocked_cells = blocked_cells or set()  #Celdas bloqueadas
+    blocked_moves = blocked_moves or set()  #Movimientos bloqueados
+
+    if not grid.in_bounds(*start): # Si la posición de inicio no es válida
+        return None  #Inicio fuera de los limites
+    if not grid.in_bounds(*goal): # Si la posición de la salida no es válida
+        return None  #Salida fuera de los limites
+
+    source, target = grid.cell_id(*start), grid.cell_id(*goal)
+    if grid.cells[source] == WALL or grid.cells[target] == WALL: #Si inicio o salida es una pared
+        return None  #No es una pocision valida
+    if start in blocked_cells or goal in blocked_cells: #Si inicio o salida estan bloqueados
+        return None  #No es una pocision valida
+
+    blocked = grid.to_ids(p for p in blocked_cells if grid.in_bounds(*p))
+    path = search(grid, source, target, blocked, _moves_to_ids(grid, blocked_moves), stats=stats)
+    if path is None:
+        return None  #No se encontro un camino a la salida
+    return grid.to_coords(path)  #Retornar el camino encontrado
+
+
+def bfs_shortest_paths(laberinth, start, goal, blocked_cells=None, blocked_moves=None, stats=None):
+    return shortest_path(laberinth, start, goal, blocked_cells, blocked_moves, algorithm="bfs", stats=stats)
+
+
+# ------------------------------------------------------------
+# K caminos más cortos (Yen); la búsqueda interna es cualquier motor de SOLVERS
 # paths[0] = oficial (más corto)
 # paths[1:] = alternativas siguientes (si existen)
 # ------------------------------------------------------------
-def k_shortest_paths(laberinth, start_row, start_column, k=4, goal_value=9):
-    #Usar BFS para encontrar los k caminos más cortos a la salida
-    start = (start_row, start_column)
-    goal = find_goal(laberinth, goal_value)#Buscar la posición de la salida
+def iter_shortest_paths(laberinth, start, goal_value=9, limit=None, algorithm="bfs", index=None, stats=None,
+                        all_goals=False):
+    """
+    Genera los caminos a la salida en orden no decreciente de costo (Yen;
+    sin celdas de peso, costo = movimientos), calculando cada alternativa solo cuando se pide con next().
+    El estado (caminos aceptados, heap de candidatos, distancias) se conserva
+    entre llamadas. limit = máximo de caminos que se van a pedir: permite
+    podar candidatos que nunca llegarían a salir; None = sin límite.
+    algorithm = motor de SOLVERS para el camino oficial y los desvíos
+    ("corridors" = Yen sobre el grafo de pasillos, mismos caminos que "bfs").
+    index = MazeIndex del mismo laberinto: reutiliza su campo de distancias.
+    stats = colector opcional: suma las búsquedas internas y el tiempo de cada desvío.
+    all_goals = los caminos terminan en cualquier salida (la primera que alcanzan),
+    no solo en la primera en orden fila-columna.
+    """
+    grid = as_grid(laberinth) #Conversión única: las búsquedas internas usan ids
+    weighted = grid.is_weighted()
+    search = _get_solver(algorithm, weighted)
+    if index is not None and (index.grid is not grid or index.goal_value != goal_value
+                              or index.all_goals != all_goals):
+        raise ValueError("El índice no corresponde a este laberinto / valor de salida.")
+    if not grid.in_bounds(*start):
+        return  #Inicio fuera de los limites
+    if index is not None:
+        goal, dist = index.field() #Salida y distancias ya calculadas
+    else:
+        goal, dist = _find_goal_id(grid, goal_value), None #Buscar la posición de la salida
     if goal is None:
-        return []  #No hay salida en el laberinto
+        return  #No hay salida en el laberinto
+    targets = grid.goal_ids(goal_value) if all_goals else (goal,)
+    source = grid.cell_id(*start)
+    if grid.cells[source] == WALL:
+        return  #El inicio es una pared
+
+    if search is _corridor_ids: #Yen sobre el grafo de pasillos: desvíos solo en los cruces
+        from .maze_graph import iter_corridor_paths
+        paths = iter_corridor_paths(grid, source, targets, goal_value, limit, stats)
+        if paths is not None:
+            for path in paths:
+                yield grid.to_coords(path)
+            return
+        search = _dijkstra_ids if weighted else _bfs_ids #Inicio en un ciclo sin cruces: por celdas
 
-    first_path = bfs_shortest_paths(laberinth, start, goal) #Encontrar el primer camino más corto
+    if limit is not None and limit <= 1 and dist is None: #Solo el oficial: una búsqueda que se detiene al llegar a la salida
+        if all_goals:
+            first_path = _multi_ids(grid, (source,), targets, stats=stats)
+        else:
+            first_path = search(grid, source, goal, stats=stats)
+        if first_path is not None:
+            yield grid.to_coords(first_path)
+        return
+
+    #Distancias (o costos) inversas desde la salida: cota inferior para podar
+    #desviaciones y atajo para las que pueden seguir directamente el camino más corto
+    if dist is None:
+        dist = _cost_field(grid, targets, stats) if weighted else _distance_field(grid, targets, stats)
+    descend = _descend_weighted if weighted else _descend
+    if all_goals or search is _bfs_ids or search is _dijkstra_ids: #La bajada por el campo da el camino de la BFS / Dijkstra
+        first_path = descend(grid, dist, source) #Encontrar el primer camino más corto
+    else:
+        first_path = search(grid, source, goal, stats=stats)
     if first_path is None:
-        return []  #No hay camino a la salida
-    
-    A = [first_path]  #Lista de los k caminos más cortos encontrados
-    B = []  #Lista de caminos candidatos
-    seen_candidates = set()  #Conjunto para evitar caminos duplicados
+        return  #No hay camino a la salida
+    yield grid.to_coords(first_path)
 
-    def cost(path): 
-        return len(path) - 1  #Movimientos
+    A = [first_path]  #Lista de los caminos más cortos ya entregados
+    B = []  #Heap de candidatos (costo, orden de llegada, camino)
+    order = count()  #Desempate por orden de llegada, igual que el sort estable anterior
+    seen_candidates = set()  #Conjunto para evitar caminos duplicados
+    came = bytearray(len(grid.cells))  #Buffer de búsqueda reutilizado; 6 = celda de la raíz
 
-    for _ in range(1, k): #Encontrar los posibles caminos hasta k
+    while limit is None or len(A) < limit: #Encontrar los posibles caminos hasta el límite
+        #Si ya hay tantos candidatos como caminos faltan, uno nuevo con costo >= al
+        #último de ellos nunca llegaría a salir del heap: es la cota de poda.
+        #cheapest = heap máximo (costos negados) con los `remaining` menores costos
+        remaining = limit - len(A) if limit is not None else None
+        cheapest = [-entry[0] for entry in nsmallest(remaining, B)] if remaining is not None else []
+        heapify(cheapest)
+        bound = -cheapest[0] if remaining is not None and len(cheapest) == remaining else None
         last_path = A[-1]#Obtener el último camino encontrado
+        sharing = A  #Caminos aceptados que comparten la raíz actual
+        root_costs = _prefix_costs(grid, last_path) if weighted else range(len(last_path)) #Costo de cada raíz
         for i in range(len(last_path) -1): #Recorremos la lista de caminos
             spur_node = last_path[i] #Nodo de desviación
-            root_path = last_path[:i + 1] #Camino original hasta el nodo de desviación
-
-            blocked_cells = set(root_path[:-1]) #Eliminar los nodos del camino original excepto el último
-            blocked_moves = set() #Conjunto para almacenar caminos eliminados
+            if i:
+                came[last_path[i - 1]] = 6 #La raíz crece una celda: bloquearla
+            sharing = [path for path in sharing if path[i] == spur_node]
 
-            for path in A:
-                if len(path) > i and path[:i+1] == root_path: #
-                    blocked_moves.add((path[i], path[i + 1])) #Eliminar el siguiente nodo del camino original
+            root_cost = root_costs[i]
+            if bound is not None and root_cost + dist[spur_node] >= bound: #Ni el mejor desvío mejora la cota
+                if stats is not None:
+                    stats.pruned += 1
+                continue
 
-            spur_path = bfs_shortest_paths(laberinth, start=spur_node, goal=goal, blocked_cells=blocked_cells, blocked_moves=blocked_moves)
-            #Encontrar el camino desde el nodo de desviación a la salida
+            if stats is not None:
+                started = perf_counter()
+            blocked_next = {path[i + 1] for path in sharing} #Eliminar el siguiente nodo de los caminos con esta raíz
+            spur_path = descend(grid, dist, spur_node, came, blocked_next)
+            method = "descend"
+            if spur_path is None and all_goals: #Hacia cualquier salida: búsqueda multi-destino acotada
+                method = "multi"
+                spur_path = _multi_ids(
+                    grid, (spur_node,), targets,
+                    blocked=last_path[:i],
+                    blocked_moves={spur_node: blocked_next},
+                    dist=dist if bound is not None else None,
+                    limit=bound - root_cost if bound is not None else None,
+                    stats=stats,
+                )
+            elif spur_path is None and search is _dijkstra_ids: #Con pesos: Dijkstra acotada
+                method = "dijkstra"
+                spur_path = _dijkstra_ids(
+                    grid, spur_node, goal,
+                    blocked=last_path[:i],
+                    blocked_moves={spur_node: blocked_next},
+                    dist=dist if bound is not None else None,
+                    limit=bound - root_cost if bound is not None else None,
+                    stats=stats,
+                )
+            elif spur_path is None and search is not _bfs_ids: #Desvío con el motor elegido
+                method = algorithm
+                spur_path = search(grid, spur_node, goal, blocked=last_path[:i], blocked_moves={spur_node: blocked_next},
+                                   stats=stats)
+            elif spur_path is None: #El camino más corto directo está bloqueado: BFS acotada
+                method = "bfs"
+                spur_path = _bfs_ids(
+                    grid, spur_node, goal,
+                    blocked_moves={spur_node: blocked_next},
+                    dist=dist if bound is not None else None,
+                    limit=bound - root_cost if bound is not None else None,
+                    came=came,
+                    stats=stats,
+                )
+            if stats is not None:
+                stats.spur(len(A), i, perf_counter() - started, method, spur_path is not None)
             if spur_path is None: #Si no hay camino desde el nodo de desviación
                 continue  #Ignorar este camino
 
-            total_path = root_path + spur_path[1:] #Combinar el camino original con el nuevo camino
+            total_path = last_path[:i] + spur_path #Combinar el camino original con el nuevo camino
             key = tuple(total_path) #Clave única para el camino
 
             if key in seen_candidates: #Si el camino si ha sido visto antes
                 continue  #Ignorar este camino
             seen_candidates.add(key)  #Marcar el camino como visto
-            B.append((cost(total_path), total_path))  #Agregar el camino candidato a la lista de candidatos
+            cost = _ids_cost(grid, total_path) if weighted else len(total_path) - 1
+            heappush(B, (cost, next(order), total_path))  #Agregar el camino candidato al heap
+            if remaining is not None: #La cota se ajusta en cuanto llegan candidatos
+                if len(cheapest) < remaining:
+                    heappush(cheapest, -cost)
+                elif cost < -cheapest[0]:
+                    heapreplace(cheapest, -cost)
+                if len(cheapest) == remaining:
+                    bound = -cheapest[0]
+
+        for cell in last_path: #Liberar la raíz bloqueada
+            came[cell] = 0
         if not B: #Si no hay caminos candidatos
-            break  #Salir del bucle
-        B.sort(key=lambda x: x[0])  #Ordenar los caminos candidatos por costo
-        _, best_path = B.pop(0)  #Obtener el camino candidato con el menor costo
+            return  #No hay más caminos
+        best_path = heappop(B)[2]  #Candidato de menor costo
         A.append(best_path)  #Agregar el mejor camino a la lista de caminos encontrados
+        yield grid.to_coords(best_path)
 
-    return A  #Retornar los k caminos más cortos encontrados
 
+def k_shortest_paths(laberinth, start_row, start_column, k=4, goal_value=9, algorithm="bfs", index=None, stats=None,
+                     all_goals=False):
+    #Los k primeros caminos del generador (como antes, siempre al menos el oficial)
+    k = max(k, 1)
+    paths = iter_shortest_paths(laberinth, (start_row, start_column), goal_value, limit=k, algorithm=algorithm,
+                                index=index, stats=stats, all_goals=all_goals)
+    return list(islice(paths, k))
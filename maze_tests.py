@@ -3,134 +3,365 @@
 # ============================================================
 
 from __future__ import annotations
-from typing import Optional
-from .maze_solver import find_goal, bfs_shortest_paths, solve_puzzle_dfs, k_shortest_paths
+
+import argparse
+import os
+import random
+import sys
+from itertools import chain
+from typing import Iterable, Optional, Union
+
+from .maze_grid import WALL, WEIGHTS, Grid, as_grid
+from .maze_solver import (SOLVERS, _numpy, find_goal, find_goals, bfs_shortest_paths, nearest_path,
+                          solve_puzzle_dfs, k_shortest_paths, path_cost, shortest_path)
+
+#Celdas (sumando todos los caminos) a partir de las que conviene importar
+#NumPy: por debajo, el recorrido en Python tarda menos que el import (~90 ms)
+_NUMPY_CELLS = 100_000
+
+
+# ------------------------------------------------------------
+# Validación de caminos ya calculados. Con NumPy todos los caminos se
+# aplanan en un solo array y cada comprobación (límites, paredes,
+# adyacencia, celdas repetidas, costo) es una operación sobre el array;
+# sin NumPy, el mismo recorrido en Python.
+# ------------------------------------------------------------
+def _inspect_numpy(grid: Grid, paths: list[list[tuple[int, int]]]):
+    np = _numpy()
+    lengths = np.fromiter(map(len, paths), dtype=np.int64, count=len(paths))
+    total = int(lengths.sum())
+    flat = np.fromiter(chain.from_iterable(chain.from_iterable(paths)), dtype=np.int64, count=2 * total)
+    rows, cols = flat[0::2], flat[1::2]
+    inside = (rows >= 0) & (rows < grid.rows) & (cols >= 0) & (cols < grid.cols)
+    ids = np.where(inside, (rows + 1) * grid.stride + cols + 1, 0) #Fuera de límites -> borde (pared)
+    values = np.frombuffer(grid.cells, dtype=np.uint8)[ids]
+    ends = np.cumsum(lengths)
+    begins = ends - lengths
+
+    def per_path(flags):  #Cuántos True hay en el tramo de cada camino
+        prefix = np.concatenate(([0], np.cumsum(flags)))
+        return prefix[ends] - prefix[begins]
+
+    walls = per_path(values == WALL)
+    jumps = np.abs(np.diff(rows)) + np.abs(np.diff(cols)) != 1
+    jumps[ends[:-1] - 1] = False  #El paso entre el final de un camino y el inicio del siguiente no cuenta
+    bad_steps = per_path(np.append(jumps, False))
+    weights = np.frombuffer(WEIGHTS, dtype=np.uint8)[values].astype(np.int64)
+    prefix = np.concatenate(([0], np.cumsum(weights)))
+    costs = prefix[ends] - prefix[np.minimum(begins + 1, ends)] #Sin contar la celda inicial
+
+    #Celdas repetidas dentro de un camino: clave (camino, id) ordenada, duplicados contiguos
+    owner = np.repeat(np.arange(len(paths), dtype=np.int64), lengths)
+    keys = np.sort(owner * len(grid.cells) + ids)
+    repeated = np.zeros(len(paths), dtype=bool)
+    repeated[(keys[1:][keys[1:] == keys[:-1]]) // len(grid.cells)] = True
+
+    ids32 = ids.astype(np.int32)
+    signatures = [ids32[b:e].tobytes() for b, e in zip(begins.tolist(), ends.tolist())]
+    return ((walls == 0).tolist(), (bad_steps == 0).tolist(), (~repeated).tolist(), costs.tolist(), signatures)
+
+
+def _inspect_python(grid: Grid, paths: list[list[tuple[int, int]]]):
+    rows, cols, cells = grid.rows, grid.cols, grid.cells
+    free, adjacent, simple, costs, signatures = [], [], [], [], []
+    for path in paths:
+        inside = all(0 <= r < rows and 0 <= c < cols for r, c in path)
+        ids = grid.to_ids(path) if inside else []
+        free.append(inside and all(cells[cell] != WALL for cell in ids))
+        adjacent.append(all(abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 for a, b in zip(path, path[1:])))
+        simple.append(len(set(path)) == len(path))
+        costs.append(sum(WEIGHTS[cells[cell]] for cell in ids[1:]))
+        signatures.append(tuple(path))
+    return free, adjacent, simple, costs, signatures
+
+
+def validate_paths(
+    laberinth: Union[Grid, list[list[int]]],
+    paths: list[list[tuple[int, int]]],
+    start: tuple[int, int],
+    goals: Iterable[tuple[int, int]],
+) -> list[str]:
+    """
+    Comprueba caminos ya calculados (p. ej. los que acaba de imprimir main)
+    sin volver a resolver: cada uno empieza en start, termina en una salida,
+    no sale del laberinto ni pisa paredes, avanza de a una celda y no repite
+    celdas; además no hay duplicados y el costo es no decreciente.
+    Retorna la lista de fallos (vacía = todo bien).
+    """
+    grid = as_grid(laberinth)
+    goals = set(goals)
+    failures = []
+    if any(not path for path in paths):
+        return ["hay un camino vacío"]
+    if not paths:
+        return failures
+    vectorize = "numpy" in sys.modules or sum(map(len, paths)) >= _NUMPY_CELLS #Ya importado: siempre conviene
+    inspect = _inspect_numpy if vectorize and _numpy() else _inspect_python
+    free, adjacent, simple, costs, signatures = inspect(grid, paths)
+    for idx, path in enumerate(paths):
+        if path[0] != start or path[-1] not in goals or not free[idx] or not adjacent[idx] or not simple[idx]:
+            failures.append(f"el camino #{idx} no es válido")
+            break
+    if len(set(signatures)) != len(signatures):
+        failures.append("hay caminos duplicados en k_shortest_paths")
+    if any(costs[i] > costs[i + 1] for i in range(len(costs) - 1)):
+        failures.append("los caminos no están ordenados por costo (ascendente)")
+    return failures
 
 
 def run_sanity_tests(
-    laberinth: list[list[int]],
+    laberinth: Union[Grid, list[list[int]]],
     start: tuple[int, int],
     k: int = 4,
     goal_value: int = 9,
-    verbose: bool = True
+    verbose: bool = True,
+    algorithm: str = "bfs",
+    all_goals: bool = False,
+    paths: Optional[list[list[tuple[int, int]]]] = None,
 ) -> bool:
     """
     Ejecuta tests automáticos para validar:
       1) BFS encuentra camino más corto o igual que DFS (si ambos existen)
       2) k_shortest_paths devuelve caminos:
          - únicos
-         - ordenados por movimientos (no-decreciente)
-         - válidos (adyacencia, dentro de límites, no atraviesan paredes)
+         - ordenados por costo (no-decreciente; sin celdas de peso = movimientos)
+         - válidos (adyacencia, dentro de límites, no atraviesan paredes, sin celdas repetidas)
          - terminan en la salida
-    Requiere que existan:
-      - find_goal
-      - bfs_shortest_path
-      - solve_puzzle_dfs
-      - k_shortest_paths
+    algorithm = motor usado por k_shortest_paths (se compara contra BFS).
+    all_goals = los caminos pueden terminar en cualquier salida (se compara contra nearest_path).
+    paths = caminos ya calculados (los de main): se validan tal cual, sin
+    recalcular k_shortest_paths ni el DFS; solo se busca una vez el óptimo.
     """
+    laberinth = as_grid(laberinth) #Conversión única; todos los solvers reciben el mismo Grid
     goal = find_goal(laberinth, goal_value) #Encuentra la salida (goal = 9)
     if goal is None:
         if verbose:
             print("[TEST] Falló: no existe salida (9) en el laberinto.")
         return False
 
-    # ---- Helpers ----
-    rows, cols = len(laberinth), len(laberinth[0])
-
-    def is_valid_cell(pos: tuple[int, int]) -> bool:
-        r, c = pos
-        return 0 <= r < rows and 0 <= c < cols and laberinth[r][c] != 1 #Valida que la celda existe dentro de la matriz y que no es pared
-
-    def is_adjacent(a: tuple[int, int], b: tuple[int, int]) -> bool:
-        return abs(a[0] - b[0]) + abs(a[1] - b[1]) == 1 #Manhattan distance = 1 (puedes moverte 1 paso o celda en vertical/horizontal.)
-                                                        #No se permiten movimientos diagonales ni saltos
-
-    # ---- Validación de caminos ----
-    #Confirma que un camino es válido
-    def validate_path(path: list[tuple[int, int]]) -> bool:
-        if not path:
-            return False #No vacio
-        if path[0] != start:
-            return False #El camino comienza en el inicio
-        if path[-1] != goal:
-            return False #El camino no termina en la salida
-        
-        for p in path: #Cada posicion es valida (no pared, dentro de limites)
-            if not is_valid_cell(p):
-                return False
-            
-        for x, y in zip(path, path[1:]): #Cada paso es adyacente al siguiente
-            if not is_adjacent(x, y):
-                return False
-        return True
-
-    ok = True
+    goals = set(find_goals(laberinth, goal_value)) if all_goals else {goal} #Salidas válidas para terminar
+    failures = []
 
     # ---- 1) BFS vs DFS ----
-    path_bfs = bfs_shortest_paths(laberinth, start, goal)
-    path_dfs = solve_puzzle_dfs(laberinth, start[0], start[1])
-
-    if path_bfs is not None: #Si BFS encontro un camino, validarlo
-        if not validate_path(path_bfs):
-            ok = False
-            if verbose:
-                print("[TEST] Falló: el camino BFS no es válido.")
-    if path_dfs is not None: #Si DFS encontro un camino, validarlo
-        if not validate_path(path_dfs):
-            ok = False
-            if verbose:
-                print("[TEST] Falló: el camino DFS no es válido.")
-
-    if path_bfs is not None and path_dfs is not None: #Verificacion "optima": BFS no puede ser peor que DFS
-        if len(path_bfs) > len(path_dfs):
-            ok = False
-            if verbose:
-                print("[TEST] Falló: BFS dio un camino MÁS largo que DFS (no debería).")
+    if all_goals:
+        path_bfs = nearest_path(laberinth, [start], goal_value=goal_value)
+    else:
+        path_bfs = bfs_shortest_paths(laberinth, start, goal)
+    if path_bfs is not None and validate_paths(laberinth, [path_bfs], start, goals): #Validar el camino BFS
+        failures.append("el camino BFS no es válido")
+
+    if paths is None: #Modo completo: DFS de referencia y k_shortest_paths desde cero
+        path_dfs = solve_puzzle_dfs(laberinth, start[0], start[1])
+        if path_dfs is not None and validate_paths(laberinth, [path_dfs], start, goals):
+            failures.append("el camino DFS no es válido")
+        if path_bfs is not None and path_dfs is not None: #Verificacion "optima": BFS no puede ser peor que DFS
+            if path_cost(laberinth, path_bfs) > path_cost(laberinth, path_dfs):
+                failures.append("BFS dio un camino MÁS costoso que DFS (no debería)")
+        paths = k_shortest_paths(laberinth, start[0], start[1], k=k, goal_value=goal_value, algorithm=algorithm,
+                                 all_goals=all_goals)
 
     # ---- 2) K shortest paths ----
-    paths = k_shortest_paths(laberinth, start[0], start[1], k=k, goal_value=goal_value)
     if not paths:
         # si BFS no encontró nada, esto es aceptable; si BFS sí, entonces es fallo
         if path_bfs is not None:
-            ok = False
-            if verbose:
-                print("[TEST] Falló: k_shortest_paths devolvió vacío pero BFS sí encontró camino.")
+            failures.append("k_shortest_paths devolvió vacío pero BFS sí encontró camino")
     else:
-        # 2a) Unicidad sin duplicados
-        #Convierte cada camino en una tupla (inmutable) para poder almacenarlo en un conjunto/set
-        seen = set()
-        for p in paths:
-            t = tuple(p)
-            if t in seen:
-                ok = False
-                if verbose:
-                    print("[TEST] Falló: hay caminos duplicados en k_shortest_paths.")
-                break
-            seen.add(t)
-
-        # 2b) Orden por movimientos (ascendente)
-        lens = [len(p) - 1 for p in paths]
-        if any(lens[i] > lens[i+1] for i in range(len(lens)-1)):
-            ok = False
-            if verbose:
-                print("[TEST] Falló: los caminos no están ordenados por movimientos (ascendente).")
-
-        # 2c) Validez individual de cada camino
-        for idx, p in enumerate(paths):
-            if not validate_path(p):
-                ok = False
-                if verbose:
-                    print(f"[TEST] Falló: el camino #{idx} no es válido.")
-                break
-
-        # 2d) El primero debe ser el mismo largo que BFS (óptimo)
-        if path_bfs is not None:
-            if (len(paths[0]) != len(path_bfs)):
-                ok = False
-                if verbose:
-                    print("[TEST] Falló: paths[0] no coincide en longitud con el BFS (óptimo).")
+        failures.extend(validate_paths(laberinth, paths, start, goals))
+        # El primero debe ser el mismo largo que BFS (óptimo)
+        if path_bfs is not None and path_cost(laberinth, paths[0]) != path_cost(laberinth, path_bfs):
+            failures.append("paths[0] no coincide en costo con el BFS (óptimo)")
 
     if verbose:
-        print("[TEST] Resultado:", "OK" if ok else "FALLÓ")
+        for failure in failures:
+            print(f"[TEST] Falló: {failure}.")
+        print("[TEST] Resultado:", "OK" if not failures else "FALLÓ")
+
+    return not failures
+
+
+# ------------------------------------------------------------
+# Pruebas de propiedades: miles de laberintos generados (todos los
+# generadores, con ciclos, pesos y salidas extra), cada uno resuelto con
+# todos los motores y comparado entre sí. Cada caso sale de una semilla, así
+# que un fallo se reproduce con --seed N --mazes 1.
+#
+#   python -m laberinth_proyect.maze_tests --mazes 2000 --workers 4
+# ------------------------------------------------------------
+_EXACT = ("bfs", "numpy", "corridors")  #Motores que devuelven exactamente el camino de la BFS (sin pesos)
+
+
+def _random_case(seed: int, max_size: int):
+    #Laberinto, inicio y semilla derivados solo de la semilla del caso
+    from .maze_gen import GENERATORS, generate
+    rnd = random.Random(seed)
+    grid = generate(rnd.randint(1, max_size), rnd.randint(1, max_size), algorithm=rnd.choice(sorted(GENERATORS)),
+                    seed=seed, braid_fraction=rnd.choice((0.0, 0.0, 0.1, 0.3)),
+                    terrain_fraction=rnd.choice((0.0, 0.0, 0.0, 0.3)))
+    free = [grid.coords(cell) for cell in range(len(grid.cells)) if grid.cells[cell] == 0]
+    for r, c in rnd.sample(free, min(len(free) // 8, rnd.choice((0, 0, 1, 3)))): #Salidas extra
+        grid.set(r, c, 9)
+    cells = [grid.coords(cell) for cell in range(len(grid.cells))
+             if grid.cells[cell] != WALL and grid.in_bounds(*grid.coords(cell))]
+    return grid, (rnd.choice(cells) if cells else None), rnd
+
+
+def check_case(seed: int, max_size: int = 24, k: int = 8) -> list[str]:
+    #Propiedades de un laberinto generado; retorna los fallos con la semilla para reproducirlos
+    from .maze_index import MazeIndex
+    from .maze_session import MazeSession
+    grid, start, rnd = _random_case(seed, max_size)
+    failures = []
+    goal = find_goal(grid)
+    if goal is None or start is None:
+        return failures
+    goals = set(find_goals(grid))
+    weighted = grid.is_weighted()
+
+    def fail(message):
+        failures.append(f"semilla {seed}: {message}")
+
+    # ---- Un camino: todos los motores, con y sin bloqueos ----
+    free = [p for p in (grid.coords(cell) for cell in range(len(grid.cells)) if grid.cells[cell] == 0)
+            if p != start]
+    blocked = set(rnd.sample(free, min(len(free), 2)))
+    for blocked_cells in (None, blocked):
+        reference = shortest_path(grid, start, goal, blocked_cells)
+        for name in SOLVERS:
+            path = shortest_path(grid, start, goal, blocked_cells, algorithm=name)
+            if (path is None) != (reference is None):
+                fail(f"{name} {'no ' if path is None else ''}encontró camino y bfs {'sí' if path is None else 'no'}")
+            elif path is not None:
+                problems = validate_paths(grid, [path], start, {goal})
+                if problems or (blocked_cells and blocked_cells.intersection(path)):
+                    fail(f"{name}: camino inválido {problems}")
+                elif path_cost(grid, path) != path_cost(grid, reference):
+                    fail(f"{name}: costo {path_cost(grid, path)} != bfs {path_cost(grid, reference)}")
+                elif not weighted and name in _EXACT and path != reference:
+                    fail(f"{name}: camino distinto del de bfs")
+
+    # ---- K caminos: mismos costos con cualquier motor ----
+    for all_goals in (False, True):
+        targets = goals if all_goals else {goal}
+        reference = k_shortest_paths(grid, *start, k=k, all_goals=all_goals)
+        expected = [path_cost(grid, path) for path in reference]
+        problems = validate_paths(grid, reference, start, targets)
+        if problems:
+            fail(f"k_shortest_paths bfs (all_goals={all_goals}): {problems}")
+        official = nearest_path(grid, [start]) if all_goals else shortest_path(grid, start, goal)
+        if reference and reference[0] != official: #Mismo desempate que la búsqueda de un camino
+            fail(f"k_shortest_paths (all_goals={all_goals}): el primero no es el de "
+                 f"{'nearest_path' if all_goals else 'shortest_path'}")
+        for name in SOLVERS:
+            paths = k_shortest_paths(grid, *start, k=k, algorithm=name, all_goals=all_goals)
+            problems = validate_paths(grid, paths, start, targets)
+            if problems:
+                fail(f"k_shortest_paths {name} (all_goals={all_goals}): {problems}")
+            elif [path_cost(grid, path) for path in paths] != expected:
+                fail(f"k_shortest_paths {name} (all_goals={all_goals}): costos distintos de bfs")
+            elif name == "corridors" and not weighted and paths != reference:
+                fail(f"k_shortest_paths corridors (all_goals={all_goals}): caminos distintos de bfs")
+        if all_goals:
+            nearest = nearest_path(grid, [start])
+            if (nearest is None) != (not reference):
+                fail("nearest_path no coincide con k_shortest_paths(all_goals)")
+            elif nearest is not None and path_cost(grid, nearest) != expected[0]:
+                fail("nearest_path no es la salida más cercana")
+
+    # ---- HPA con bloques chicos: el laberinto ocupa varios bloques (el motor "hpa" usa 32) ----
+    from .maze_hpa import HierarchicalIndex
+    cluster_size = rnd.randint(2, 8)
+    exact = HierarchicalIndex(grid, cluster_size=cluster_size, workers=1)
+    approx = HierarchicalIndex(grid, cluster_size=cluster_size, exact=False, workers=1)
+    free_cells = [grid.coords(cell) for cell in range(len(grid.cells))
+                 if grid.cells[cell] != WALL and grid.in_bounds(*grid.coords(cell))]
+    pairs = [(start, goal)] + [tuple(rnd.sample(free_cells, 2)) for _ in range(3) if len(free_cells) >= 2]
+    for a, b in pairs:
+        reference = shortest_path(grid, a, b)
+        expected_cost = path_cost(grid, reference) if reference is not None else None
+        for index in (exact, approx):
+            label = f"HierarchicalIndex(bloque={cluster_size}, exact={index.exact}) {a}->{b}"
+            path = index.path(a, b)
+            if (path is None) != (reference is None):
+                fail(f"{label}: {'no ' if path is None else ''}encontró camino y bfs {'sí' if path is None else 'no'}")
+            elif path is not None:
+                problems = validate_paths(grid, [path], a, {b})
+                cost = path_cost(grid, path)
+                if problems:
+                    fail(f"{label}: camino inválido {problems}")
+                elif cost < expected_cost or (index.exact and cost != expected_cost):
+                    fail(f"{label}: costo {cost} != bfs {expected_cost}")
+                elif index.exact and index.distance(a, b) != expected_cost:
+                    fail(f"{label}: distance {index.distance(a, b)} != bfs {expected_cost}")
+
+    # ---- Índice y sesión incremental contra una búsqueda nueva ----
+    official = shortest_path(grid, start, goal)
+    distance = MazeIndex(grid).distance(start)
+    if distance != (path_cost(grid, official) if official is not None else None):
+        fail(f"MazeIndex.distance = {distance}")
+    session = MazeSession(grid.to_rows(), start)
+    cells = [grid.coords(cell) for cell in range(len(grid.cells))
+             if grid.cells[cell] in (0, WALL) and grid.in_bounds(*grid.coords(cell)) and grid.coords(cell) != start]
+    for r, c in rnd.sample(cells, min(len(cells), 4)):
+        if session.grid[r][c] == WALL:
+            session.open_cell(r, c)
+        else:
+            session.close_cell(r, c)
+        fresh = shortest_path(session.grid, start, goal)
+        expected_cost = path_cost(session.grid, fresh) if fresh is not None else None
+        if session.cost() != expected_cost:
+            fail(f"MazeSession tras editar ({r}, {c}): costo {session.cost()} != {expected_cost}")
+            break
+    return failures
+
+
+def _check_chunk(seeds: list[int], max_size: int, k: int) -> list[str]:
+    failures = []
+    for seed in seeds:
+        try:
+            failures.extend(check_case(seed, max_size, k))
+        except Exception as exc: #Una excepción también es un fallo del caso
+            failures.append(f"semilla {seed}: {type(exc).__name__}: {exc}")
+    return failures
+
+
+def run_property_tests(mazes: int = 1000, seed: int = 0, workers: Optional[int] = None, max_size: int = 24,
+                       k: int = 8, chunksize: int = 25, verbose: bool = True) -> list[str]:
+    """
+    Ejecuta check_case sobre las semillas seed .. seed + mazes - 1, repartidas
+    en un pool de procesos (workers <= 1 = en este proceso). Retorna los fallos.
+    """
+    seeds = list(range(seed, seed + mazes))
+    chunks = [seeds[i:i + chunksize] for i in range(0, len(seeds), chunksize)]
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    failures = []
+    if workers <= 1:
+        results = (_check_chunk(chunk, max_size, k) for chunk in chunks)
+        for result in results:
+            failures.extend(result)
+    else:
+        from concurrent.futures import ProcessPoolExecutor #Solo aquí: main importa este módulo para validar
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for result in pool.map(_check_chunk, chunks, [max_size] * len(chunks), [k] * len(chunks)):
+                failures.extend(result)
+    if verbose:
+        for failure in failures:
+            print(f"[TEST] Falló: {failure}")
+        print(f"[TEST] {mazes} laberintos, {len(failures)} fallos:", "OK" if not failures else "FALLÓ")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Pruebas de propiedades de todos los motores sobre laberintos generados.")
+    parser.add_argument("--mazes", type=int, default=1000, help="Laberintos a generar (default: 1000).")
+    parser.add_argument("--seed", type=int, default=0, help="Primera semilla (default: 0).")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Procesos (default: todos los núcleos; 1 = sin pool).")
+    parser.add_argument("--max-size", type=int, default=24, help="Filas/columnas máximas (default: 24).")
+    parser.add_argument("--k", type=int, default=8, help="Caminos por consulta de k-shortest (default: 8).")
+    args = parser.parse_args()
+    failures = run_property_tests(args.mazes, args.seed, args.workers, args.max_size, args.k)
+    return 1 if failures else 0
+
 
-    return ok
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,153 +1,176 @@
 from __future__ import annotations
 
+import json
+import math
 from time import perf_counter
-from collections import deque
-from typing import Optional
-
-from .maze_solver import find_goal, solve_puzzle_dfs, bfs_shortest_paths, k_shortest_paths
-
-
-def _bfs_count_nodes(
-    laberinth: list[list[int]],
-    start: tuple[int, int],
-    goal: tuple[int, int],
-) -> tuple[Optional[list[tuple[int, int]]], int]:
-    rows, cols = len(laberinth), len(laberinth[0])
-    sr, sc = start
-    gr, gc = goal
-
-    if not (0 <= sr < rows and 0 <= sc < cols):
-        return None, 0
-    if not (0 <= gr < rows and 0 <= gc < cols):
-        return None, 0
-    if laberinth[sr][sc] == 1 or laberinth[gr][gc] == 1:
-        return None, 0
-
-    q = deque([start])
-    parent: dict[tuple[int, int], Optional[tuple[int, int]]] = {start: None}
-    explored = 0
-    directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
-
-    while q:
-        r, c = q.popleft()
-        explored += 1
-
-        if (r, c) == goal:
-            path: list[tuple[int, int]] = []
-            cur: Optional[tuple[int, int]] = goal
-            while cur is not None:
-                path.append(cur)
-                cur = parent[cur]
-            path.reverse()
-            return path, explored
-
-        for dr, dc in directions:
-            nr, nc = r + dr, c + dc
-            nxt = (nr, nc)
-
-            if not (0 <= nr < rows and 0 <= nc < cols):
-                continue
-            if laberinth[nr][nc] == 1:
-                continue
-            if nxt in parent:
-                continue
-
-            parent[nxt] = (r, c)
-            q.append(nxt)
-
-    return None, explored
-
-
-def _dfs_count_nodes(
-    laberinth: list[list[int]],
+from typing import Optional, Union
+
+from .maze_grid import Grid, as_grid
+from .maze_solver import find_goal, find_goals, solve_puzzle_dfs, bfs_shortest_paths, k_shortest_paths, nearest_path
+
+_FRONTIER_ENTRY_BYTES = 36  #Puntero de la lista (8) + int de Python (28) por celda en frontera
+
+
+class SearchStats:
+    """
+    Colector que reciben los solvers reales (parámetro stats=). Acumula:
+      searches       búsquedas ejecutadas (incluye las internas de Yen)
+      nodes          celdas expandidas
+      edges          aristas relajadas (celdas descubiertas o mejoradas)
+      peak_frontier  mayor frontera / heap / pila vista
+      peak_bytes     estimación del mayor espacio de trabajo (buffers + frontera)
+      spurs          un registro por desvío de k_shortest_paths con su tiempo
+      pruned         desvíos descartados por la cota sin buscar
+    """
+
+    __slots__ = ("searches", "nodes", "edges", "peak_frontier", "peak_bytes", "spurs", "pruned")
+
+    def __init__(self):
+        self.searches = 0
+        self.nodes = 0
+        self.edges = 0
+        self.peak_frontier = 0
+        self.peak_bytes = 0
+        self.spurs: list[dict] = []
+        self.pruned = 0
+
+    def level(self, expanded: int, discovered: int, frontier: int, buffer_bytes: int) -> None:
+        #Un nivel de BFS (o una expansión en A*/DFS)
+        self.nodes += expanded
+        self.edges += discovered
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+        used = buffer_bytes + frontier * _FRONTIER_ENTRY_BYTES
+        if used > self.peak_bytes:
+            self.peak_bytes = used
+
+    def spur(self, path_index: int, position: int, seconds: float, method: str, found: bool) -> None:
+        self.spurs.append({"path": path_index, "position": position, "ms": round(seconds * 1000, 4),
+                           "method": method, "found": found})
+
+    def as_dict(self) -> dict:
+        spur_ms = [spur["ms"] for spur in self.spurs]
+        return {
+            "searches": self.searches,
+            "nodes": self.nodes,
+            "edges": self.edges,
+            "peak_frontier": self.peak_frontier,
+            "peak_bytes": self.peak_bytes,
+            "spurs": len(self.spurs),
+            "spurs_pruned": self.pruned,
+            "spur_total_ms": round(sum(spur_ms), 4),
+            "spur_max_ms": max(spur_ms, default=0.0),
+            "spur_log": self.spurs,
+        }
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    #Rango más cercano: el valor que deja al menos esa fracción por debajo o igual
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(sorted_values: list[float]) -> dict[str, float]:
+    #p50/p90/p99/max de latencias ya ordenadas (ms), redondeados para reportes
+    return {name: round(percentile(sorted_values, fraction), 3)
+            for name, fraction in (("p50", 0.5), ("p90", 0.9), ("p99", 0.99), ("max", 1.0))}
+
+
+def collect_metrics(
+    laberinth: Union[Grid, list[list[int]]],
     start: tuple[int, int],
+    k: int = 4,
     goal_value: int = 9,
-) -> tuple[Optional[list[tuple[int, int]]], int]:
-    rows, cols = len(laberinth), len(laberinth[0])
-    visited: set[tuple[int, int]] = set()
-    path: list[tuple[int, int]] = []
-    explored = 0
-
-    def rec(r: int, c: int) -> Optional[list[tuple[int, int]]]:
-        nonlocal explored
-
-        if not (0 <= r < rows and 0 <= c < cols):
-            return None
-        if laberinth[r][c] == 1 or (r, c) in visited:
-            return None
-
-        explored += 1
-        visited.add((r, c))
-        path.append((r, c))
-
-        if laberinth[r][c] == goal_value:
-            return list(path)
-
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            res = rec(r + dr, c + dc)
-            if res is not None:
-                return res
-
-        path.pop()
-        visited.discard((r, c))
+    algorithm: str = "bfs",
+    all_goals: bool = False,
+) -> Optional[dict]:
+    #Ejecuta BFS, DFS y k-shortest con un colector cada uno; None si no hay salida
+    #all_goals = hacia cualquier salida (la BFS pasa a ser nearest_path, multi-destino)
+    grid = as_grid(laberinth)
+    goal = find_goal(grid, goal_value)
+    if goal is None:
         return None
 
-    return rec(start[0], start[1]), explored
+    def moves(p: Optional[list[tuple[int, int]]]) -> Optional[int]:
+        return (len(p) - 1) if p else None
+
+    report: dict = {"start": list(start), "goal": list(goal), "k": k, "algorithm": algorithm}
+    if all_goals:
+        report["goals"] = [list(cell) for cell in find_goals(grid, goal_value)]
+
+    stats = SearchStats()
+    t0 = perf_counter()
+    if all_goals:
+        path = nearest_path(grid, [start], goal_value=goal_value, stats=stats)
+    else:
+        path = bfs_shortest_paths(grid, start, goal, stats=stats)
+    report["bfs"] = {"ms": round((perf_counter() - t0) * 1000, 4), "moves": moves(path), **stats.as_dict()}
+
+    stats = SearchStats()
+    t0 = perf_counter()
+    path = solve_puzzle_dfs(grid, start[0], start[1], stats=stats)
+    report["dfs"] = {"ms": round((perf_counter() - t0) * 1000, 4), "moves": moves(path), **stats.as_dict()}
+
+    stats = SearchStats()
+    t0 = perf_counter()
+    paths = k_shortest_paths(grid, start[0], start[1], k=k, goal_value=goal_value, algorithm=algorithm, stats=stats,
+                             all_goals=all_goals)
+    report["k_shortest"] = {"ms": round((perf_counter() - t0) * 1000, 4), "paths": len(paths),
+                            "moves": [len(p) - 1 for p in paths], **stats.as_dict()}
+    if algorithm == "hpa": #Preproceso del índice que usó el motor (ya construido: no se mide de nuevo)
+        from .maze_hpa import hierarchical_index
+        report["hpa"] = hierarchical_index(grid).report()
+    for section in ("bfs", "dfs"): #Sin desvíos: solo ensuciarían el JSON
+        for key in ("spurs", "spurs_pruned", "spur_total_ms", "spur_max_ms", "spur_log"):
+            del report[section][key]
+    return report
 
 
 def print_advanced_metrics(
-    laberinth: list[list[int]],
+    laberinth: Union[Grid, list[list[int]]],
     start: tuple[int, int],
     k: int = 4,
     goal_value: int = 9,
+    algorithm: str = "bfs",
+    as_json: bool = False,
+    all_goals: bool = False,
 ) -> None:
-    goal = find_goal(laberinth, goal_value)
-    if goal is None:
+    report = collect_metrics(laberinth, start, k=k, goal_value=goal_value, algorithm=algorithm, all_goals=all_goals)
+    if as_json:
+        print(json.dumps(report))
+        return
+    if report is None:
         print("\n[MÉTRICAS] No existe salida (9) en el laberinto.")
         return
 
-    # BFS tiempo
-    t0 = perf_counter()
-    bfs_path = bfs_shortest_paths(laberinth, start, goal)
-    bfs_time = (perf_counter() - t0) * 1000
-
-    # BFS nodos explorados (con BFS instrumentado)
-    t0 = perf_counter()
-    _, bfs_nodes = _bfs_count_nodes(laberinth, start, goal)
-    bfs_count_time = (perf_counter() - t0) * 1000
-
-    # DFS tiempo
-    t0 = perf_counter()
-    dfs_path = solve_puzzle_dfs(laberinth, start[0], start[1])
-    dfs_time = (perf_counter() - t0) * 1000
-
-    # DFS nodos explorados (instrumentado)
-    t0 = perf_counter()
-    _, dfs_nodes = _dfs_count_nodes(laberinth, start, goal_value=goal_value)
-    dfs_count_time = (perf_counter() - t0) * 1000
+    bfs, dfs, ks = report["bfs"], report["dfs"], report["k_shortest"]
 
-    # K-shortest tiempo
-    t0 = perf_counter()
-    paths = k_shortest_paths(laberinth, start[0], start[1], k=k, goal_value=goal_value)
-    k_time = (perf_counter() - t0) * 1000
-
-    def moves(p: Optional[list[tuple[int, int]]]) -> Optional[int]:
-        return (len(p) - 1) if p else None
+    def counters(section: dict) -> str:
+        return (f"nodos={section['nodes']} aristas={section['edges']} "
+                f"frontera_max={section['peak_frontier']} memoria~{section['peak_bytes'] / 1024:.1f} KiB")
 
     print("\n" + "=" * 48)
     print("MÉTRICAS AVANZADAS")
     print("=" * 48)
-    print(f"Start: {start} | Goal: {goal}")
+    exits = f" (+{len(report['goals']) - 1} salidas más)" if len(report.get("goals", ())) > 1 else ""
+    print(f"Start: {tuple(report['start'])} | Goal: {tuple(report['goal'])}{exits}")
     print("-" * 48)
-    print(f"BFS:         tiempo={bfs_time:.3f} ms | movimientos={moves(bfs_path)}")
-    print(f"BFS (conteo): tiempo={bfs_count_time:.3f} ms | nodos_explorados={bfs_nodes}")
+    print(f"BFS:         tiempo={bfs['ms']:.3f} ms | movimientos={bfs['moves']}")
+    print(f"             {counters(bfs)}")
     print("-" * 48)
-    print(f"DFS:         tiempo={dfs_time:.3f} ms | movimientos={moves(dfs_path)}")
-    print(f"DFS (conteo): tiempo={dfs_count_time:.3f} ms | nodos_explorados={dfs_nodes}")
+    print(f"DFS:         tiempo={dfs['ms']:.3f} ms | movimientos={dfs['moves']}")
+    print(f"             {counters(dfs)}")
     print("-" * 48)
-    print(f"K-shortest (k={k}): tiempo={k_time:.3f} ms | caminos={len(paths)}")
-    if paths:
-        print(f"  Oficial:   movimientos={len(paths[0]) - 1}")
-        if len(paths) > 1:
-            print(f"  2da opción: movimientos={len(paths[1]) - 1}")
+    print(f"K-shortest (k={k}, {algorithm}): tiempo={ks['ms']:.3f} ms | caminos={ks['paths']}")
+    print(f"             {counters(ks)} búsquedas={ks['searches']}")
+    print(f"             desvíos={ks['spurs']} podados={ks['spurs_pruned']} "
+          f"total={ks['spur_total_ms']:.3f} ms max={ks['spur_max_ms']:.3f} ms")
+    if "hpa" in report:
+        hpa = report["hpa"]
+        print(f"  HPA:       bloque={hpa['cluster_size']} nodos={hpa['nodes']} aristas={hpa['edges']} "
+              f"preproceso={hpa['preprocess_ms']:.0f} ms memoria={hpa['memory_bytes'] / 1024:.0f} KiB")
+    if ks["moves"]:
+        print(f"  Oficial:   movimientos={ks['moves'][0]}")
+        if len(ks["moves"]) > 1:
+            print(f"  2da opción: movimientos={ks['moves'][1]}")
     print("=" * 48 + "\n")